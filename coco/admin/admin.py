@@ -4,6 +4,7 @@ from coco.core.management.commands import import_users
 from django_admin_conf_vars.models import ConfigurationVariable
 from django.conf.urls import patterns
 from django.contrib import admin, messages
+from django.contrib.admin.views.main import ChangeList
 from django.contrib.auth.admin import GroupAdmin
 from django.contrib.auth.models import User
 from django.core.urlresolvers import reverse
@@ -106,6 +107,21 @@ class ConfigurationVariableAdmin(admin.ModelAdmin):
         return False
 
 
+class ContainerChangeList(ChangeList):
+
+    """
+    Change list for the `Container` model.
+    """
+
+    def get_results(self, request):
+        """
+        :inherit.
+        """
+        super(ContainerChangeList, self).get_results(request)
+        # is_running and is_suspended are listed, so fetch them in bulk per server
+        Container.prefetch_backend_states(self.result_list)
+
+
 class ContainerAdmin(admin.ModelAdmin):
 
     """
@@ -136,17 +152,23 @@ class ContainerAdmin(admin.ModelAdmin):
         }),
         ('Backend Properties', {
             'classes': ['collapse'],
-            'fields': ['backend_pk']
+            'fields': ['backend_pk', 'last_accessed']
         })
     ]
 
+    def get_changelist(self, request, **kwargs):
+        """
+        :inherit.
+        """
+        return ContainerChangeList
+
     def get_readonly_fields(self, request, obj=None):
         """
         :inherit.
         """
         if obj:
-            return ['backend_pk', 'clone_of', 'image', 'name', 'owner', 'server']
-        return ['backend_pk']
+            return ['backend_pk', 'clone_of', 'image', 'last_accessed', 'name', 'owner', 'server']
+        return ['backend_pk', 'last_accessed']
 
     def response_change(self, request, obj):
         """
@@ -193,94 +215,53 @@ class ContainerAdmin(admin.ModelAdmin):
             return HttpResponseRedirect(reverse('admin:core_container_change', args=(obj.id,)))
         return super(ContainerAdmin, self).response_change(request, obj)
 
-    def restart_containers(self, request, queryset):
+    def execute_action(self, request, queryset, action, verb):
         """
-        Restart all selected containers.
+        Execute the lifecycle `action` on all selected containers (concurrently per server).
+
+        :param action: The action to execute (one of `Container.BULK_ACTIONS`).
+        :param verb: The past tense of the action for the message.
         """
-        failed = 0
-        restarted = 0
-        for container in queryset:
-            try:
-                container.restart()
-                restarted += 1
-            except Exception:
-                failed += 1
+        errors = Container.bulk_action(queryset, action)
+        failed = len([error for error in errors.values() if error is not None])
         self.message_user(
             request,
-            "Successfully restarted %i container(s). %i failed." % (restarted, failed)
+            "Successfully %s %i container(s). %i failed." % (verb, len(errors) - failed, failed)
         )
+
+    def restart_containers(self, request, queryset):
+        """
+        Restart all selected containers.
+        """
+        self.execute_action(request, queryset, 'restart', 'restarted')
     restart_containers.short_description = "Restart selected containers"
 
     def resume_containers(self, request, queryset):
         """
         Suspend all selected containers.
         """
-        failed = 0
-        resumed = 0
-        for container in queryset:
-            try:
-                container.resume()
-                resumed += 1
-            except Exception:
-                failed += 1
-        self.message_user(
-            request,
-            "Successfully resumed %i container(s). %i failed." % (resumed, failed)
-        )
+        self.execute_action(request, queryset, 'resume', 'resumed')
     resume_containers.short_description = "Resume selected containers"
 
     def start_containers(self, request, queryset):
         """
         Start all selected containers.
         """
-        failed = 0
-        started = 0
-        for container in queryset:
-            try:
-                container.start()
-                started += 1
-            except Exception:
-                failed += 1
-        self.message_user(
-            request,
-            "Successfully started %i container(s). %i failed." % (started, failed)
-        )
+        self.execute_action(request, queryset, 'start', 'started')
     start_containers.short_description = "Start selected containers"
 
     def stop_containers(self, request, queryset):
         """
         Start all selected containers.
         """
-        failed = 0
-        stopped = 0
-        for container in queryset:
-            try:
-                container.stop()
-                stopped += 1
-            except Exception:
-                failed += 1
-        self.message_user(
-            request,
-            "Successfully stopped %i container(s). %i failed." % (stopped, failed)
-        )
+        self.execute_action(request, queryset, 'stop', 'stopped')
     stop_containers.short_description = "Stop selected containers"
 
     def suspend_containers(self, request, queryset):
         """
         Suspend all selected containers.
         """
-        failed = 0
-        suspended = 0
-        for container in queryset:
-            try:
-                container.suspend()
-                suspended += 1
-            except Exception:
-                failed += 1
-        self.message_user(
-            request,
-            "Successfully suspended %i container(s). %i failed." % (suspended, failed)
-        )
+        self.execute_action(request, queryset, 'suspend', 'suspended')
     suspend_containers.short_description = "Suspend selected containers"
 
 
@@ -303,7 +284,7 @@ class ContainerImageAdmin(admin.ModelAdmin):
         }),
         ('Backend Properties', {
             'classes': ['collapse'],
-            'fields': ['backend_pk', 'command', 'protected_port', 'public_ports']
+            'fields': ['backend_pk', 'command', 'protected_port', 'public_ports', 'idle_timeout']
         }),
         ('Visibility Options', {
             'fields': ['is_public']
@@ -412,6 +393,39 @@ class GroupAdmin(admin.ModelAdmin):
         return []
 
 
+class JobAdmin(admin.ModelAdmin):
+
+    """
+    Admin model for the `Job` model.
+    """
+
+    list_display = ['id', 'action', 'status', 'owner', 'container', 'created_on', 'finished_on']
+    list_filter = ['action', 'status']
+
+    fieldsets = [
+        ('General Properties', {
+            'fields': ['action', 'status', 'owner', 'error']
+        }),
+        ('Related Objects', {
+            'fields': ['container', 'image', 'snapshot']
+        }),
+        ('Execution', {
+            'classes': ['collapse'],
+            'fields': ['key', 'arguments', 'worker', 'attempts', 'created_on', 'started_on', 'finished_on']
+        })
+    ]
+    readonly_fields = [
+        'action', 'status', 'owner', 'error', 'container', 'image', 'snapshot',
+        'key', 'arguments', 'worker', 'attempts', 'created_on', 'started_on', 'finished_on'
+    ]
+
+    def has_add_permission(self, request):
+        """
+        :inherit.
+        """
+        return False  # jobs are queued by the operations only
+
+
 class NotificationAdmin(admin.ModelAdmin):
 
     """
@@ -488,7 +502,7 @@ class ServerAdmin(admin.ModelAdmin):
     Admin model for the `Server` model.
     """
 
-    list_display = ['name', 'internal_ip', 'external_ip', 'is_container_host']
+    list_display = ['name', 'internal_ip', 'external_ip', 'is_container_host', 'is_healthy']
     list_filter = [
         ('container_backend', admin.RelatedOnlyFieldListFilter),
     ]
@@ -503,6 +517,13 @@ class ServerAdmin(admin.ModelAdmin):
         })
     ]
 
+    def get_queryset(self, request):
+        """
+        :inherit.
+        """
+        # `is_healthy` uses the prefetched status instead of querying it per row
+        return super(ServerAdmin, self).get_queryset(request).prefetch_related(ServerStatus.prefetch_latest())
+
     def get_readonly_fields(self, request, obj=None):
         """
         :inherit.
@@ -642,6 +663,7 @@ admin_site.register(Container, ContainerAdmin)
 admin_site.register(ContainerImage, ContainerImageAdmin)
 admin_site.register(ContainerSnapshot, ContainerSnapshotAdmin)
 admin_site.register(Group, GroupAdmin)
+admin_site.register(Job, JobAdmin)
 admin_site.register(Notification, NotificationAdmin)
 admin_site.register(PortMapping, PortMappingAdmin)
 admin_site.register(Server, ServerAdmin)
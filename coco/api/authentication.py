@@ -0,0 +1,27 @@
+from coco.core.caches import api_token_cache
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+
+    """
+    Token authentication looking the tokens up in the API token cache first.
+
+    Unlike HTTP basic authentication, no bind against the user backend (and no password hashing) is needed per call.
+    Clients send the header `Authorization: Token <key>`, the key is issued upon login (or by the `token` endpoint).
+    """
+
+    def authenticate_credentials(self, key):
+        """
+        :inherit.
+        """
+        cached = api_token_cache.get(key)
+        if cached is None:
+            user, token = super(CachedTokenAuthentication, self).authenticate_credentials(key)
+            api_token_cache.set(token)
+            return (user, token)
+        user, token = cached
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        return (user, token)
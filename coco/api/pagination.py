@@ -0,0 +1,64 @@
+from coco.core import settings
+from django.utils import six
+from rest_framework import pagination
+
+
+class CursorPagination(pagination.CursorPagination):
+
+    """
+    Keyset pagination over an indexed column (the primary key unless the view sets an `ordering`).
+
+    Other than with page numbers/offsets, a page is selected by filtering on the position of the
+    last row of the previous page, so fetching a page costs the same no matter how many rows precede it.
+    Rows added meanwhile do not shift the pages either. The view's ordering may follow relations
+    (i.e. `-notification__date`) and should be (nearly) unique, rows sharing a position are paged by offset.
+
+    Only the views listing unbounded tables set it as their `pagination_class`, the other lists are not paginated.
+    """
+
+    ordering = 'pk'
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+
+    def get_ordering(self, request, queryset, view):
+        """
+        :inherit.
+        """
+        ordering = getattr(view, 'ordering', None)
+        if ordering is None:
+            return super(CursorPagination, self).get_ordering(request, queryset, view)
+        if isinstance(ordering, six.string_types):
+            return (ordering,)
+        return tuple(ordering)
+
+    def get_page_size(self, request):
+        """
+        Get the page size requested by the client (falls back to the default for invalid sizes).
+
+        :param request: The request to get the page size for.
+        """
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, settings.API_MAX_PAGE_SIZE)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        :inherit.
+        """
+        self.page_size = self.get_page_size(request)
+        return super(CursorPagination, self).paginate_queryset(queryset, request, view)
+
+    def _get_position_from_instance(self, instance, ordering):
+        """
+        :inherit.
+
+        Follows the relations of orderings like `-notification__date`.
+        """
+        value = instance
+        for name in ordering[0].lstrip('-').split('__'):
+            value = getattr(value, name)
+        return six.text_type(value)
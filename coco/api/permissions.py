@@ -161,6 +161,13 @@ class IsSuperUserOrIsObjectOwner(
         return False
 
 
+class JobDetailPermission(IsSuperUserOrIsObjectOwner):
+    """
+    Only the user who requested a job (and superusers) can see it.
+    """
+    pass
+
+
 class NotificationDetailPermission(
         permissions.BasePermission,
         HasAccessMixin,
@@ -27,7 +27,53 @@ class CurrentBackendUserDefault(object):
         return unicode_to_repr('%s()' % self.__class__.__name__)
 
 
-class ConfigurationVariableSerializer(serializers.ModelSerializer):
+def get_requested_field_names(request, param):
+    """
+    Get the set of field names passed as comma-separated list in the query parameter `param`.
+
+    :param request: The request to get the field names from.
+    :param param: The name of the query parameter.
+    """
+    names = request.query_params.get(param, '')
+    return set(name.strip() for name in names.split(',') if name.strip())
+
+
+class DynamicFieldsMixin(object):
+    """
+    Serializer mixin for sparse fieldsets.
+
+    All fields are rendered by default. On GET requests, clients can opt in to smaller responses:
+    the `fields` query parameter limits the rendered (top-level) fields, i.e. `?fields=id,name`,
+    and the `omit` query parameter leaves out the listed ones, i.e. `?omit=is_running,port_mappings`.
+    Serializers used without a request in their context always render all fields.
+    """
+
+    def get_fields(self):
+        """
+        :inherit.
+        """
+        fields = super(DynamicFieldsMixin, self).get_fields()
+        request = self.context.get('request')
+        if request is None or request.method != 'GET' or not self.is_top_level():
+            return fields
+        requested = get_requested_field_names(request, 'fields')
+        omitted = get_requested_field_names(request, 'omit')
+        for name in list(fields.keys()):
+            if name in omitted or (requested and name not in requested):
+                fields.pop(name)
+        return fields
+
+    def is_top_level(self):
+        """
+        Check if this serializer renders the response itself (or its list items), i.e. is not nested.
+        """
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+
+class ConfigurationVariableSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Todo: write doc.
     """
@@ -36,7 +82,7 @@ class ConfigurationVariableSerializer(serializers.ModelSerializer):
         model = ConfigurationVariable
 
 
-class FlatCollaborationGroupSerializer(serializers.ModelSerializer):
+class FlatCollaborationGroupSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Todo: write doc.
     """
@@ -48,7 +94,7 @@ class FlatCollaborationGroupSerializer(serializers.ModelSerializer):
         read_only_fields = ('admins', 'is_single_user_group')
 
 
-class FlatBackendUserSerializer(serializers.ModelSerializer):
+class FlatBackendUserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Todo: write doc.
     """
@@ -59,7 +105,7 @@ class FlatBackendUserSerializer(serializers.ModelSerializer):
         fields = ('id', 'collab_group',)
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Todo: write doc.
     """
@@ -71,7 +117,7 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'username', 'backend_user', 'is_staff')
 
 
-class NestedBackendUserSerializer(serializers.ModelSerializer):
+class NestedBackendUserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Todo: write doc.
     """
@@ -83,7 +129,7 @@ class NestedBackendUserSerializer(serializers.ModelSerializer):
         fields = ('id', 'username', 'django_user')
 
 
-class GroupSerializer(serializers.ModelSerializer):
+class GroupSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Todo: write doc.
     """
@@ -95,7 +141,7 @@ class GroupSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'user_set')
 
 
-class BackendGroupSerializer(serializers.ModelSerializer):
+class BackendGroupSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Todo: write doc.
     """
@@ -104,7 +150,7 @@ class BackendGroupSerializer(serializers.ModelSerializer):
         model = BackendGroup
 
 
-class BackendSerializer(serializers.ModelSerializer):
+class BackendSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Todo: write doc.
     """
@@ -114,7 +160,7 @@ class BackendSerializer(serializers.ModelSerializer):
         model = Backend
 
 
-class NestedCollaborationGroupSerializer(serializers.ModelSerializer):
+class NestedCollaborationGroupSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Todo: write doc.
     """
@@ -128,7 +174,7 @@ class NestedCollaborationGroupSerializer(serializers.ModelSerializer):
         read_only_fields = ('admins', 'is_single_user_group')
 
 
-class ServerSerializer(serializers.ModelSerializer):
+class ServerSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Todo: write doc.
     """
@@ -138,7 +184,33 @@ class ServerSerializer(serializers.ModelSerializer):
         model = Server
 
 
-class PortMappingSerializer(serializers.ModelSerializer):
+class ServerStatusSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """
+    Serializer for the health probe results of a server.
+    """
+    class Meta:
+        model = ServerStatus
+        exclude = ('server',)
+
+
+class ServerHealthSerializer(ServerSerializer):
+    """
+    Server serializer including the latest (non-stale) health probe result.
+
+    The latest statuses should be prefetched (see `ServerStatus.prefetch_latest`).
+    """
+    is_healthy = serializers.BooleanField(read_only=True)
+    status = ServerStatusSerializer(source='get_status', read_only=True)
+
+
+class ServerHistorySerializer(ServerHealthSerializer):
+    """
+    Server serializer including the health probe history (latest first) as well.
+    """
+    statuses = ServerStatusSerializer(many=True, read_only=True)
+
+
+class PortMappingSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
 
     """
@@ -148,15 +220,16 @@ class PortMappingSerializer(serializers.ModelSerializer):
         model = PortMapping
 
 
-class FlatContainerSerializer(serializers.ModelSerializer):
+class FlatContainerSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Todo: write doc.
     """
     class Meta:
         model = Container
+        read_only_fields = ('last_accessed',)
 
 
-class ContainerSerializer(serializers.ModelSerializer):
+class ContainerSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Todo: write doc.
     Although server can be set on creation, it will be ignored.
@@ -166,6 +239,7 @@ class ContainerSerializer(serializers.ModelSerializer):
     backend_base_url = serializers.CharField(read_only=True, source='get_backend_base_url')
     friendly_name = serializers.CharField(read_only=True, source='get_friendly_name')
     is_clone = serializers.BooleanField(read_only=True)
+    is_created = serializers.BooleanField(read_only=True)
     is_image_based = serializers.BooleanField(read_only=True)
     is_running = serializers.BooleanField(read_only=True)
     is_suspended = serializers.BooleanField(read_only=True)
@@ -184,17 +258,17 @@ class ContainerSerializer(serializers.ModelSerializer):
         read_only=True,
         default=randint(0, 1000)
     )
-    # set dummy default, will be overriden on creation anyway
+    # empty until the container has been created on the backend (see `is_created`)
     backend_pk = serializers.CharField(
-        default=randint(0, 1000),
         read_only=True
     )
 
     class Meta:
         model = Container
+        read_only_fields = ('last_accessed',)
 
 
-class ContainerImageSerializer(serializers.ModelSerializer):
+class ContainerImageSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Todo: write doc.
     """
@@ -204,20 +278,22 @@ class ContainerImageSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ContainerImage
+        exclude = ('servers',)  # internal placement index
+        read_only_fields = ('idle_timeout',)  # set by the admins
 
 
-class FlatContainerImageSerializer(serializers.ModelSerializer):
+class FlatContainerImageSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Todo: write doc.
     """
     friendly_name = serializers.CharField(read_only=True, source='get_friendly_name')
     access_groups = FlatCollaborationGroupSerializer(many=True, read_only=True)
 
-    class Meta:
-        model = ContainerImage
+    class Meta(ContainerImageSerializer.Meta):
+        pass
 
 
-class ContainerSnapshotSerializer(serializers.ModelSerializer):
+class ContainerSnapshotSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Todo: write doc.
     """
@@ -228,7 +304,19 @@ class ContainerSnapshotSerializer(serializers.ModelSerializer):
         model = ContainerSnapshot
 
 
-class TagSerializer(serializers.ModelSerializer):
+class JobSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """
+    Serializer for the queued container backend operations (read-only, they are created by the API calls).
+    """
+    class Meta:
+        model = Job
+        read_only_fields = (
+            'id', 'action', 'status', 'key', 'arguments', 'owner', 'container', 'image', 'snapshot',
+            'worker', 'attempts', 'error', 'created_on', 'started_on', 'finished_on'
+        )
+
+
+class TagSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Todo: write doc.
     """
@@ -237,7 +325,7 @@ class TagSerializer(serializers.ModelSerializer):
         model = Tag
 
 
-class NestedShareSerializer(serializers.ModelSerializer):
+class NestedShareSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Nested ShareSerializer where all related fields are verbose.
     Used for read_only.
@@ -251,7 +339,7 @@ class NestedShareSerializer(serializers.ModelSerializer):
         model = Share
 
 
-class FlatShareSerializer(serializers.ModelSerializer):
+class FlatShareSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Flat ShareSerializer where all related fields are only represented by their id.
     Used for write actions.
@@ -316,7 +404,7 @@ class FlatShareSerializer(serializers.ModelSerializer):
         return share
 
 
-class NestedNotificationSerializer(serializers.ModelSerializer):
+class NestedNotificationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Todo: write doc.
     """
@@ -330,7 +418,7 @@ class NestedNotificationSerializer(serializers.ModelSerializer):
         read_only_fields = ('date', )
 
 
-class FlatNotificationSerializer(serializers.ModelSerializer):
+class FlatNotificationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Todo: write doc.
     """
@@ -340,7 +428,7 @@ class FlatNotificationSerializer(serializers.ModelSerializer):
         read_only_fields = ('date', )
 
 
-class NotificationLogSerializer(serializers.ModelSerializer):
+class NotificationLogSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Todo: write doc.
     """
@@ -353,7 +441,7 @@ class NotificationLogSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'notification', 'user')
 
 
-class SuperUserNotificationLogSerializer(serializers.ModelSerializer):
+class SuperUserNotificationLogSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Special NotificationLogSerializer for superusers, that additionally shows the in_use field.
     """
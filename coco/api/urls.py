@@ -1,5 +1,6 @@
 from coco.api import views
 from django.conf.urls import patterns, url
+from rest_framework.authtoken.views import obtain_auth_token
 from rest_framework.urlpatterns import format_suffix_patterns
 
 urlpatterns = patterns('',
@@ -31,6 +32,7 @@ urlpatterns = patterns('',
     url(r'^containers/?$', views.ContainerList.as_view(), name="containers"),
     url(r'^containers/(?P<pk>[0-9]+)$', views.ContainerDetail.as_view(), name="container_detail"),
 
+    url(r'^containers/bulk/(?P<action>\w+)$', views.container_bulk_action, name="container_bulk_action"),
     url(r'^containers/(?P<pk>[0-9]+)/clone$', views.container_clone, name="container_clone"),
     url(r'^containers/(?P<pk>[0-9]+)/clones$', views.container_clones, name="container_clones"),
     url(r'^containers/(?P<pk>[0-9]+)/snapshots/?$', views.ContainerSnapshotsList.as_view(), name="container_snapshots"),
@@ -53,6 +55,13 @@ urlpatterns = patterns('',
     url(r'^containers/snapshots/(?P<pk>[0-9]+)$', views.ContainerSnapshotDetail.as_view(), name="snapshot_detail"),
     url(r'^containers/snapshots/(?P<pk>[0-9]+)/restore$', views.container_snapshot_restore, name="container_snapshot_restore"),
 
+    # /api/jobs(/)...
+    url(r'^jobs/?$', views.JobList.as_view(), name="jobs"),
+    url(r'^jobs/(?P<pk>[0-9]+)$', views.JobDetail.as_view(), name="job_detail"),
+
+    # /api/token
+    url(r'^token/?$', obtain_auth_token, name="token"),
+
     # /api/servers(/)...
     url(r'^servers/?$', views.ServerList.as_view(), name="servers"),
     url(r'^servers/(?P<pk>[0-9]+)$', views.ServerDetail.as_view(), name="server_detail"),
@@ -75,9 +84,13 @@ urlpatterns = patterns('',
     # /api/notificationtypes(/)..
     url(r'^notificationtypes/?$', views.notification_types, name="notification_types"),
 
+    # /api/metrics
+    url(r'^metrics/?$', views.metrics, name="metrics"),
+
     # /api/notificationlogs(/)...
     url(r'^notificationlogs/?$', views.NotificationLogList.as_view(), name="notificationlogs"),
     url(r'^notificationlogs/unread$', views.NotificationLogUnreadList.as_view(), name="notificationlogs_unread"),
+    url(r'^notificationlogs/unread/count$', views.notificationlogs_unread_count, name="notificationlogs_unread_count"),
     url(r'^notificationlogs/mark_all_as_read$', views.notificationlogs_mark_all_as_read, name="notificationlogs_mark_all_as_read"),
     url(r'^notificationlogs/(?P<pk>[0-9]+)$', views.NotificationLogDetail.as_view(), name="notificationlog_detail"),
 
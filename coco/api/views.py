@@ -1,14 +1,20 @@
+from coco.api.pagination import CursorPagination
 from coco.api.permissions import *
+from coco.core import settings
+from coco.core.caches import api_token_cache, container_state_cache, \
+    credential_cache
 from coco.core.helpers import get_server_selection_algorithm
 from coco.core.models import *
 from coco.api.serializer import *
 from django.contrib.auth.models import User, Group
-from django.db.models import Q
+from django.db.models import Count, Prefetch, Q
+from django.db.models.query import prefetch_related_objects
 from django_admin_conf_vars.models import ConfigurationVariable
 from rest_framework import generics, status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import *
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 
 
 # TODO: check for unique names before creation of objects !
@@ -25,6 +31,52 @@ def validate_request_params(required_params, request):
     return params
 
 
+def get_backend_users(users):
+    """
+    Get the backend users of the Django `users` (skipping the ones without).
+    """
+    return [user.backend_user for user in users if hasattr(user, 'backend_user')]
+
+
+class PrefetchListMixin(object):
+
+    """
+    Mixin for list views fetching the related objects of all listed rows in bulk.
+
+    Related objects used by model methods (e.g. `get_members`) cannot be covered by
+    `select_related`/`prefetch_related`, so the objects of the listed page are passed to
+    `prefetch` before being serialized, keeping the number of queries independent of the number of rows.
+    """
+
+    def list(self, request, *args, **kwargs):
+        """
+        :inherit.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        objects = list(page if page is not None else queryset)
+        self.prefetch(objects)
+
+        serializer = self.get_serializer(objects, many=True)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    def get_requested_fields(self):
+        """
+        Get the names of the fields the listed objects are serialized with (see `DynamicFieldsMixin`).
+        """
+        return set(self.get_serializer().fields.keys())
+
+    def prefetch(self, objects):
+        """
+        Fetch the related objects of the listed `objects` in bulk.
+
+        :param objects: The list of objects about to be serialized.
+        """
+        raise NotImplementedError
+
+
 @api_view(('GET',))
 def api_root(request, format=None):
     """
@@ -57,6 +109,9 @@ def api_root(request, format=None):
             }
         },
         'snapshots': 'Get a list of all container snapshots available to your user.',
+        'bulk': {
+            '{action}': 'Restart, resume, start, stop or suspend the containers with the given ids.'
+        },
         '{id}': {
             '': 'Get details about a container.',
             'commit': 'Create an image from the container.',
@@ -94,6 +149,11 @@ def api_root(request, format=None):
         'mark_all_as_read': 'Mark all your notificationlogs as read.'
     }
     available_endpoints['notificationtypes'] = 'Get a list of all available notificationtypes.'
+    available_endpoints['jobs'] = {
+        '': 'Get a list of your queued container operations.',
+        '{id}': 'Get the state of a queued container operation.'
+    }
+    available_endpoints['token'] = 'Get your API token (POST username and password), send it as "Authorization: Token <key>".'
 
     # additional endpoints for superusers only
     if request.user.is_superuser:
@@ -109,6 +169,7 @@ def api_root(request, format=None):
             '': 'Get a list of all available servers.',
             '{id}': 'Get details about a server.'
         }
+        available_endpoints['metrics'] = 'Get the runtime metrics of the serving process.'
 
     return Response(available_endpoints)
 
@@ -135,16 +196,19 @@ class ConfigurationVariableDetail(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsSuperUser]
 
 
-class UserList(generics.ListAPIView):
+class UserList(PrefetchListMixin, generics.ListAPIView):
     """
     Get a list of all users (`django.contrib.auth.models.User`).
     Only visible to authenticated users.
     """
 
-    queryset = User.objects.all()
+    queryset = User.objects.select_related('backend_user')
     serializer_class = UserSerializer
     permission_classes = [IsSuperUserOrAuthenticatedAndReadOnly]
 
+    def prefetch(self, users):
+        BackendUser.prefetch_collaboration_groups(get_backend_users(users))
+
 
 class UserDetail(generics.RetrieveUpdateDestroyAPIView):
     """
@@ -157,16 +221,23 @@ class UserDetail(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsSuperUserOrAuthenticatedAndReadOnly]
 
 
-class GroupList(generics.ListAPIView):
+class GroupList(PrefetchListMixin, generics.ListAPIView):
     """
     Get a list of all groups.
     Only visible to authenticated users.
     """
 
-    queryset = Group.objects.all()
+    queryset = Group.objects.prefetch_related(
+        Prefetch('user_set', queryset=User.objects.select_related('backend_user'))
+    )
     serializer_class = GroupSerializer
     permission_classes = [IsAuthenticatedAndReadOnly]
 
+    def prefetch(self, groups):
+        BackendUser.prefetch_collaboration_groups(
+            get_backend_users(user for group in groups for user in group.user_set.all())
+        )
+
 
 class BackendList(generics.ListCreateAPIView):
     """
@@ -186,7 +257,7 @@ class BackendDetail(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsSuperUser]
 
 
-class CollaborationGroupList(generics.ListCreateAPIView):
+class CollaborationGroupList(PrefetchListMixin, generics.ListCreateAPIView):
     """
     Get a list of all the collaboration groups the user is in.
     """
@@ -205,7 +276,14 @@ class CollaborationGroupList(generics.ListCreateAPIView):
                 | Q(creator=self.request.user.backend_user.id)
                 | Q(is_public=True)
             ).distinct()
-        return queryset
+        return queryset.select_related('creator__django_user')
+
+    def prefetch(self, groups):
+        CollaborationGroup.prefetch_members(groups)
+        users = [group.creator for group in groups if group.creator is not None]
+        if 'members' in self.get_requested_fields():
+            users.extend(member for group in groups for member in group.get_members())
+        BackendUser.prefetch_collaboration_groups(users)
 
     def perform_create(self, serializer):
         if hasattr(self.request.user, 'backend_user'):
@@ -436,7 +514,22 @@ def collaborationgroup_leave(request, pk):
     return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-class ContainerList(generics.ListCreateAPIView):
+def select_container_relations(queryset, fields=None):
+    """
+    Select/prefetch everything the `ContainerSerializer` needs on the containers of `queryset`.
+
+    :param queryset: The containers to serialize.
+    :param fields: The names of the fields to serialize (`None` for all).
+    """
+    queryset = queryset.select_related('server', 'owner__django_user', 'image', 'clone_of__image')
+    if fields is None or 'port_mappings' in fields or 'backend_base_url' in fields:
+        queryset = queryset.prefetch_related('port_mappings__server')
+    if fields is None or 'has_clones' in fields:
+        queryset = queryset.annotate(clone_count=Count('base_for'))
+    return queryset
+
+
+class ContainerList(PrefetchListMixin, generics.ListCreateAPIView):
     """
     Get a list of all the containers.
     """
@@ -447,19 +540,28 @@ class ContainerList(generics.ListCreateAPIView):
             queryset = Container.objects.all()
         else:
             queryset = Container.objects.filter(owner=self.request.user.backend_user.id)
-        return queryset
+        return select_container_relations(queryset, self.get_requested_fields())
+
+    def prefetch(self, containers):
+        if set(['is_running', 'is_suspended']) & self.get_requested_fields():
+            # resolve the running/suspended states with one backend call per server
+            Container.prefetch_backend_states(containers)
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
+        job = getattr(serializer.instance, 'pending_job', None)
+        if job is not None:
+            return get_job_response(request, job)
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
     def perform_create(self, serializer):
         # target server gets selected by selection algorithm
         server = get_server_selection_algorithm().choose_server(
-            Server.objects.all().iterator()
+            Server.objects.filter(container_backend__isnull=False),
+            image=serializer.validated_data.get('image')
         )
         if hasattr(self.request.user, 'backend_user'):
             serializer.save(
@@ -480,6 +582,20 @@ class ContainerDetail(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [ContainerDetailPermission]
     queryset = Container.objects.all()
 
+    def destroy(self, request, *args, **kwargs):
+        instance = self.get_object()
+        self.perform_destroy(instance)
+        job = getattr(instance, 'pending_job', None)
+        if job is not None:
+            return get_job_response(request, job)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def perform_destroy(self, instance):
+        # the deletion job belongs to the deleting user
+        if hasattr(self.request.user, 'backend_user'):
+            instance.deleted_by = self.request.user.backend_user
+        instance.delete()
+
 
 def get_container(pk):
     """
@@ -492,6 +608,26 @@ def get_container(pk):
         return None
 
 
+def get_not_created_response(container):
+    """
+    Get the response for a lifecycle action on `container` while it has not been created on the backend yet.
+    """
+    return Response(
+        {"error": "Container has not been created yet, retry once its creation job has finished.", "pk": container.id},
+        status=status.HTTP_409_CONFLICT
+    )
+
+
+def get_job_response(request, job):
+    """
+    Get the response for an operation that has been queued as `job`.
+
+    The job can be polled at the URL given in the `Location` header.
+    """
+    location = reverse('job_detail', kwargs={'pk': job.id}, request=request)
+    return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED, headers={'Location': location})
+
+
 @api_view(['POST'])
 def container_clone(request, pk):
     """
@@ -520,8 +656,12 @@ def container_clone(request, pk):
     validate_object_permission(ContainerDetailPermission, request, origin)
 
     if origin:
+        if not origin.is_created():
+            return get_not_created_response(origin)
         clone = origin.clone(**params)
         clone.save()
+        if getattr(clone, 'pending_job', None) is not None:
+            return get_job_response(request, clone.pending_job)
         serializer = ContainerSerializer(clone)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     else:
@@ -555,6 +695,8 @@ def container_commit(request, pk):
 
     if container:
         image = container.commit(**params)
+        if getattr(image, 'pending_job', None) is not None:
+            return get_job_response(request, image.pending_job)
 
         serializer = ContainerImageSerializer(image)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -591,12 +733,66 @@ def container_create_snapshot(request, pk):
     if origin:
         snapshot = origin.create_snapshot(**params)
         snapshot.save()
+        if getattr(snapshot, 'pending_job', None) is not None:
+            return get_job_response(request, snapshot.pending_job)
         serializer = ContainerSnapshotSerializer(snapshot)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     else:
         return Response({"error": "Container not found!", "pk": pk})
 
 
+@api_view(['POST'])
+def container_bulk_action(request, action):
+    """
+    Execute a lifecycle action on many containers at once.
+
+    The containers are grouped by server and the backend calls are executed concurrently.
+    :param action   the action to execute (restart, resume, start, stop or suspend)
+    :param ids      list of the pks of the containers (at most `CONTAINER_BULK_ACTION_MAX_IDS`)
+    """
+    if not request.user.is_superuser and not hasattr(request.user, 'backend_user'):
+        return Response(
+            {"error": "Only backend users can execute container actions."},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    if action not in Container.BULK_ACTIONS:
+        return Response(
+            {"error": "Unknown action.", "actions": Container.BULK_ACTIONS},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if hasattr(request.data, 'getlist'):
+        ids = request.data.getlist('ids')
+    else:
+        ids = request.data.get('ids')
+    try:
+        ids = [int(pk) for pk in ids]
+    except (TypeError, ValueError):
+        return Response(
+            {"error": "Please provide the container ids: {\"ids\": [1, 2, 3]}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if not ids or len(ids) > settings.CONTAINER_BULK_ACTION_MAX_IDS:
+        return Response(
+            {"error": "Please provide 1 to %i container ids." % settings.CONTAINER_BULK_ACTION_MAX_IDS},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if request.user.is_superuser:
+        queryset = Container.objects.all()
+    else:
+        queryset = Container.objects.filter(owner=request.user.backend_user)
+    containers = queryset.filter(id__in=ids)
+    errors = Container.bulk_action(containers, action)
+
+    results = []
+    for pk in ids:
+        if pk not in errors:
+            results.append({"id": pk, "success": False, "error": "Container not found!"})
+        else:
+            results.append({"id": pk, "success": errors.get(pk) is None, "error": errors.get(pk)})
+    return Response({"action": action, "results": results}, status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 def container_clones(request, pk):
     container = get_container(pk)
@@ -605,7 +801,8 @@ def container_clones(request, pk):
     validate_object_permission(ContainerDetailPermission, request, container)
 
     if container:
-        clones = container.get_clones()
+        clones = list(select_container_relations(container.get_clones()))
+        Container.prefetch_backend_states(clones)
         serializer = ContainerSerializer(clones, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
     else:
@@ -626,6 +823,8 @@ def container_restart(request, pk):
         # validate permissions
         validate_object_permission(ContainerDetailPermission, request, container)
 
+        if not container.is_created():
+            return get_not_created_response(container)
         container.restart()
         return Response({"message": "container rebooting"}, status=status.HTTP_200_OK)
     else:
@@ -644,6 +843,8 @@ def container_resume(request, pk):
         container = containers.first()
         # validate permissions
         validate_object_permission(ContainerDetailPermission, request, container)
+        if not container.is_created():
+            return get_not_created_response(container)
         container.resume()
         return Response({"message": "container resuming"}, status=status.HTTP_200_OK)
     else:
@@ -663,6 +864,8 @@ def container_start(request, pk):
         container = containers.first()
         # validate permissions
         validate_object_permission(ContainerDetailPermission, request, container)
+        if not container.is_created():
+            return get_not_created_response(container)
         container.start()
         return Response({"message": "container booting"}, status=status.HTTP_200_OK)
     else:
@@ -682,6 +885,8 @@ def container_stop(request, pk):
         container = containers.first()
         # validate permissions
         validate_object_permission(ContainerDetailPermission, request, container)
+        if not container.is_created():
+            return get_not_created_response(container)
         container.stop()
         return Response({"message": "container stopping"}, status=status.HTTP_200_OK)
     else:
@@ -701,6 +906,8 @@ def container_suspend(request, pk):
         container = containers.first()
         # validate permissions
         validate_object_permission(ContainerDetailPermission, request, container)
+        if not container.is_created():
+            return get_not_created_response(container)
         container.suspend()
         return Response({"message": "container suspending"}, status=status.HTTP_200_OK)
     else:
@@ -708,7 +915,7 @@ def container_suspend(request, pk):
     pass
 
 
-class ContainerImageList(generics.ListCreateAPIView):
+class ContainerImageList(PrefetchListMixin, generics.ListCreateAPIView):
     """
     Get a list of all the container images.
     """
@@ -733,7 +940,13 @@ class ContainerImageList(generics.ListCreateAPIView):
                 queryset = ContainerImage.objects.filter(
                     Q(is_internal=False) & (Q(owner=self.request.user) | Q(is_public=True))
                 ).distinct()
-        return queryset
+        return queryset.select_related('owner__backend_user')
+
+    def prefetch(self, images):
+        if 'access_groups' in self.get_requested_fields():
+            prefetch_related_objects(images, ['access_groups'])
+            CollaborationGroup.prefetch_members(group for image in images for group in image.access_groups.all())
+        BackendUser.prefetch_collaboration_groups(get_backend_users(image.owner for image in images))
 
 
 class ContainerImageDetail(generics.RetrieveUpdateDestroyAPIView):
@@ -849,7 +1062,7 @@ class ContainerSnapshotsList(generics.ListAPIView):
             queryset = ContainerSnapshot.objects.filter(
                 container__owner=self.request.user.backend_user
             ).filter(container=pk)
-            return queryset
+        return queryset.select_related('container__owner__django_user')
 
 
 class ContainerSnapshotList(generics.ListAPIView):
@@ -865,7 +1078,7 @@ class ContainerSnapshotList(generics.ListAPIView):
             queryset = ContainerSnapshot.objects.filter(
                 container__owner=self.request.user.backend_user
             )
-            return queryset
+        return queryset.select_related('container__owner__django_user')
 
 
 class ContainerSnapshotDetail(generics.RetrieveUpdateDestroyAPIView):
@@ -891,31 +1104,58 @@ def container_snapshot_restore(request, pk):
         # validate permissions
         validate_object_permission(ContainerDetailPermission, request, container)
         s.restore()
+        if getattr(s, 'pending_job', None) is not None:
+            return get_job_response(request, s.pending_job)
         serializer = ContainerSerializer(container)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     else:
         return Response({"error": "Snapshot not found!", "pk": pk})
 
 
+class JobList(generics.ListAPIView):
+    """
+    Get a list of the queued container operations (latest first).
+    """
+    serializer_class = JobSerializer
+    pagination_class = CursorPagination
+    ordering = '-pk'
+
+    def get_queryset(self):
+        if self.request.user.is_superuser:
+            queryset = Job.objects.all()
+        else:
+            queryset = Job.objects.filter(owner=self.request.user.backend_user)
+        return queryset.order_by('-id')
+
+
+class JobDetail(generics.RetrieveAPIView):
+    """
+    Get the state of a queued container operation.
+    """
+    serializer_class = JobSerializer
+    permission_classes = [JobDetailPermission]
+    queryset = Job.objects.all()
+
+
 class ServerList(generics.ListCreateAPIView):
     """
-    Get a list of all the servers.
+    Get a list of all the servers (including their latest health probe result).
     """
-    queryset = Server.objects.all()
-    serializer_class = ServerSerializer
+    queryset = Server.objects.prefetch_related(ServerStatus.prefetch_latest())
+    serializer_class = ServerHealthSerializer
     permission_classes = [IsSuperUser]
 
 
 class ServerDetail(generics.RetrieveUpdateDestroyAPIView):
     """
-    Get details of a server.
+    Get details of a server (including its health probe history).
     """
-    queryset = Server.objects.all()
-    serializer_class = ServerSerializer
+    queryset = Server.objects.prefetch_related(ServerStatus.prefetch_latest(), 'statuses')
+    serializer_class = ServerHistorySerializer
     permission_classes = [IsSuperUser]
 
 
-class ShareList(generics.ListCreateAPIView):
+class ShareList(PrefetchListMixin, generics.ListCreateAPIView):
     """
     Get a list of all the shares.
     """
@@ -927,11 +1167,22 @@ class ShareList(generics.ListCreateAPIView):
 
     def get_queryset(self):
         if self.request.user.is_superuser:
-            return Share.objects.all()
+            queryset = Share.objects.all()
         else:
-            return Share.objects.filter(
+            queryset = Share.objects.filter(
                 backend_group__django_group__user=self.request.user
                 )
+        return queryset \
+            .select_related('backend_group', 'owner__django_user') \
+            .prefetch_related('access_groups', 'tags')
+
+    def prefetch(self, shares):
+        CollaborationGroup.prefetch_members(group for share in shares for group in share.access_groups.all())
+        users = [share.owner for share in shares]
+        if 'members' in self.get_requested_fields():
+            BackendGroup.prefetch_members(share.backend_group for share in shares)
+            users.extend(member for share in shares for member in share.get_members())
+        BackendUser.prefetch_collaboration_groups(users)
 
     def perform_create(self, serializer):
 
@@ -1075,7 +1326,7 @@ class TagDetail(generics.RetrieveDestroyAPIView):
     serializer_class = TagSerializer
 
 
-class NotificationList(generics.ListCreateAPIView):
+class NotificationList(PrefetchListMixin, generics.ListCreateAPIView):
     """
     Get a list of all the notifications.
     """
@@ -1090,7 +1341,12 @@ class NotificationList(generics.ListCreateAPIView):
             queryset = Notification.objects.all()
         else:
             queryset = Notification.objects.filter(sender=self.request.user)
-        return queryset
+        return queryset.select_related('sender__backend_user').prefetch_related('receiver_groups')
+
+    def prefetch(self, notifications):
+        BackendUser.prefetch_collaboration_groups(
+            get_backend_users(notification.sender for notification in notifications if notification.sender)
+        )
 
     def perform_create(self, serializer):
         sender = serializer.context.get('request').POST.getlist('sender')
@@ -1117,12 +1373,32 @@ class NotificationDetail(generics.RetrieveDestroyAPIView):
         return NestedNotificationSerializer
 
 
-class NotificationLogList(generics.ListAPIView):
+def select_notification_log_relations(queryset):
+    """
+    Select/prefetch everything the notification log serializers need on the logs of `queryset`.
+    """
+    return queryset \
+        .select_related('notification__sender__backend_user') \
+        .prefetch_related('notification__receiver_groups')
+
+
+def prefetch_notification_log_senders(logs):
+    """
+    Fetch the collaboration groups of the notification senders of all `logs` in bulk.
+    """
+    BackendUser.prefetch_collaboration_groups(
+        get_backend_users(log.notification.sender for log in logs if log.notification.sender)
+    )
+
+
+class NotificationLogList(PrefetchListMixin, generics.ListAPIView):
     """
     Get a list of all the notification logs.
     """
 
     serializer_class = NotificationLogSerializer
+    pagination_class = CursorPagination
+    ordering = '-notification__date'
 
     def get_serializer_class(self, *args, **kwargs):
         if self.request.user.is_superuser:
@@ -1131,24 +1407,46 @@ class NotificationLogList(generics.ListAPIView):
 
     def get_queryset(self):
         if self.request.user.is_superuser:
-            return NotificationLog.objects.all().order_by('-notification__date')
+            queryset = NotificationLog.objects.all().order_by('-notification__date')
         else:
-            return NotificationLog.objects.filter(user=self.request.user.backend_user) \
+            queryset = NotificationLog.objects.filter(user=self.request.user.backend_user) \
                                           .filter(in_use=True) \
                                           .order_by('-notification__date')
+        return select_notification_log_relations(queryset)
 
+    def prefetch(self, logs):
+        prefetch_notification_log_senders(logs)
 
-class NotificationLogUnreadList(generics.ListAPIView):
+
+class NotificationLogUnreadList(PrefetchListMixin, generics.ListAPIView):
     """
     Get a list of all the notification logs.
     """
 
     serializer_class = NotificationLogSerializer
+    pagination_class = CursorPagination
+    ordering = '-notification__date'
 
     def get_queryset(self):
-        return NotificationLog.objects.filter(user=self.request.user.backend_user) \
+        queryset = NotificationLog.objects.filter(user=self.request.user.backend_user) \
                                           .filter(in_use=True).filter(read=False) \
                                           .order_by('-notification__date')
+        return select_notification_log_relations(queryset)
+
+    def prefetch(self, logs):
+        prefetch_notification_log_senders(logs)
+
+
+@api_view(['GET'])
+def notificationlogs_unread_count(request):
+    """
+    Get the number of unread notification logs (a single COUNT query, unlike paging through the list).
+    """
+    count = NotificationLog.objects \
+        .filter(user=getattr(request.user, 'backend_user', None)) \
+        .filter(in_use=True).filter(read=False) \
+        .count()
+    return Response({"count": count})
 
 
 class NotificationLogDetail(generics.RetrieveUpdateAPIView):
@@ -1175,6 +1473,19 @@ def notificationlogs_mark_all_as_read(request):
     return Response({"detail": "{} NotificationLog objects marked as read.".format(count), "count": count})
 
 
+@api_view(('GET',))
+@permission_classes((IsSuperUser,))
+def metrics(request):
+    """
+    Get the runtime metrics (i.e. cache hit rates) of the process serving the request.
+    """
+    return Response({
+        'api_token_cache': api_token_cache.get_stats(),
+        'container_state_cache': container_state_cache.get_stats(),
+        'credential_cache': credential_cache.get_stats()
+    })
+
+
 @api_view(('GET',))
 def notification_types(request):
     """
@@ -1,4 +1,14 @@
+from coco.contract.backends import ContainerBackend
+from coco.contract.errors import ContainerBackendError
+from coco.core import settings
+from coco.core.models import Container, PortMapping, Sequence, Server, ServerStatus
 from collections import Iterator
+from django.db import connection, transaction
+from django.db.models.query import QuerySet
+import logging
+
+
+logger = logging.getLogger(__name__)
 
 
 class ServerSelectionAlgorithm(object):
@@ -7,47 +17,188 @@ class ServerSelectionAlgorithm(object):
     Algorithm class to be used to decide on which server a container should be created.
     """
 
-    def choose_server(self, servers):
+    def choose_server(self, servers, image=None):
         """
         Choose one server from the input servers.
 
-        If the servers are not of type Iterator, a ValueError should be raised.
+        If the servers are neither a QuerySet nor of type Iterator, a ValueError should be raised.
 
-        :param servers: An iterator of servers to choose one from (most likely Server.objects.all().iterator())
+        :param servers: A queryset (preferred) or an iterator of servers to choose one from
+                        (most likely Server.objects.filter(container_backend__isnull=False))
+        :param image: The image the container will be bootstrapped from (if known).
         """
         raise NotImplementedError
 
+    def get_queryset(self, servers):
+        """
+        Return a queryset selecting the healthy ones of the `servers`.
+
+        Servers whose latest health probe failed are excluded (see `coco.core.models.ServerStatus`).
+
+        :param servers: A queryset or an iterator of servers.
+        """
+        if isinstance(servers, QuerySet):
+            queryset = servers
+        elif isinstance(servers, Iterator):
+            queryset = Server.objects.filter(pk__in=[server.id for server in servers])
+        else:
+            raise ValueError("Servers need to be a QuerySet or of type collections.Iterator.")
+        unhealthy = ServerStatus.get_unhealthy_server_ids()
+        if unhealthy:
+            queryset = queryset.exclude(pk__in=unhealthy)
+        return queryset
+
 
 class RoundRobin(ServerSelectionAlgorithm):
 
     """
-    Very primitive round robin server selection algorithm.
+    Round robin server selection algorithm.
+
+    The ID of the last chosen server is stored in a database sequence, so the rotation
+    is shared by all processes (and nodes) instead of every process rotating on its own.
+    """
+
+    """
+    The name of the sequence storing the ID of the last chosen server.
+    """
+    SEQUENCE_NAME = 'server_selection.round_robin'
+
+    def choose_server(self, servers, image=None):
+        """
+        :inherit.
+        """
+        queryset = self.get_queryset(servers).order_by('id')
+        with transaction.atomic():
+            # locks the cursor, so concurrent choices are serialized
+            cursor = Sequence.get_for_update(self.SEQUENCE_NAME)
+            server = queryset.filter(id__gt=cursor.value).first()
+            if server is None:  # wrap around
+                server = queryset.first()
+            if server is None:
+                raise ValueError("No server available.")
+            cursor.value = server.id
+            cursor.save()
+        return server
+
+
+class LeastLoaded(ServerSelectionAlgorithm):
+
+    """
+    Server selection algorithm choosing the container host with the lowest load.
+
+    The load is scored from the number of containers and port mappings a server holds
+    (fetched for all servers with a single query, counting each by a subquery). If live metrics are enabled,
+    the number of containers actually running (as reported by the container backends) is considered first.
+    Servers without enough free ports for the new container are never chosen.
     """
 
-    def __init__(self):
+    def __init__(self, live_metrics=None):
         """
-        Initialize a new RoundRobin instance.
+        Initialize a new LeastLoaded instance.
 
-        Note: All instances are independant of each other.
+        :param live_metrics: If true, ask the container backends for the running containers (defaults to the setting).
         """
-        self._last_choosen = 0  # stores the DB ID of the last choosen server object.
+        if live_metrics is None:
+            live_metrics = settings.SERVER_SELECTION_LIVE_METRICS
+        self.live_metrics = live_metrics
 
-    def choose_server(self, servers):
+    def choose_server(self, servers, image=None):
         """
         :inherit.
         """
-        if not isinstance(servers, Iterator):
-            raise ValueError("Servers need to be of type collections.Iterator.")
+        port_count = len(image.get_internal_ports()) if image is not None else 1
+        scores = self.get_scores(self.get_queryset(servers), port_count)
+        if not scores:
+            raise ValueError("No container host with free ports available.")
+        return min(scores, key=scores.get)
 
+    def get_running_container_count(self, server):
+        """
+        Return the number of containers running on `server` as per its container backend (or `None` on failure).
+
+        :param server: The server to ask the container backend of.
+        """
         try:
-            first = servers.next()
-            current = first
-            while current.id <= self._last_choosen:
-                current = servers.next()
-        except StopIteration as ex:
-            if first is None:  # empty iterator
-                raise ex  # TODO: backends error type
-            current = first
-
-        self._last_choosen = current.id
-        return current
+            containers = server.get_container_backend().get_containers()
+        except (ContainerBackendError, NotImplementedError) as ex:
+            logger.exception(ex)
+            return None
+        return len([
+            container for container in containers
+            if container.get(ContainerBackend.CONTAINER_KEY_STATUS) == ContainerBackend.CONTAINER_STATUS_RUNNING
+        ])
+
+    def get_count_sql(self, model):
+        """
+        Return the SQL of a subquery counting the rows of `model` referencing the server selected by the outer query.
+
+        Counting by subqueries (rather than joining all relations at once) keeps the cost linear in the rows.
+
+        :param model: The model having a `server` foreign key.
+        """
+        quote = connection.ops.quote_name
+        return 'SELECT COUNT(*) FROM %s WHERE %s.%s = %s.%s' % (
+            quote(model._meta.db_table),
+            quote(model._meta.db_table),
+            quote(model._meta.get_field('server').column),
+            quote(Server._meta.db_table),
+            quote(Server._meta.pk.column)
+        )
+
+    def get_scores(self, servers, port_count=1):
+        """
+        Return a dict mapping the eligible servers (out of `servers`) to their score (lower is better).
+
+        :param servers: The queryset of servers to score.
+        :param port_count: The number of free ports a server needs to be eligible.
+        """
+        port_range = settings.CONTAINER_PORT_MAPPINGS_END_PORT - settings.CONTAINER_PORT_MAPPINGS_START_PORT + 1
+        servers = servers \
+            .filter(container_backend__isnull=False) \
+            .select_related('container_backend') \
+            .extra(select={
+                'container_count': self.get_count_sql(Container),
+                'port_mapping_count': self.get_count_sql(PortMapping)
+            })
+        scores = {}
+        for server in servers:
+            if server.port_mapping_count + port_count > port_range:
+                continue  # not enough free ports left
+            score = (server.container_count, server.port_mapping_count, server.id)
+            if self.live_metrics:
+                running = self.get_running_container_count(server)
+                if running is None:
+                    continue  # backend not reachable
+                score = (running,) + score
+            scores[server] = score
+        return scores
+
+
+class ImageLocality(ServerSelectionAlgorithm):
+
+    """
+    Server selection algorithm preferring servers that already hold the container's image.
+
+    Avoids pulling the image (which can take minutes) on container creation.
+    Among the servers holding the image (or among all, if none does), the least loaded one is chosen.
+    """
+
+    def __init__(self, fallback=None):
+        """
+        Initialize a new ImageLocality instance.
+
+        :param fallback: The algorithm used to choose among the candidates (defaults to LeastLoaded).
+        """
+        self.fallback = fallback or LeastLoaded()
+
+    def choose_server(self, servers, image=None):
+        """
+        :inherit.
+        """
+        queryset = self.get_queryset(servers)
+        if image is not None:
+            try:
+                return self.fallback.choose_server(queryset.filter(images=image), image=image)
+            except ValueError:
+                pass  # no server with the image (and free ports)
+        return self.fallback.choose_server(queryset, image=image)
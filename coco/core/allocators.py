@@ -0,0 +1,85 @@
+from coco.core import settings
+from coco.core.models import BackendGroup, BackendUser, Sequence
+from django.db import connection
+from django.db.models import Max
+import threading
+
+
+class IdAllocator(object):
+
+    """
+    Allocator handing out unique IDs (i.e. UIDs) from a database sequence.
+
+    IDs are reserved in blocks, so most single allocations are served from memory without a database round trip.
+    The rest of a block is only kept if it has been reserved outside of a transaction,
+    as a rollback would release the reservation while the IDs are still handed out otherwise.
+    """
+
+    def __init__(self, name, start, block_size):
+        """
+        Initialize a new ID allocator.
+
+        :param name: The name of the sequence to reserve the IDs from.
+        :param start: Callable returning the highest ID already in use (to initialize the sequence).
+        :param block_size: The number of IDs to reserve at once for single allocations.
+        """
+        self.name = name
+        self.start = start
+        self.block_size = block_size
+        self._next = 0
+        self._end = 0
+        self._lock = threading.Lock()
+
+    def allocate(self):
+        """
+        Allocate a single ID.
+        """
+        with self._lock:
+            if self._next >= self._end:
+                count = 1 if connection.in_atomic_block else self.block_size
+                self._next = Sequence.reserve(self.name, count, self.start)
+                self._end = self._next + count
+            allocated = self._next
+            self._next += 1
+            return allocated
+
+    def allocate_many(self, count):
+        """
+        Allocate `count` consecutive IDs with a single reservation.
+
+        :param count: The number of IDs to allocate.
+        """
+        first = Sequence.reserve(self.name, count, self.start)
+        return range(first, first + count)
+
+    def reset(self):
+        """
+        Drop the IDs reserved by this process but not handed out yet.
+        """
+        with self._lock:
+            self._next = self._end = 0
+
+
+def get_highest_used_gid():
+    """
+    Get the highest ID in use by the user-created groups (the primary groups use the user IDs).
+
+    This is the highest backend ID actually in use (or GROUP_ID_OFFSET - 1 if there is none),
+    not GROUP_ID_OFFSET + the latest Django group ID the gids used to be derived from.
+    """
+    last = BackendGroup.objects \
+        .filter(backend_id__gte=settings.GROUP_ID_OFFSET) \
+        .aggregate(last=Max('backend_id')).get('last')
+    return max(settings.GROUP_ID_OFFSET - 1, last or 0)
+
+
+def get_highest_used_uid():
+    """
+    Get the highest user ID in use (or USER_ID_OFFSET - 1 if there is none).
+    """
+    last = BackendUser.objects.aggregate(last=Max('backend_id')).get('last')
+    return max(settings.USER_ID_OFFSET - 1, last or 0)
+
+
+gid_allocator = IdAllocator('ids.gid', get_highest_used_gid, settings.ID_ALLOCATION_BLOCK_SIZE)
+uid_allocator = IdAllocator('ids.uid', get_highest_used_uid, settings.ID_ALLOCATION_BLOCK_SIZE)
@@ -1,5 +1,6 @@
 from coco.contract.errors import AuthenticationError, ConnectionError, \
     UserNotFoundError
+from coco.core.caches import credential_cache
 from coco.core.helpers import get_internal_ldap_connected, get_user_backend_connected
 from coco.core.models import BackendGroup, BackendUser, \
     CollaborationGroup
@@ -26,21 +27,35 @@ class BackendProxyAuthentication(object):
         # check if the user already exists in our system
         # if so, use the defined backend_pk for validating the credentials on the backend
         # if its a Django only user, disallow the login
-        user = None
-        if User.objects.filter(username=username).exists():
-            user = User.objects.get(username=username)
+        login = username
+        user = User.objects.filter(username=username).select_related('backend_user').first()
+        if user is not None:
             if hasattr(user, 'backend_user'):
                 username = user.backend_user.backend_pk
             else:
                 return None  # not allowed, Django only user
 
+        # credentials verified lately need neither a bind nor a password hash
+        verified = credential_cache.get(login, password)
+        if verified is False:
+            raise PermissionDenied
+        if verified is not None and user is not None and verified == user.id:
+            if user.is_active:
+                return user
+            return None
+
+        user_backend = None
+        internal_ldap = None
         try:
-            internal_ldap = get_internal_ldap_connected()
             user_backend = get_user_backend_connected()
+            credential_cache.count_bind('user_backend')
             user_backend.auth_user(username, password)
             if user is not None:  # existing user
                 if not user.check_password(password):
                     user.set_password(password)  # XXX: not needed. should we leave it empty?
+                    # the internal LDAP is only needed if the password actually changed
+                    internal_ldap = get_internal_ldap_connected()
+                    credential_cache.count_bind('internal_ldap')
                     internal_ldap.set_user_password(username, password)
                     user.save()
             else:  # new user
@@ -48,25 +63,29 @@ class BackendProxyAuthentication(object):
                 group = self.create_user_groups(username, uid)
                 user = self.create_users(username, password, uid, group.backend_group)
                 group.add_user(user.backend_user)
+            credential_cache.set(login, password, user.id)
 
             if user.is_active:
                 return user
             else:
                 return None
         except AuthenticationError:
+            credential_cache.set_failed(login, password)
             raise PermissionDenied
         except UserNotFoundError:
+            credential_cache.set_failed(login, password)
             if user is not None:  # exists locally but not on backend
                 user.delete()
         except ConnectionError as ex:
             logger.exception(ex)
             return None
         finally:
-            try:
-                internal_ldap.disconnect()
-                user_backend.disconnect()
-            except:
-                pass
+            for connection in (internal_ldap, user_backend):
+                if connection is not None:
+                    try:
+                        connection.disconnect()
+                    except:
+                        pass
 
     def create_user_groups(self, name, gid):
         """
@@ -1,7 +1,6 @@
+from coco.core.auth.workspaces import workspace_access_index, workspace_activity_tracker
 from coco.core.models import PortMapping
 from django.conf import settings
-from django.contrib.auth.models import User
-from django.core.exceptions import ObjectDoesNotExist
 from django.http.response import HttpResponse
 
 
@@ -21,6 +20,46 @@ def login_allowed(user):
     return hasattr(user, 'backend_user')  # not super = internal only user
 
 
+def has_workspace_access(request):
+    """
+    Check if the user identified by the signed cookie 'username' may access the workspace
+    requested by the reverse proxy (as per the 'X-Original-URI' header).
+
+    The decision is made from the in-memory workspace access index. Only if the index does not know
+    the requested workspace (e.g. it has been created in another process just now), the database is asked.
+    Granted accesses are recorded by the workspace activity tracker (to detect idle containers).
+
+    :param request: The request sent by the reverse proxy.
+    """
+    username = request.get_signed_cookie(COOKIE_NAME, default=None)
+    uri = request.META.get(URI_HEADER)
+    # ensure the signed cookie set at login and the X- header set by Nginx are there
+    if not username or not uri:
+        return False
+    subdirectory_parts = 0
+    if settings.SUBDIRECTORY != "":
+        subdirectory_parts = len(settings.SUBDIRECTORY.strip('/').split('/'))
+    splits = uri.split('/')
+    if len(splits) < (3 + subdirectory_parts):
+        return False
+    try:
+        internal_ip, port = splits[2 + subdirectory_parts].decode('hex').split(':')
+        port = int(port)
+    except (TypeError, ValueError):
+        return False
+
+    owner = workspace_access_index.get_owner(internal_ip, port)
+    if owner is None:
+        owner = PortMapping.objects \
+            .filter(external_port=port, server__internal_ip=internal_ip) \
+            .values_list('container__owner__django_user__username', flat=True) \
+            .first()
+    if owner != username:
+        return False
+    workspace_activity_tracker.record(internal_ip, port)
+    return True
+
+
 def workspace_auth_access(request):
     """
     This view is called by Nginx to check either a user is authorized to
@@ -30,27 +69,10 @@ def workspace_auth_access(request):
     while the port/container needs to be extracted from the 'X-Original-URI' header.
 
     Response codes of 20x will allow the user to access the requested resource.
-    """
-    if request.method == "GET":
-        username = request.get_signed_cookie(COOKIE_NAME, default=None)
-        if username:  # ensure the signed cookie set at login is there
-            try:
-                user = User.objects.get(username=username)
-                uri = request.META.get(URI_HEADER)
-                if uri:  # ensure the X- header is present. its set by Nginx
-                    subdirectory_parts = 0
-                    if settings.SUBDIRECTORY != "":
-                        subdirectory_parts = settings.SUBDIRECTORY.split('/')
-                    splits = uri.split('/')
-                    if len(splits) >= (3 + subdirectory_parts):
-                        base_url = splits[2 + subdirectory_parts]
-                        parts = base_url.decode('hex').split(':')
-                        internal_ip = parts[0]
-                        port = parts[1]
-                        mapping = PortMapping.objects.filter(external_port=port).filter(server__internal_ip=internal_ip)
-                        if mapping.exists() and mapping.first().container.owner == user.backend_user:
-                            return HttpResponse(status=200)
-            except ObjectDoesNotExist:
-                pass
 
+    Usually, `coco.core.auth.middleware.WorkspaceAuthMiddleware` answers these requests
+    before they reach the view (and all the other middlewares).
+    """
+    if request.method == "GET" and has_workspace_access(request):
+        return HttpResponse(status=200)
     return HttpResponse(status=403)
@@ -0,0 +1,31 @@
+from coco.core.auth.checks import has_workspace_access
+from django.conf import settings
+from django.http.response import HttpResponse
+
+
+class WorkspaceAuthMiddleware(object):
+
+    """
+    Middleware answering the reverse proxy's workspace access checks.
+
+    These sub-requests are sent for every request to a workspace (incl. websockets and static assets),
+    so they are answered right here from the in-memory workspace access index.
+    This skips the URL resolving and all later middlewares (sessions, authentication, messages, ...),
+    hence it should be the first middleware in `MIDDLEWARE_CLASSES`.
+    """
+
+    def __init__(self):
+        """
+        Initialize the middleware.
+        """
+        self.path = '/{}_workspace_auth_check'.format(settings.SUBDIRECTORY)
+
+    def process_request(self, request):
+        """
+        :inherit.
+        """
+        if request.path_info == self.path:
+            if request.method == "GET" and has_workspace_access(request):
+                return HttpResponse(status=200)
+            return HttpResponse(status=403)
+        return None
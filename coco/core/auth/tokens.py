@@ -0,0 +1,86 @@
+"""
+Workspace access tokens.
+
+A token lists the workspace endpoints (the hex encoded 'internal_ip:port' part of the workspace URLs)
+a user is allowed to access, so the reverse proxy can check access without calling the Django application.
+Tokens have the format:
+
+    <user id>.<expires>.<endpoint>-<endpoint>-...<endpoint>.<signature>
+
+where `expires` is a UNIX timestamp and `signature` the hex encoded HMAC-SHA1 of everything before the last dot.
+Only characters allowed in cookie values without quoting are used, so the format can be validated
+by a few lines of Lua/njs (see `lib/confs/nginx/workspace_access.lua` for the Nginx side).
+"""
+from coco.core import settings
+from django.utils.crypto import constant_time_compare
+import hashlib
+import hmac
+import time
+
+
+def encode_endpoint(internal_ip, port):
+    """
+    Encode the workspace endpoint the way it is used in the workspace URLs.
+
+    :param internal_ip: The internal IP of the server the container runs on.
+    :param port: The external port of the port mapping.
+    """
+    return ('%s:%s' % (internal_ip, port)).encode('hex')
+
+
+def get_signature(payload):
+    """
+    Return the signature for the token `payload`.
+
+    :param payload: The token's content to sign.
+    """
+    return hmac.new(str(settings.WORKSPACE_TOKEN_SECRET), payload, hashlib.sha1).hexdigest()
+
+
+def create_token(user_id, endpoints, expires=None):
+    """
+    Create a signed token granting access to `endpoints`.
+
+    :param user_id: The ID of the user the token is for.
+    :param endpoints: Iterable of (server internal IP, external port) tuples the user may access.
+    :param expires: The UNIX timestamp after which the token becomes invalid (now + TTL if `None`).
+    """
+    if expires is None:
+        expires = int(time.time()) + settings.WORKSPACE_TOKEN_TTL
+    encoded = sorted(encode_endpoint(internal_ip, port) for internal_ip, port in endpoints)
+    payload = '%i.%i.%s' % (user_id, expires, '-'.join(encoded))
+    return '%s.%s' % (payload, get_signature(payload))
+
+
+def parse_token(token):
+    """
+    Verify the signature of `token` and return its content as (user ID, expires, set of encoded endpoints) tuple.
+
+    Returns `None` if the token is malformed or the signature is invalid. The expiry is not checked.
+
+    :param token: The token to parse.
+    """
+    try:
+        payload, signature = str(token).rsplit('.', 1)
+        user_id, expires, endpoints = payload.split('.')
+        user_id = int(user_id)
+        expires = int(expires)
+    except (UnicodeEncodeError, ValueError):
+        return None
+    if not constant_time_compare(signature, get_signature(payload)):
+        return None
+    return user_id, expires, frozenset(endpoints.split('-')) if endpoints else frozenset()
+
+
+def validate_token(token, endpoint):
+    """
+    Check if `token` is valid and grants access to `endpoint`.
+
+    :param token: The token to validate.
+    :param endpoint: The encoded endpoint, as it appears in the workspace URL.
+    """
+    content = parse_token(token)
+    if content is None:
+        return False
+    user_id, expires, endpoints = content
+    return expires >= time.time() and endpoint.lower() in endpoints
@@ -0,0 +1,195 @@
+from coco.core import settings
+from coco.core.models import Container, PortMapping
+from datetime import datetime
+from django.core.cache import caches
+from django.db.models import Q
+from django.utils import timezone
+from uuid import uuid4
+import threading
+import time
+
+
+class WorkspaceAccessIndex(object):
+
+    """
+    In-memory index mapping (server internal IP, external port) to the username of the container's owner
+    (and each owner to his workspace endpoints).
+
+    Used by the reverse proxy's workspace access checks and to issue the workspace access tokens,
+    so they can be answered without hitting the database. Each process holds its own index, rebuilt (with a single query) if:
+
+    - another process (or this one) reported a change by calling `invalidate`
+      (the generation token is stored in a cache shared among all processes, it is looked up
+      at most once per generation max. age, so most checks do not even touch the cache)
+    - the index is older than the configured max. age (guards against missed invalidations)
+    """
+
+    GENERATION_KEY = 'workspace_access_index:generation'
+
+    def __init__(self, alias, max_age, generation_max_age):
+        """
+        Initialize a new workspace access index.
+
+        :param alias: The alias of the Django cache to store the generation token in.
+        :param max_age: The number of seconds after which the index is rebuilt in any case.
+        :param generation_max_age: The number of seconds the generation token is used without looking it up again.
+        """
+        self.alias = alias
+        self.max_age = max_age
+        self.generation_max_age = generation_max_age
+        self._index = None
+        self._generation = None
+        self._built_at = 0
+        self._known_generation = None  # (generation, looked up at) tuple
+        self._lock = threading.Lock()
+
+    def _get_cache(self):
+        """
+        Return the Django cache the generation token is stored in.
+        """
+        return caches[self.alias]
+
+    def _get_generation(self):
+        """
+        Return the current (shared) generation token, creating one if there is none.
+
+        The token is looked up in the shared cache only if the one known by this process is older than the
+        generation max. age, so changes made by other processes are noticed within that time.
+        """
+        now = time.time()
+        known = self._known_generation
+        if known is not None and now - known[1] < self.generation_max_age:
+            return known[0]
+        generation = self._get_cache().get(self.GENERATION_KEY)
+        if generation is None:
+            return self._new_generation()
+        self._known_generation = (generation, now)
+        return generation
+
+    def _new_generation(self):
+        """
+        Store and return a new generation token.
+
+        Random tokens are used (rather than a counter), so concurrent invalidations cannot overwrite each other
+        with the same value.
+        """
+        generation = uuid4().hex
+        self._get_cache().set(self.GENERATION_KEY, generation, None)
+        self._known_generation = (generation, time.time())
+        return generation
+
+    def _get_current(self):
+        """
+        Return the current (owners, endpoints) tuple, rebuilding the index if it is outdated.
+        """
+        generation = self._get_generation()
+        index = self._index
+        if index is None or generation != self._generation or time.time() - self._built_at > self.max_age:
+            index = self.rebuild(generation)
+        return index
+
+    def get_endpoints(self, username):
+        """
+        Return the set of (server internal IP, external port) tuples of the workspaces owned by `username`.
+
+        :param username: The username of the containers' owner.
+        """
+        return self._get_current()[1].get(username, frozenset())
+
+    def get_owner(self, internal_ip, port):
+        """
+        Return the username of the owner of the container reachable at `internal_ip`:`port` (or `None`).
+
+        :param internal_ip: The internal IP of the server the container runs on.
+        :param port: The external port of the port mapping.
+        """
+        return self._get_current()[0].get((internal_ip, int(port)))
+
+    def invalidate(self):
+        """
+        Mark the index of all processes as outdated.
+        """
+        self._new_generation()
+        self._index = None
+
+    def rebuild(self, generation=None):
+        """
+        Rebuild the index from the database.
+
+        :param generation: The generation the rebuilt index represents.
+        """
+        with self._lock:
+            if generation is None:
+                generation = self._get_generation()
+            elif self._index is not None and generation == self._generation \
+                    and time.time() - self._built_at <= self.max_age:
+                return self._index  # rebuilt by another thread meanwhile
+            mappings = PortMapping.objects.values_list(
+                'server__internal_ip',
+                'external_port',
+                'container__owner__django_user__username'
+            )
+            owners = {}
+            endpoints = {}
+            for internal_ip, port, username in mappings:
+                owners[(internal_ip, port)] = username
+                endpoints.setdefault(username, set()).add((internal_ip, port))
+            index = (owners, dict((username, frozenset(ports)) for username, ports in endpoints.items()))
+            self._index = index
+            self._generation = generation
+            self._built_at = time.time()
+            return index
+
+
+class WorkspaceActivityTracker(object):
+
+    """
+    Records when the workspaces have been accessed lately, to detect idle containers.
+
+    Accesses are written through to `Container.last_accessed`, but at most once per write interval,
+    workspace and process (all other accesses only cost a dict lookup). So the recorded time lags behind
+    by the interval at most, and nothing is lost if the process is recycled before it gets another request.
+    """
+
+    def __init__(self, write_interval):
+        """
+        Initialize a new workspace activity tracker.
+
+        :param write_interval: The min. number of seconds between two writes for the same workspace.
+        """
+        self.write_interval = write_interval
+        self._written = {}
+        self._lock = threading.Lock()
+
+    def record(self, internal_ip, port):
+        """
+        Record an access to the workspace reachable at `internal_ip`:`port`.
+
+        Returns the number of updated containers (0 if the access has been skipped).
+
+        :param internal_ip: The internal IP of the server the container runs on.
+        :param port: The external port of the port mapping.
+        """
+        now = time.time()
+        endpoint = (internal_ip, int(port))
+        with self._lock:
+            if now - self._written.get(endpoint, 0) < self.write_interval:
+                return 0
+            self._written[endpoint] = now
+        last_accessed = datetime.fromtimestamp(now, timezone.utc)
+        # never go back in time (another process might have written a later access already)
+        return Container.objects \
+            .filter(port_mappings__server__internal_ip=internal_ip, port_mappings__external_port=endpoint[1]) \
+            .filter(Q(last_accessed__isnull=True) | Q(last_accessed__lt=last_accessed)) \
+            .update(last_accessed=last_accessed)
+
+
+workspace_access_index = WorkspaceAccessIndex(
+    settings.WORKSPACE_ACCESS_INDEX_CACHE,
+    settings.WORKSPACE_ACCESS_INDEX_MAX_AGE,
+    settings.WORKSPACE_ACCESS_INDEX_GENERATION_MAX_AGE
+)
+
+workspace_activity_tracker = WorkspaceActivityTracker(
+    settings.WORKSPACE_ACTIVITY_WRITE_INTERVAL
+)
@@ -0,0 +1,279 @@
+from coco.core import settings
+from django.core.cache import caches
+from django.utils.crypto import salted_hmac
+import threading
+
+
+class CountingCache(object):
+
+    """
+    Base class for the caches keeping hit/miss counters (exposed by the metrics API endpoint).
+    """
+
+    def __init__(self, alias, timeout):
+        """
+        Initialize a new cache.
+
+        :param alias: The alias of the Django cache to store the entries in.
+        :param timeout: The number of seconds after which an entry expires.
+        """
+        self.alias = alias
+        self.timeout = timeout
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def _count(self, hits=0, misses=0):
+        """
+        Update the hit/miss counters.
+        """
+        with self._lock:
+            self._hits += hits
+            self._misses += misses
+
+    def _get_cache(self):
+        """
+        Return the Django cache the entries are stored in.
+        """
+        return caches[self.alias]
+
+    def get_stats(self):
+        """
+        Return the hit/miss counters of this process.
+        """
+        with self._lock:
+            hits = self._hits
+            misses = self._misses
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': float(hits) / total if total else None
+        }
+
+
+class ApiTokenCache(CountingCache):
+
+    """
+    Cache for the users authenticated by API tokens.
+
+    Entries are keyed by the token and expire after a configurable TTL. The signal receivers
+    invalidate them as soon as a token is deleted or its user is changed (i.e. deactivated).
+    """
+
+    def _get_key(self, key):
+        """
+        Return the cache key for the API token `key`.
+
+        :param key: The API token.
+        """
+        return 'api_token:%s' % key
+
+    def get(self, key):
+        """
+        Get the cached (user, token) tuple of the API token `key` or `None` if not cached.
+
+        :param key: The API token.
+        """
+        cached = self._get_cache().get(self._get_key(key))
+        if cached is None:
+            self._count(misses=1)
+        else:
+            self._count(hits=1)
+        return cached
+
+    def invalidate(self, key):
+        """
+        Remove the cached user of the API token `key`.
+
+        :param key: The API token.
+        """
+        self._get_cache().delete(self._get_key(key))
+
+    def invalidate_many(self, keys):
+        """
+        Remove the cached users of all API tokens `keys`.
+
+        :param keys: The API tokens.
+        """
+        self._get_cache().delete_many([self._get_key(key) for key in keys])
+
+    def set(self, token):
+        """
+        Cache the user of `token`.
+
+        :param token: The API token (with its user selected).
+        """
+        self._get_cache().set(self._get_key(token.key), (token.user, token), self.timeout)
+
+
+class ContainerStateCache(CountingCache):
+
+    """
+    Cache for the container states (as reported by the container backends).
+
+    States are keyed by the container's server and backend PK and expire after
+    a configurable TTL. The container signal receivers invalidate them as soon
+    as a container's state is changed through the application.
+    """
+
+    def _get_key(self, container):
+        """
+        Return the cache key for the state of `container`.
+
+        :param container: The container to get the key for.
+        """
+        return 'container_state:%s:%s' % (container.server_id, container.backend_pk)
+
+    def get(self, container):
+        """
+        Get the cached state of `container` or `None` if not cached.
+
+        :param container: The container to get the state for.
+        """
+        status = self._get_cache().get(self._get_key(container))
+        if status is None:
+            self._count(misses=1)
+        else:
+            self._count(hits=1)
+        return status
+
+    def get_many(self, containers):
+        """
+        Get the cached states for all `containers`.
+
+        :param containers: The containers to get the state for.
+
+        :return dict Mapping the container IDs to their state (only for cached ones).
+        """
+        keys = dict((self._get_key(container), container.id) for container in containers)
+        cached = self._get_cache().get_many(keys.keys())
+        self._count(hits=len(cached), misses=len(keys) - len(cached))
+        return dict((keys.get(key), status) for key, status in cached.items())
+
+    def invalidate(self, container):
+        """
+        Remove the cached state of `container`.
+
+        :param container: The container to invalidate the state for.
+        """
+        self._get_cache().delete(self._get_key(container))
+
+    def set(self, container, status):
+        """
+        Cache `status` as the state of `container`.
+
+        :param container: The container to cache the state for.
+        :param status: The state to cache.
+        """
+        self._get_cache().set(self._get_key(container), status, self.timeout)
+
+    def set_many(self, states):
+        """
+        Cache multiple container states at once.
+
+        :param states: List of (container, status) tuples.
+        """
+        self._get_cache().set_many(
+            dict((self._get_key(container), status) for container, status in states),
+            self.timeout
+        )
+
+
+class CredentialCache(CountingCache):
+
+    """
+    Cache for the outcome of the credential verifications against the user backend.
+
+    Entries are keyed by a salted HMAC of the username and password (the password itself is never stored)
+    and expire after a short TTL. Failed verifications are cached as well (with their own TTL),
+    so repeated attempts do not reach the backend either. The binds against the backends are counted too.
+    """
+
+    def __init__(self, alias, timeout, negative_timeout):
+        """
+        Initialize a new credential cache.
+
+        :param alias: The alias of the Django cache to store the outcomes in.
+        :param timeout: The number of seconds after which a successful verification expires.
+        :param negative_timeout: The number of seconds after which a failed verification expires.
+        """
+        super(CredentialCache, self).__init__(alias, timeout)
+        self.negative_timeout = negative_timeout
+        self._binds = {}
+
+    def _get_key(self, username, password):
+        """
+        Return the cache key for the `username` and `password` combination.
+
+        :param username: The username.
+        :param password: The password.
+        """
+        return 'credentials:%s' % salted_hmac(self.__class__.__name__, u'%s\0%s' % (username, password)).hexdigest()
+
+    def count_bind(self, backend):
+        """
+        Count a bind against `backend`.
+
+        :param backend: The name of the backend (i.e. 'user_backend').
+        """
+        with self._lock:
+            self._binds[backend] = self._binds.get(backend, 0) + 1
+
+    def get(self, username, password):
+        """
+        Get the ID of the user verified with these credentials, `False` if the verification failed
+        or `None` if not cached.
+
+        :param username: The username.
+        :param password: The password.
+        """
+        verified = self._get_cache().get(self._get_key(username, password))
+        if verified is None:
+            self._count(misses=1)
+        else:
+            self._count(hits=1)
+        return verified
+
+    def get_stats(self):
+        """
+        :inherit.
+        """
+        stats = super(CredentialCache, self).get_stats()
+        with self._lock:
+            stats['binds'] = dict(self._binds)
+        return stats
+
+    def set(self, username, password, user_id):
+        """
+        Cache the successful verification of the credentials of the user `user_id`.
+
+        :param username: The username.
+        :param password: The password.
+        :param user_id: The ID of the verified user.
+        """
+        self._get_cache().set(self._get_key(username, password), user_id, self.timeout)
+
+    def set_failed(self, username, password):
+        """
+        Cache the failed verification of the credentials.
+
+        :param username: The username.
+        :param password: The password.
+        """
+        self._get_cache().set(self._get_key(username, password), False, self.negative_timeout)
+
+
+api_token_cache = ApiTokenCache(
+    settings.API_TOKEN_CACHE,
+    settings.API_TOKEN_CACHE_TTL
+)
+container_state_cache = ContainerStateCache(
+    settings.CONTAINER_STATE_CACHE,
+    settings.CONTAINER_STATE_CACHE_TTL
+)
+credential_cache = CredentialCache(
+    settings.CREDENTIAL_CACHE,
+    settings.CREDENTIAL_CACHE_TTL,
+    settings.CREDENTIAL_CACHE_NEGATIVE_TTL
+)
@@ -26,7 +26,10 @@ Global variable storing the class of the server selection algorithm to use.
 """
 config.set('SERVER_SELECTION_ALGORITHM_CLASS', default='coco.core.algorithms.server_selection.RoundRobin',
            editable=True,
-           description='The full class path of the server selection algorithm class to use.')
+           description="""The full class path of the server selection algorithm class to use.
+               Available: coco.core.algorithms.server_selection.RoundRobin (default),
+               coco.core.algorithms.server_selection.LeastLoaded
+               and coco.core.algorithms.server_selection.ImageLocality.""")
 
 
 """
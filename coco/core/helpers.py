@@ -1,12 +1,241 @@
 from coco.common.utils import ClassLoader
+from coco.contract.errors import ConnectionError
+from coco.core import settings
 from django_admin_conf_vars.global_vars import config
 import json
+import Queue
+import threading
+import time
+
+
+"""
+Backend connection pool helpers.
+"""
+
+
+class ConnectionPool(object):
+
+    """
+    Bounded pool of connected backend instances (i.e. LDAP connections).
+
+    A thread leasing a connection while already holding one from the same pool gets the
+    same connection again, so nested operations (e.g. signal receivers triggered while
+    a connection is in use) neither need a second connection nor can deadlock the pool.
+    """
+
+    def __init__(self, factory, credentials, size, max_idle, timeout):
+        """
+        Initialize a new connection pool.
+
+        :param factory: Callable returning a new (not connected) backend instance.
+        :param credentials: Callable returning the credentials passed to the instance's `connect` method.
+        :param size: The max. number of connections the pool holds.
+        :param max_idle: The number of seconds after which an idle connection is re-established.
+        :param timeout: The number of seconds to wait for a free connection.
+        """
+        self.factory = factory
+        self.credentials = credentials
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self._local = threading.local()
+        # every slot either holds None (no connection yet) or a (connection, last used) tuple
+        self._slots = Queue.LifoQueue(size)
+        for i in range(size):
+            self._slots.put(None)
+
+    def _close(self, connection):
+        """
+        Disconnect `connection`, ignoring any errors.
+
+        :param connection: The connection to close.
+        """
+        try:
+            connection.disconnect()
+        except:
+            pass
+
+    def _connect(self):
+        """
+        Create a new connected backend instance.
+        """
+        connection = self.factory()
+        connection.connect(self.credentials())
+        return connection
+
+    def lease(self):
+        """
+        Return a connected backend instance. Call `disconnect` on it to give it back to the pool.
+        """
+        lease = getattr(self._local, 'lease', None)
+        if lease is None:
+            try:
+                slot = self._slots.get(timeout=self.timeout)
+            except Queue.Empty:
+                raise ConnectionError("No backend connection available (pool exhausted).")
+            try:
+                if slot is None:
+                    connection = self._connect()
+                else:
+                    connection, last_used = slot
+                    if time.time() - last_used > self.max_idle:
+                        # the server probably dropped it already
+                        self._close(connection)
+                        connection = self._connect()
+            except:
+                self._slots.put(None)
+                raise
+            lease = PooledConnection(self, connection)
+            self._local.lease = lease
+        lease._leases += 1
+        return lease
+
+    def release(self, lease, discard=False):
+        """
+        Give back a leased connection to the pool.
+
+        :param lease: The lease to release.
+        :param discard: If true, the connection is closed instead of being reused.
+        """
+        lease._leases -= 1
+        if lease._leases > 0:
+            return
+        self._local.lease = None
+        if discard or lease._tainted:
+            self._close(lease._connection)
+            self._slots.put(None)
+        else:
+            self._slots.put((lease._connection, time.time()))
+
+    def reconnect(self, lease):
+        """
+        Replace the connection of `lease` with a newly established one.
+
+        :param lease: The lease to reconnect.
+        """
+        self._close(lease._connection)
+        lease._connection = self._connect()
+        lease._tainted = False
+
+
+class PooledConnection(object):
+
+    """
+    Proxy around a connection leased from a `ConnectionPool`.
+
+    Calls are forwarded to the backend instance. If a call fails with a `ConnectionError`,
+    the connection is re-established and the call retried once.
+    Calling `disconnect` gives the connection back to the pool instead of closing it.
+    """
+
+    def __init__(self, pool, connection):
+        """
+        Initialize a new pooled connection.
+
+        :param pool: The pool the connection belongs to.
+        :param connection: The connected backend instance.
+        """
+        self._pool = pool
+        self._connection = connection
+        self._leases = 0
+        # set if the connection might not be bound with the pool's credentials anymore
+        self._tainted = False
+
+    def __getattr__(self, name):
+        """
+        Forward attribute access to the backend instance, wrapping methods for reconnection.
+        """
+        attr = getattr(self._connection, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            if name == 'auth_user':
+                # authenticating a user can re-bind the connection as that user
+                self._tainted = True
+            try:
+                return getattr(self._connection, name)(*args, **kwargs)
+            except ConnectionError:
+                self._pool.reconnect(self)
+                return getattr(self._connection, name)(*args, **kwargs)
+        return call
+
+    def connect(self, credentials):
+        """
+        No-op, the connection is already established.
+        """
+        pass
+
+    def disconnect(self):
+        """
+        Give the connection back to the pool.
+        """
+        if self._leases > 0:
+            self._pool.release(self)
+
+
+"""
+Container backend helpers.
+"""
+_CONTAINER_BACKENDS = {}
+_CONTAINER_BACKENDS_LOCK = threading.Lock()
+
+
+def _get_container_backend_key(server):
+    """
+    Return the key under which the container backend instance for `server` is registered.
+
+    The key contains everything the instance is built from, so changes made to the
+    server or backend (i.e. by another process) never return an outdated instance.
+    """
+    backend = server.container_backend
+    return (
+        server.id,
+        backend.id,
+        backend.module,
+        backend.klass,
+        backend.arguments,
+        server._get_interpolated_container_backend_args()
+    )
+
+
+def get_container_backend(server):
+    """
+    Return the container backend instance used for `server`.
+
+    Instances are created once per process and reused by all (uwsgi) threads,
+    so the clients they hold (and their connections to the host API) are reused as well.
+
+    :param server: The server to get the container backend instance for.
+    """
+    key = _get_container_backend_key(server)
+    instance = _CONTAINER_BACKENDS.get(key)
+    if instance is None:
+        with _CONTAINER_BACKENDS_LOCK:
+            instance = _CONTAINER_BACKENDS.get(key)
+            if instance is None:
+                instance = server.container_backend.get_instance(key[-1])
+                _CONTAINER_BACKENDS[key] = instance
+    return instance
+
+
+def invalidate_container_backends(server_id=None, backend_id=None):
+    """
+    Remove the container backend instances for the given server and/or backend from the registry.
+
+    :param server_id: If defined, only remove the instances used for that server.
+    :param backend_id: If defined, only remove the instances of that backend.
+    """
+    with _CONTAINER_BACKENDS_LOCK:
+        for key in _CONTAINER_BACKENDS.keys():
+            if (server_id is None or key[0] == server_id) and (backend_id is None or key[1] == backend_id):
+                del _CONTAINER_BACKENDS[key]
 
 
 """
 Internal LDAP helpers.
 """
 _INTERNAL_LDAP = None
+_INTERNAL_LDAP_POOL = None
 
 
 def get_internal_ldap():
@@ -23,10 +252,19 @@ def get_internal_ldap():
 def get_internal_ldap_connected():
     """
     Return an internal LDAP instance with already called `connect` method.
+
+    The connection is leased from a pool, calling `disconnect` gives it back.
     """
-    backend = get_internal_ldap()
-    backend.connect(json.loads(config.INTERNAL_LDAP_CONNECT_CREDENTIALS))
-    return backend
+    global _INTERNAL_LDAP_POOL
+    if _INTERNAL_LDAP_POOL is None:
+        _INTERNAL_LDAP_POOL = ConnectionPool(
+            get_internal_ldap,
+            lambda: json.loads(config.INTERNAL_LDAP_CONNECT_CREDENTIALS),
+            settings.BACKEND_CONNECTION_POOL_SIZE,
+            settings.BACKEND_CONNECTION_POOL_MAX_IDLE,
+            settings.BACKEND_CONNECTION_POOL_TIMEOUT
+        )
+    return _INTERNAL_LDAP_POOL.lease()
 
 
 """
@@ -69,6 +307,7 @@ def get_storage_backend():
 User backend helpers.
 """
 _USER_BACKEND = None
+_USER_BACKEND_POOL = None
 
 
 def get_user_backend():
@@ -85,7 +324,16 @@ def get_user_backend():
 def get_user_backend_connected():
     """
     Return the user backend instance with already called `connect` method.
+
+    The connection is leased from a pool, calling `disconnect` gives it back.
     """
-    backend = get_user_backend()
-    backend.connect(json.loads(config.USER_BACKEND_CONNECT_CREDENTIALS))
-    return backend
+    global _USER_BACKEND_POOL
+    if _USER_BACKEND_POOL is None:
+        _USER_BACKEND_POOL = ConnectionPool(
+            get_user_backend,
+            lambda: json.loads(config.USER_BACKEND_CONNECT_CREDENTIALS),
+            settings.BACKEND_CONNECTION_POOL_SIZE,
+            settings.BACKEND_CONNECTION_POOL_MAX_IDLE,
+            settings.BACKEND_CONNECTION_POOL_TIMEOUT
+        )
+    return _USER_BACKEND_POOL.lease()
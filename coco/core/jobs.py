@@ -0,0 +1,193 @@
+"""
+Queue for the (slow) container backend operations.
+
+The signal receivers doing the actual work on the container backends register their work as job handlers
+and `dispatch` it: the work is executed right away, unless queueing is enabled (see `settings.JOBS_ASYNC`),
+in which case a `Job` is stored and executed later on by the workers of the `run_jobs` management command,
+so the request does not block on the backend.
+"""
+from coco.core import settings
+from coco.core.models import Job
+from contextlib import contextmanager
+from django.db import close_old_connections
+from django.utils import timezone
+import json
+import logging
+import os
+import socket
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+_HANDLERS = {}
+_local = threading.local()
+
+
+def get_container_key(container):
+    """
+    Get the job key for operations on `container` (so they are executed in order).
+
+    :param container: The container to get the key for.
+    """
+    return 'container:%i' % container.id
+
+
+def get_server_key(server):
+    """
+    Get the job key for operations on `server` (so they are executed in order).
+
+    :param server: The server to get the key for.
+    """
+    return 'server:%i' % server.id
+
+
+def get_worker_name():
+    """
+    Get the name identifying the current worker process.
+    """
+    return '%s:%i' % (socket.gethostname(), os.getpid())
+
+
+def handler(*actions):
+    """
+    Decorator registering the decorated function as handler for the job `actions`.
+
+    Handlers are called with the job to execute and may raise any exception to mark it as failed.
+
+    :param actions: The job actions the function handles.
+    """
+    def register(func):
+        for action in actions:
+            _HANDLERS[action] = func
+        return func
+    return register
+
+
+def is_inline():
+    """
+    Check if dispatched jobs are executed right away (instead of being queued).
+    """
+    return not settings.JOBS_ASYNC or getattr(_local, 'inline', False)
+
+
+@contextmanager
+def inline():
+    """
+    Context manager executing all jobs dispatched within right away.
+
+    Used by the workers, so operations triggered by a job (i.e. the cleanup of a container that could not be created)
+    are part of that job.
+    """
+    previous = getattr(_local, 'inline', False)
+    _local.inline = True
+    try:
+        yield
+    finally:
+        _local.inline = previous
+
+
+def dispatch(action, key='', owner=None, container=None, image=None, snapshot=None, **arguments):
+    """
+    Queue a new job (or execute it right away, see `is_inline`).
+
+    Returns the queued job, or `None` if it has been executed already.
+
+    :param action: The action of the job (one of `Job.ACTIONS`).
+    :param key: Jobs with the same key are executed in order.
+    :param owner: The backend user who requested the operation.
+    :param container: The container the job operates on.
+    :param image: The container image the job operates on.
+    :param snapshot: The container snapshot the job operates on.
+    :param arguments: Additional (JSON serializable) arguments for the handler.
+    """
+    job = Job(
+        action=action,
+        key=key,
+        owner=owner,
+        container=container,
+        image=image,
+        snapshot=snapshot,
+        arguments=json.dumps(arguments)
+    )
+    if is_inline():
+        _HANDLERS[action](job)
+        return None
+    job.save()
+    return job
+
+
+def execute(job):
+    """
+    Execute the claimed `job` and store its outcome.
+
+    :param job: The job to execute.
+    """
+    status = Job.STATUS_SUCCEEDED
+    error = ''
+    try:
+        with inline():
+            _HANDLERS[job.action](job)
+    except Exception as ex:
+        logger.exception(ex)
+        status = Job.STATUS_FAILED
+        error = str(ex) or ex.__class__.__name__
+    # the job's objects might have been deleted meanwhile, so do not save the instance as is
+    Job.objects.filter(id=job.id).update(status=status, error=error, finished_on=timezone.now())
+    job = Job.objects.get(id=job.id)
+
+    from coco.core.signals.signals import job_finished
+    job_finished.send(sender=Job, job=job)
+    return job
+
+
+def recover(host=None):
+    """
+    Re-queue the jobs left running by dead workers of `host` (the handlers are safe to be run again).
+
+    Jobs that have been claimed `settings.JOBS_MAX_ATTEMPTS` times already are marked as failed instead
+    (they might be the reason the workers die), along with the containers they should have created.
+    Has to be called before starting the workers of a host.
+    Returns a (number of re-queued jobs, number of failed jobs) tuple.
+
+    :param host: The host name of the workers (defaults to the local one).
+    """
+    if host is None:
+        host = socket.gethostname()
+    orphaned = Job.objects.filter(status=Job.STATUS_RUNNING, worker__startswith=host + ':')
+    requeued = orphaned \
+        .filter(attempts__lt=settings.JOBS_MAX_ATTEMPTS) \
+        .update(status=Job.STATUS_PENDING, worker='', started_on=None)
+    failed = list(orphaned.select_related('container'))
+    Job.objects \
+        .filter(id__in=[job.id for job in failed]) \
+        .update(status=Job.STATUS_FAILED, error='The worker died.', finished_on=timezone.now())
+    for job in failed:
+        if job.action in [Job.ACTION_CLONE, Job.ACTION_CREATE] \
+                and job.container is not None and not job.container.is_created():
+            job.container.delete()
+    return requeued, len(failed)
+
+
+def work(once=False, poll_interval=None):
+    """
+    Claim and execute pending jobs until stopped.
+
+    :param once: If true, return as soon as there are no more pending jobs.
+    :param poll_interval: The number of seconds to wait for new jobs (defaults to the setting).
+    """
+    if poll_interval is None:
+        poll_interval = settings.JOBS_POLL_INTERVAL
+    worker = get_worker_name()
+    executed = 0
+    while True:
+        close_old_connections()
+        job = Job.claim(worker)
+        if job is not None:
+            execute(job)
+            executed += 1
+        elif once:
+            return executed
+        else:
+            time.sleep(poll_interval)
@@ -1,31 +1,249 @@
-from coco.core.auth.authentication_backends import BackendProxyAuthentication
-from coco.core.helpers import get_user_backend_connected
-from coco.core.models import *
-from coco.contract.backends import UserBackend
-from django.core.management.base import BaseCommand, CommandError
+from coco.contract.backends import GroupBackend, UserBackend
+from coco.contract.errors import GroupBackendError, StorageBackendError, \
+    UserBackendError
+from coco.core import settings
+from coco.core.allocators import uid_allocator
+from coco.core.helpers import get_internal_ldap_connected, get_user_backend_connected
+from coco.core.models import BackendGroup, BackendUser, CollaborationGroup, Sequence
+from coco.core.signals.backend_users import create_home_directory, \
+    create_public_directory
+from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from datetime import datetime
+from multiprocessing.pool import ThreadPool
+import calendar
+import logging
+import time
 
 
-def import_users():
+logger = logging.getLogger(__name__)
+
+"""
+Name of the sequence storing the start time (UNIX timestamp) of the last complete import.
+"""
+LAST_IMPORT_SEQUENCE = 'import_users'
+
+
+def get_last_import():
+    """
+    Get the start time of the last complete import (`None` if there was none yet).
+    """
+    value = Sequence.objects.filter(name=LAST_IMPORT_SEQUENCE).values_list('value', flat=True).first()
+    if not value:
+        return None
+    return datetime.fromtimestamp(value, timezone.utc)
+
+
+def set_last_import(started):
+    """
+    Store `started` as the start time of the last complete import.
+
+    :param started: The (aware) datetime the import has been started at.
+    """
+    Sequence.objects.update_or_create(
+        name=LAST_IMPORT_SEQUENCE,
+        defaults={'value': calendar.timegm(started.utctimetuple())}
+    )
+
+
+def split(items, count):
+    """
+    Split `items` into (at most) `count` non-empty chunks.
+
+    :param items: The list to split.
+    :param count: The number of chunks.
+    """
+    return [chunk for chunk in (items[i::count] for i in range(count)) if chunk]
+
+
+def create_ldap_entries(accounts):
+    """
+    Create the internal LDAP entries (primary group, user and membership) of the `accounts`.
+
+    Runs in a worker thread with its own LDAP connection, so no database queries must be issued here.
+    Returns a list of (username, uid, user pk, gid, group pk) tuples of the created accounts,
+    the IDs/PKs being the ones returned by the LDAP server.
+
+    :param accounts: A list of (username, uid) tuples to create.
+    """
+    created = []
+    internal_ldap = get_internal_ldap_connected()
+    try:
+        for username, uid in accounts:
+            group = None
+            try:
+                # the primary group of each user uses the user's uid as gid
+                group = internal_ldap.create_group(uid, username)
+                user = internal_ldap.create_user(
+                    uid,
+                    username,
+                    '',
+                    group.get(GroupBackend.FIELD_ID),
+                    '/home/' + username
+                )
+                internal_ldap.add_group_member(group.get(GroupBackend.FIELD_PK), user.get(UserBackend.FIELD_PK))
+                created.append((
+                    username,
+                    user.get(UserBackend.FIELD_ID),
+                    user.get(UserBackend.FIELD_PK),
+                    group.get(GroupBackend.FIELD_ID),
+                    group.get(GroupBackend.FIELD_PK)
+                ))
+            except (GroupBackendError, UserBackendError) as ex:
+                logger.warning("Could not create the LDAP entries of user %s: %s", username, ex)
+                if group is not None:
+                    try:
+                        internal_ldap.delete_group(group.get(GroupBackend.FIELD_PK))
+                    except GroupBackendError:
+                        pass  # retried upon the next import anyway
+    finally:
+        try:
+            internal_ldap.disconnect()
+        except:
+            pass
+    return created
+
+
+def create_django_users(accounts):
+    """
+    Create the Django records of the `accounts` already existing on the internal LDAP server.
+
+    The records are bulk created, so no signals (and therefore no backend operations) are triggered.
+    Returns the created backend users (with their primary group selected).
+
+    :param accounts: A list of (username, uid, user pk, gid, group pk) tuples.
+    """
+    if not accounts:
+        return []
+    usernames = [account[0] for account in accounts]
+    with transaction.atomic():
+        User.objects.bulk_create([User(username=username, password='') for username in usernames])
+        users = dict(User.objects.filter(username__in=usernames).values_list('username', 'id'))
+        groups = {}
+        for username in usernames:
+            # multi-table inherited, so cannot be bulk created
+            group = CollaborationGroup(name=username, is_single_user_group=True)
+            group.save()
+            groups[username] = group.id
+        BackendGroup.objects.bulk_create([
+            BackendGroup(django_group_id=groups[username], backend_id=gid, backend_pk=group_pk)
+            for username, uid, user_pk, gid, group_pk in accounts
+        ])
+        backend_groups = dict(
+            BackendGroup.objects.filter(django_group_id__in=groups.values()).values_list('django_group_id', 'id')
+        )
+        BackendUser.objects.bulk_create([
+            BackendUser(
+                django_user_id=users[username],
+                backend_id=uid,
+                backend_pk=user_pk,
+                primary_group_id=backend_groups[groups[username]]
+            )
+            for username, uid, user_pk, gid, group_pk in accounts
+        ])
+        User.groups.through.objects.bulk_create([
+            User.groups.through(user_id=users[username], group_id=groups[username]) for username in usernames
+        ])
+    return list(BackendUser.objects.filter(django_user_id__in=users.values()).select_related('primary_group', 'django_user'))
+
+
+def create_directories(users):
+    """
+    Create the home and public directories of the `users` (unless existing).
+
+    Runs in a worker thread, so no database queries must be issued here.
+    Returns the number of users whose directories could not be created.
+
+    :param users: A list of backend users (with their primary group selected).
+    """
+    failed = 0
+    for user in users:
+        try:
+            create_home_directory(sender=BackendUser, user=user)
+            create_public_directory(sender=BackendUser, user=user)
+        except StorageBackendError as ex:
+            logger.warning("Could not create the directories of user %s: %s", user, ex)
+            failed += 1
+    return failed
+
+
+def import_users(batch_size=None, pool_size=None, full=False, incremental=False, progress=None):
     """
     Imports all the users found on the user backend into django.
+
+    Only users not known yet are imported. They are handled in batches: the internal LDAP entries and
+    the directories are created in parallel, the Django records are bulk created.
+    Returns the list of the imported usernames.
+
+    The start time of each complete import (i.e. no LDAP entry failed) is stored as high-water mark.
+    Incremental imports pass it to the user backend as `changed_since`, so only the users created or
+    modified since are fetched and diffed (backends ignoring the filter return all users, which are
+    diffed as usual).
+
+    :param batch_size: The number of users to import per batch (defaults to the setting).
+    :param pool_size: The number of parallel LDAP connections/storage operations (defaults to the setting).
+    :param full: If true, the missing directories of the already imported users are created as well.
+    :param incremental: If true, only the users changed since the last complete import are fetched.
+    :param progress: Callable receiving the number of handled and new users after each batch.
     """
+    if batch_size is None:
+        batch_size = settings.USER_IMPORT_BATCH_SIZE
+    if pool_size is None:
+        pool_size = settings.USER_IMPORT_POOL_SIZE
+    started = timezone.now()
+    since = get_last_import() if incremental else None
     backend = get_user_backend_connected()
-    users = backend.get_users()
-    helper = BackendProxyAuthentication()
-    new_users = []
+    try:
+        if since is None:
+            users = backend.get_users()
+        else:
+            users = backend.get_users(changed_since=since)
+    finally:
+        backend.disconnect()
+    usernames = []
+    seen = set()
     for user in users:
         username = str(user.get(UserBackend.FIELD_PK))
-        password = ''
-        obj = User.objects.filter(username=username)
-        if not obj:
-            # if user is not existing yet, create him
-            uid = BackendUser.generate_internal_uid()
-            group = helper.create_user_groups(username, uid)
-            user = helper.create_users(username, password, uid, group.backend_group)
-            group.add_user(user.backend_user)
-            new_users.append(username)
-    return new_users
+        if username not in seen:
+            seen.add(username)
+            usernames.append(username)
+    if since is None:
+        # the existing usernames are loaded with a single query
+        existing = set(User.objects.values_list('username', flat=True)) if usernames else set()
+    else:
+        # only the (few) changed users are looked up
+        existing = set()
+        for offset in range(0, len(usernames), batch_size):
+            existing.update(User.objects.filter(
+                username__in=usernames[offset:offset + batch_size]
+            ).values_list('username', flat=True))
+    new_usernames = [name for name in usernames if name not in existing]
+
+    imported = []
+    pool = ThreadPool(pool_size)
+    try:
+        for offset in range(0, len(new_usernames), batch_size):
+            batch = new_usernames[offset:offset + batch_size]
+            accounts = zip(batch, uid_allocator.allocate_many(len(batch)))
+            created = []
+            for entries in pool.map(create_ldap_entries, split(accounts, pool_size)):
+                created.extend(entries)
+            backend_users = create_django_users(created)
+            pool.map(create_directories, split(backend_users, pool_size))
+            imported.extend(account[0] for account in created)
+            if progress is not None:
+                progress(offset + len(batch), len(new_usernames))
+        if full:
+            known = list(BackendUser.objects.select_related('primary_group', 'django_user'))
+            pool.map(create_directories, split(known, pool_size))
+    finally:
+        pool.close()
+    if len(imported) == len(new_usernames):
+        # users whose LDAP entries failed are retried by the next (incremental) import
+        set_last_import(started)
+    return imported
 
 
 class Command(BaseCommand):
@@ -38,12 +256,32 @@ class Command(BaseCommand):
 
     help = 'Import all users from the UserBackend defined in the config vars.'
 
-    # def add_arguments(self, parser):
-    # Todo: make command more powerful, to import single users by username
-    #     parser.add_argument('username', nargs='+', type=str)
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.USER_IMPORT_BATCH_SIZE,
+                            help='The number of users to import per batch.')
+        parser.add_argument('--pool-size', type=int, default=settings.USER_IMPORT_POOL_SIZE,
+                            help='The number of parallel LDAP connections and storage operations.')
+        parser.add_argument('--full', action='store_true', default=False,
+                            help='Create the missing directories of the already imported users as well.')
+        parser.add_argument('--incremental', action='store_true', default=False,
+                            help='Only fetch the users changed since the last complete import.')
 
     def handle(self, *args, **options):
-        new_users = import_users()
-        self.stdout.write("Successfully imported {} users:".format(len(new_users)))
-        for user in new_users:
-            self.stdout.write(user)
+        started = time.time()
+
+        def progress(handled, total):
+            self.stdout.write("{}/{} new users handled ({:.1f} users/s).".format(
+                handled, total, handled / max(time.time() - started, 0.001)
+            ))
+
+        new_users = import_users(
+            batch_size=max(1, options['batch_size']),
+            pool_size=max(1, options['pool_size']),
+            full=options['full'],
+            incremental=options['incremental'],
+            progress=progress
+        )
+        self.stdout.write("Successfully imported {} users in {:.1f}s.".format(len(new_users), time.time() - started))
+        if int(options['verbosity']) > 1:
+            for user in new_users:
+                self.stdout.write(user)
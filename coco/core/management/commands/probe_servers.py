@@ -0,0 +1,99 @@
+from coco.core import settings
+from coco.core.models import Server, ServerStatus
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from multiprocessing import TimeoutError
+from multiprocessing.pool import ThreadPool
+import logging
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+def probe_server(server):
+    """
+    Probe the container backend of `server` and return a (is healthy, latency, error) tuple.
+
+    Runs in a worker thread, so no database queries must be issued here.
+
+    :param server: The server to probe (with the container backend selected).
+    """
+    start = time.time()
+    try:
+        server.get_container_backend().get_containers()
+    except Exception as ex:  # whatever the reason, the host is unusable
+        logger.warning("Health probe of server %s failed: %s", server, ex)
+        return False, None, (str(ex) or ex.__class__.__name__)[:255]
+    return True, time.time() - start, ''
+
+
+def probe_servers(timeout=None, pool_size=None):
+    """
+    Probe all container hosts concurrently and store the results.
+
+    Probes not answered within `timeout` seconds are recorded as failed.
+
+    :param timeout: The number of seconds to wait for the probes (defaults to the setting).
+    :param pool_size: The number of servers probed in parallel (defaults to the setting).
+    """
+    if timeout is None:
+        timeout = settings.SERVER_HEALTH_PROBE_TIMEOUT
+    if pool_size is None:
+        pool_size = settings.SERVER_HEALTH_PROBE_POOL_SIZE
+    servers = list(Server.objects.filter(container_backend__isnull=False).select_related('container_backend'))
+    if not servers:
+        return []
+    checked_at = timezone.now()
+    pool = ThreadPool(min(pool_size, len(servers)))
+    try:
+        results = [(server, pool.apply_async(probe_server, (server,))) for server in servers]
+        deadline = time.time() + timeout
+        statuses = []
+        for server, result in results:
+            try:
+                is_healthy, latency, error = result.get(max(0, deadline - time.time()))
+            except TimeoutError:
+                is_healthy, latency, error = False, None, 'Timed out after %i seconds.' % timeout
+            statuses.append(ServerStatus(
+                server=server,
+                checked_at=checked_at,
+                is_healthy=is_healthy,
+                latency=latency,
+                error=error
+            ))
+    finally:
+        pool.close()  # hanging probes must not block, their threads finish in the background
+    ServerStatus.objects.bulk_create(statuses)
+    for server in servers:
+        ServerStatus.prune(server, settings.SERVER_STATUS_HISTORY_SIZE)
+    return statuses
+
+
+class Command(BaseCommand):
+
+    """
+    Custom manage.py command to periodically probe the health of the container hosts.
+
+    https://docs.djangoproject.com/en/1.8/howto/custom-management-commands/
+    """
+
+    help = 'Probe the container backends of all servers and record their health and latency.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', default=False,
+                            help='Probe the servers once and exit.')
+        parser.add_argument('--interval', type=int, default=settings.SERVER_HEALTH_PROBE_INTERVAL,
+                            help='The number of seconds between two probe runs.')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.time()
+            for status in probe_servers():
+                if status.is_healthy:
+                    self.stdout.write("{}: healthy ({:.3f}s)".format(status.server, status.latency))
+                else:
+                    self.stdout.write("{}: unhealthy ({})".format(status.server, status.error))
+            if options['once']:
+                break
+            time.sleep(max(0, options['interval'] - (time.time() - started)))
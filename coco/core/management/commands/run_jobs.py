@@ -0,0 +1,42 @@
+from coco.core import jobs, settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from multiprocessing import Process
+
+
+class Command(BaseCommand):
+
+    """
+    Custom manage.py command to execute the queued jobs (container backend operations).
+
+    Only one instance should be run per host, as jobs left running by the host's (dead) workers
+    are re-queued (or marked as failed) upon start.
+
+    https://docs.djangoproject.com/en/1.8/howto/custom-management-commands/
+    """
+
+    help = 'Start the local workers executing the queued container backend operations.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.JOBS_WORKERS,
+                            help='The number of worker processes to start.')
+        parser.add_argument('--once', action='store_true', default=False,
+                            help='Execute the pending jobs (in this process) and exit.')
+
+    def handle(self, *args, **options):
+        requeued, failed = jobs.recover()
+        if requeued or failed:
+            self.stdout.write("Re-queued {} and failed {} jobs of dead workers.".format(requeued, failed))
+        if options['once']:
+            executed = jobs.work(once=True)
+            self.stdout.write("Successfully executed {} jobs.".format(executed))
+            return
+
+        connection.close()  # must not be shared with the forked workers
+        workers = [Process(target=jobs.work) for i in range(max(1, options['workers']))]
+        for worker in workers:
+            worker.daemon = True
+            worker.start()
+        self.stdout.write("Started {} workers.".format(len(workers)))
+        for worker in workers:
+            worker.join()
@@ -0,0 +1,84 @@
+from coco.core import settings
+from coco.core.models import Container, ContainerImage
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+import time
+
+
+def get_idle_containers(action, now=None):
+    """
+    Get the containers that have not been accessed for longer than their idle timeout
+    and the `action` can be executed on.
+
+    :param action: The action to execute on the idle containers ('suspend' or 'stop').
+    :param now: The point in time to check for (defaults to now).
+    """
+    if now is None:
+        now = timezone.now()
+    timeouts = set(
+        ContainerImage.objects.filter(idle_timeout__isnull=False).values_list('idle_timeout', flat=True)
+    )
+    if settings.CONTAINER_IDLE_TIMEOUT is not None:
+        timeouts.add(settings.CONTAINER_IDLE_TIMEOUT)
+    if not timeouts:
+        return []
+    candidates = Container.objects \
+        .filter(last_accessed__lt=now - timedelta(seconds=min(timeouts))) \
+        .select_related('image', 'clone_of__image', 'server__container_backend')
+    idle = []
+    for container in candidates:
+        timeout = container.get_idle_timeout()
+        if timeout is not None and container.last_accessed < now - timedelta(seconds=timeout):
+            idle.append(container)
+    # resolve the running/suspended states with one backend call per server
+    Container.prefetch_backend_states(idle)
+    if action == 'suspend':
+        return [container for container in idle if container.is_running() and not container.is_suspended()]
+    return [container for container in idle if container.is_running()]
+
+
+def suspend_idle_containers(action=None):
+    """
+    Suspend (or stop) all idle containers.
+
+    Returns a dict mapping the IDs of the idle containers to `None` (succeeded) or the error message.
+
+    :param action: The action to execute on the idle containers (defaults to the setting).
+    """
+    if action is None:
+        action = settings.CONTAINER_IDLE_ACTION
+    return Container.bulk_action(get_idle_containers(action), action)
+
+
+class Command(BaseCommand):
+
+    """
+    Custom manage.py command to periodically suspend (or stop) the containers nobody has accessed lately.
+
+    https://docs.djangoproject.com/en/1.8/howto/custom-management-commands/
+    """
+
+    help = 'Suspend or stop all containers that have been idle for longer than their idle timeout.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--action', choices=['suspend', 'stop'], default=settings.CONTAINER_IDLE_ACTION,
+                            help='The action to execute on the idle containers.')
+        parser.add_argument('--once', action='store_true', default=False,
+                            help='Check the containers once and exit.')
+        parser.add_argument('--interval', type=int, default=settings.CONTAINER_IDLE_CHECK_INTERVAL,
+                            help='The number of seconds between two checks.')
+
+    def handle(self, *args, **options):
+        if options['action'] not in ['suspend', 'stop']:
+            raise CommandError("The action has to be either 'suspend' or 'stop'.")
+        while True:
+            started = time.time()
+            errors = suspend_idle_containers(options['action'])
+            failed = len([error for error in errors.values() if error is not None])
+            self.stdout.write("Executed '{}' on {} idle containers, {} failed.".format(
+                options['action'], len(errors) - failed, failed
+            ))
+            if options['once']:
+                break
+            time.sleep(max(0, options['interval'] - (time.time() - started)))
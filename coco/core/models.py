@@ -1,13 +1,27 @@
 from coco.common.utils import ClassLoader
 from coco.contract.backends import ContainerBackend
+from coco.contract.errors import ContainerBackendError
 from coco.core import settings
+from coco.core.caches import container_state_cache
+from coco.core.helpers import get_container_backend
 from coco.core.validators import validate_json_format
+from datetime import timedelta
 from django.contrib.auth.models import Group, User
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import F, Max, Prefetch, Q
+from django.db.models.query import prefetch_related_objects
+from django.utils import timezone
 from django.utils.encoding import smart_unicode
+from multiprocessing.pool import ThreadPool
 from random import randint
+import itertools
+import json
+import logging
+
+
+logger = logging.getLogger(__name__)
 
 
 class Backend(models.Model):
@@ -163,17 +177,19 @@ class BackendGroup(models.Model):
         Generate an unique internal group ID.
 
         Used for user-created groups. The primary group of each user should use the user's uid as guid.
+        The IDs are allocated after the highest one in use (see `coco.core.allocators.get_highest_used_gid`).
         """
-        last_django_id = 0
-        if Group.objects.count() > 0:
-            last_django_id = Group.objects.latest('id').id
-        return settings.GROUP_ID_OFFSET + last_django_id
+        return gid_allocator.allocate()
 
     def get_members(self):
         """
         Get a list of members for this group.
+
+        Prefetched members (see `prefetch_members`) are preferred over querying them.
         """
-        return [user.backend_user for user in self.django_group.user_set.all()]
+        if hasattr(self, '_members'):
+            return self._members
+        return list(BackendUser.objects.filter(django_user__groups=self.django_group_id))
 
     def is_member(self, user):
         """
@@ -181,7 +197,37 @@ class BackendGroup(models.Model):
 
         :param user: The user to check for membership.
         """
-        return user in self.get_members()
+        if not isinstance(user, BackendUser):
+            return False
+        return User.groups.through.objects.filter(
+            group_id=self.django_group_id,
+            user_id=user.django_user_id
+        ).exists()
+
+    @staticmethod
+    def prefetch_members(groups):
+        """
+        Fetch the members of all `groups` with two queries (instead of one per group).
+
+        The members (with their Django users selected) are stored on the group instances,
+        so subsequent calls to `get_members` do not need to query them anymore.
+
+        :param groups: An iterable of backend groups to fetch the members for.
+        """
+        groups = list(groups)
+        memberships = {}
+        for group_id, user_id in User.groups.through.objects.filter(
+            group_id__in=set(group.django_group_id for group in groups)
+        ).values_list('group_id', 'user_id'):
+            memberships.setdefault(group_id, []).append(user_id)
+        users = BackendUser.objects \
+            .filter(django_user_id__in=set(itertools.chain.from_iterable(memberships.values()))) \
+            .select_related('django_user')
+        users = dict((user.django_user_id, user) for user in users)
+        for group in groups:
+            group._members = [
+                users[user_id] for user_id in sorted(memberships.get(group.django_group_id, [])) if user_id in users
+            ]
 
     def remove_member(self, user):
         """
@@ -261,16 +307,19 @@ class BackendUser(models.Model):
     def generate_internal_uid():
         """
         Generate an unique internal user ID.
+
+        The IDs are allocated after the highest one in use (see `coco.core.allocators.get_highest_used_uid`).
         """
-        last_django_id = 0
-        if BackendUser.objects.count() > 0:
-            last_django_id = BackendUser.objects.latest('id').id
-        return settings.USER_ID_OFFSET + last_django_id
+        return uid_allocator.allocate()
 
     def get_collaboration_group(self):
         """
         Return the private collaboration group belonging to this user.
+
+        A prefetched group (see `prefetch_collaboration_groups`) is preferred over querying it.
         """
+        if hasattr(self, '_collaboration_group'):
+            return self._collaboration_group
         group = CollaborationGroup.objects.filter(
             is_single_user_group=True,
             user__id=self.django_user.id
@@ -285,6 +334,30 @@ class BackendUser(models.Model):
         """
         return self.django_user.get_username()
 
+    @staticmethod
+    def prefetch_collaboration_groups(users):
+        """
+        Fetch the private collaboration groups of all `users` with a constant number of queries.
+
+        The groups are stored on the user instances, so subsequent calls to `get_collaboration_group`
+        do not need to query them anymore. The groups' members are prefetched as well
+        (see `CollaborationGroup.prefetch_members`), as they are usually serialized with their member count.
+
+        :param users: An iterable of backend users to fetch the collaboration groups for.
+        """
+        users = list(users)
+        group_ids = {}
+        for user_id, group_id in User.groups.through.objects.filter(
+            user_id__in=set(user.django_user_id for user in users),
+            group__collaborationgroup__is_single_user_group=True
+        ).values_list('user_id', 'group_id'):
+            # same as `first()` in `get_collaboration_group`, in case there are several
+            group_ids[user_id] = min(group_id, group_ids.get(user_id, group_id))
+        groups = CollaborationGroup.objects.in_bulk(set(group_ids.values()))
+        CollaborationGroup.prefetch_members(groups.values())
+        for user in users:
+            user._collaboration_group = groups.get(group_ids.get(user.django_user_id))
+
     def save(self, *args, **kwargs):
         """
         :inherit.
@@ -368,27 +441,110 @@ class CollaborationGroup(Group):
                 managers.append(self.creator)
         return managers
 
+    def _check_membership(self, kind, user, queryset):
+        """
+        Check if `user` is within `queryset`, remembering the result for this instance.
+
+        As instances usually live for a single request, the memo saves repeated queries
+        for the same user (e.g. by permission checks). It is cleared whenever the group's
+        users or admins change, see `clear_membership_memo`.
+
+        :param kind: The kind of membership checked (used as part of the memo key).
+        :param user: The backend user to check.
+        :param queryset: The queryset of backend users to look for the user in.
+        """
+        if not isinstance(user, BackendUser):
+            return False
+        if not hasattr(self, '_membership_memo'):
+            self._membership_memo = {}
+        key = (kind, user.pk)
+        if key not in self._membership_memo:
+            self._membership_memo[key] = queryset.filter(pk=user.pk).exists()
+        return self._membership_memo[key]
+
+    def clear_membership_memo(self):
+        """
+        Forget the results of all membership checks done on this instance (and the prefetched members).
+        """
+        self._membership_memo = {}
+        if hasattr(self, '_members'):
+            del self._members
+
     def get_members(self):
         """
         Get a list of all group members (including the creator and admins).
+
+        Prefetched members (see `prefetch_members`) are preferred over querying them.
         """
-        admins = list(self.admins.all())
-        members = admins + self.get_users()
-        if self.creator:
-            members.append(self.creator)
-        return list(set(members))
+        if hasattr(self, '_members'):
+            return self._members
+        return list(self.get_members_queryset())
 
     def get_member_count(self):
         """
         Get the number of members in the group.
         """
-        return len(self.get_members())
+        if hasattr(self, '_members'):
+            return len(self._members)
+        return self.get_members_queryset().count()
+
+    def get_members_queryset(self):
+        """
+        Get a queryset of all group members (including the creator and admins).
+
+        Other than `get_members`, the members are selected with a single query.
+        """
+        return BackendUser.objects.filter(
+            Q(django_user__in=User.groups.through.objects.filter(group_id=self.id).values('user_id'))
+            | Q(pk__in=self.admins.values('pk'))
+            | Q(pk=self.creator_id)
+        )
 
     def get_users(self):
         """
         Get a list of regular members for this group.
         """
-        return [user.backend_user for user in self.user_set.all()]
+        return list(self.get_users_queryset())
+
+    def get_users_queryset(self):
+        """
+        Get a queryset of the regular members for this group.
+        """
+        return BackendUser.objects.filter(django_user__groups=self.id)
+
+    @staticmethod
+    def prefetch_members(groups):
+        """
+        Fetch the members and admins of all `groups` with a constant number of queries (instead of some per group).
+
+        The members (with their Django users selected) are stored on the group instances,
+        so subsequent calls to `get_members` and `get_member_count` do not need to query them anymore.
+        They are dropped again by `clear_membership_memo` whenever the group's users or admins change.
+
+        :param groups: An iterable of collaboration groups to fetch the members for.
+        """
+        groups = list(groups)
+        prefetch_related_objects(groups, ['admins'])
+        memberships = {}
+        for group_id, user_id in User.groups.through.objects.filter(
+            group_id__in=set(group.id for group in groups)
+        ).values_list('group_id', 'user_id'):
+            memberships.setdefault(group_id, set()).add(user_id)
+        managers = {}
+        for group in groups:
+            managers[group.id] = set(admin.pk for admin in group.admins.all())
+            if group.creator_id is not None:
+                managers[group.id].add(group.creator_id)
+        members = BackendUser.objects.filter(
+            Q(django_user_id__in=set(itertools.chain.from_iterable(memberships.values())))
+            | Q(pk__in=set(itertools.chain.from_iterable(managers.values())))
+        ).select_related('django_user')
+        members = dict((member.pk, member) for member in members)
+        by_user = dict((member.django_user_id, member) for member in members.values())
+        for group in groups:
+            group_members = set(by_user[user_id] for user_id in memberships.get(group.id, []) if user_id in by_user)
+            group_members.update(members[pk] for pk in managers[group.id] if pk in members)
+            group._members = sorted(group_members, key=lambda member: member.pk)
 
     def has_access(self, user):
         """
@@ -396,7 +552,7 @@ class CollaborationGroup(Group):
 
         :param user: The user to check.
         """
-        return user in self.get_members()
+        return self.is_member(user)
 
     def is_admin(self, user):
         """
@@ -404,7 +560,7 @@ class CollaborationGroup(Group):
 
         :param user: The user to check.
         """
-        return user in self.admins.all()
+        return self._check_membership('admin', user, self.admins.all())
 
     def is_manager(self, user):
         """
@@ -412,7 +568,9 @@ class CollaborationGroup(Group):
 
         :param user: The user to check.
         """
-        return user == self.creator or self.is_admin(user)
+        if isinstance(user, BackendUser) and user.pk == self.creator_id:
+            return True
+        return self.is_admin(user)
 
     def is_member(self, user):
         """
@@ -420,7 +578,7 @@ class CollaborationGroup(Group):
 
         :param user: The user to check for membership.
         """
-        return user in self.get_members()
+        return self._check_membership('member', user, self.get_members_queryset())
 
     def is_user(self, user):
         """
@@ -428,7 +586,7 @@ class CollaborationGroup(Group):
 
         :param user: The user to check for membership.
         """
-        return user in self.get_users()
+        return self._check_membership('user', user, self.get_users_queryset())
 
     def remove_admin(self, user):
         """
@@ -483,11 +641,17 @@ class Container(models.Model):
     The Container model is used to represent external container_backend instances.
     """
 
+    """
+    List of the lifecycle actions that can be executed on many containers at once (see `bulk_action`).
+    """
+    BULK_ACTIONS = ['restart', 'resume', 'start', 'stop', 'suspend']
+
     id = models.AutoField(primary_key=True)
     backend_pk = models.CharField(
-        default=randint(0, 1000),
+        blank=True,
+        default='',
         max_length=255,
-        help_text='The primary key the backend uses to identify this container.'
+        help_text='The primary key the backend uses to identify this container (empty until it has been created there).'
     )
     name = models.CharField(
         max_length=75,
@@ -523,6 +687,65 @@ class Container(models.Model):
         related_name='base_for',
         help_text='The container on which this one is based/was cloned from.'
     )
+    last_accessed = models.DateTimeField(
+        default=timezone.now,
+        db_index=True,
+        help_text='The last time the workspace has been accessed (or the container has been started).'
+    )
+
+    @staticmethod
+    def bulk_action(containers, action, concurrency=None):
+        """
+        Execute the lifecycle `action` (i.e. 'stop') on all `containers`.
+
+        The containers are grouped by server. All servers are handled concurrently,
+        with at most `concurrency` backend calls in flight per server.
+        Returns a dict mapping the container IDs to `None` (succeeded) or the error message.
+
+        :param containers: An iterable of containers to execute the action on.
+        :param action: The action to execute (one of `BULK_ACTIONS`).
+        :param concurrency: The max. number of concurrent backend calls per server (defaults to the setting).
+        """
+        if action not in Container.BULK_ACTIONS:
+            raise ValueError("Unknown container action: %s" % action)
+        if concurrency is None:
+            concurrency = settings.CONTAINER_BULK_ACTION_CONCURRENCY
+        if isinstance(containers, models.query.QuerySet):
+            containers = containers.select_related('server__container_backend')
+        containers_by_server = {}
+        not_created = {}
+        for container in containers:
+            if not container.is_created():
+                not_created[container.id] = 'Container has not been created yet.'
+                continue
+            # resolved here, so the worker threads do not need to query the database
+            container.server.container_backend
+            containers_by_server.setdefault(container.server_id, []).append(container)
+
+        def execute(container):
+            try:
+                getattr(container, action)()
+            except Exception as ex:
+                logger.exception(ex)
+                return str(ex) or ex.__class__.__name__
+            finally:
+                connection.close()  # in case a receiver used the database
+            return None
+
+        pools = []
+        results = []
+        try:
+            for server_containers in containers_by_server.values():
+                pool = ThreadPool(min(concurrency, len(server_containers)))
+                pools.append(pool)
+                results.extend(
+                    (container.id, pool.apply_async(execute, (container,))) for container in server_containers
+                )
+            not_created.update((container_id, result.get()) for container_id, result in results)
+            return not_created
+        finally:
+            for pool in pools:
+                pool.close()
 
     def clean(self):
         """
@@ -590,6 +813,7 @@ class Container(models.Model):
             is_public=public,
             is_internal=self.image.is_internal
         )
+        image.committed_from = self  # the servers holding it are recorded by the commit
         image.save()
 
         from coco.core.signals.signals import container_committed
@@ -642,6 +866,20 @@ class Container(models.Model):
         """
         return Container.objects.filter(clone_of=self)
 
+    def get_idle_timeout(self):
+        """
+        Get the number of seconds after which this container is considered idle (`None` if never).
+
+        The timeout of the container's image (or the image of the container it was cloned from)
+        takes precedence over the global setting.
+        """
+        image = self.image
+        if image is None and self.is_clone():
+            image = self.clone_of.image
+        if image is not None and image.idle_timeout is not None:
+            return image.idle_timeout
+        return settings.CONTAINER_IDLE_TIMEOUT
+
     def get_friendly_name(self):
         """
         Return the human-friendly name of this container.
@@ -651,7 +889,12 @@ class Container(models.Model):
     def has_clones(self):
         """
         Return true if clones of this container exist, false otherwise.
+
+        If the container has been selected with a `clone_count` annotation
+        (i.e. `annotate(clone_count=Count('base_for'))`), no query is needed.
         """
+        if hasattr(self, 'clone_count'):
+            return self.clone_count > 0
         return Container.objects.filter(clone_of=self).exists()
     has_clones.boolean = True
 
@@ -667,38 +910,114 @@ class Container(models.Model):
         return has_protected_port
     has_protected_port.boolean = True
 
+    def is_created(self):
+        """
+        Return `True` if the container exists on the container backend, i.e. its creation job has been executed.
+
+        Lifecycle actions must not be executed on containers that have not been created yet.
+        """
+        return bool(self.backend_pk)
+    is_created.boolean = True
+
     def is_clone(self):
         """
         Return `True` if this container is a clone of another one.
         """
-        return self.clone_of is not None
+        return self.clone_of_id is not None
     is_clone.boolean = True
 
     def is_image_based(self):
         """
         Return either this container was created based on an image or not.
         """
-        return self.image is not None
+        return self.image_id is not None
     is_image_based.boolean = True
 
     def is_running(self):
         """
         Return true if the container is running, false otherwise.
-
-        TODO: store in cache?
         """
-        return self.server.get_container_backend().container_is_running(self.backend_pk)
+        return self.get_backend_status() in [
+            ContainerBackend.CONTAINER_STATUS_RUNNING,
+            ContainerBackend.CONTAINER_STATUS_SUSPENDED
+        ]
     is_running.boolean = True
 
     def is_suspended(self):
         """
         Return true if the container is suspended, false otherwise.
-
-        TODO: store in cache?
         """
-        return self.server.get_container_backend().container_is_suspended(self.backend_pk)
+        return self.get_backend_status() == ContainerBackend.CONTAINER_STATUS_SUSPENDED
     is_suspended.boolean = True
 
+    def get_backend_status(self):
+        """
+        Return the container's status as reported by the container backend.
+
+        Prefetched (see `prefetch_backend_states`) and cached states are preferred
+        over querying the backend.
+        """
+        if hasattr(self, '_backend_status'):
+            return self._backend_status
+        if not self.is_created():
+            return ContainerBackend.CONTAINER_STATUS_STOPPED
+
+        status = container_state_cache.get(self)
+        if status is None:
+            backend = self.server.get_container_backend()
+            if not backend.container_is_running(self.backend_pk):
+                status = ContainerBackend.CONTAINER_STATUS_STOPPED
+            elif backend.container_is_suspended(self.backend_pk):
+                status = ContainerBackend.CONTAINER_STATUS_SUSPENDED
+            else:
+                status = ContainerBackend.CONTAINER_STATUS_RUNNING
+            container_state_cache.set(self, status)
+        return status
+
+    @staticmethod
+    def prefetch_backend_states(containers):
+        """
+        Fetch the backend status of all `containers` with a single backend call per server.
+
+        The status is stored on the container instances, so subsequent calls to
+        `is_running` and `is_suspended` do not need to query the backend anymore.
+        Cached states are used as is, so only servers hosting containers with
+        uncached states are queried. Containers for which the status cannot be
+        fetched in bulk keep querying the backend on their own.
+
+        :param containers: An iterable of containers to fetch the status for.
+        """
+        containers = list(containers)
+        for container in containers:
+            if not container.is_created():  # nothing to ask the backend for
+                container._backend_status = ContainerBackend.CONTAINER_STATUS_STOPPED
+        containers = [container for container in containers if container.is_created()]
+        cached = container_state_cache.get_many(containers)
+        containers_by_server = {}
+        for container in containers:
+            if container.id in cached:
+                container._backend_status = cached.get(container.id)
+            else:
+                containers_by_server.setdefault(container.server_id, []).append(container)
+
+        for server_containers in containers_by_server.values():
+            server = server_containers[0].server
+            try:
+                states = {}
+                for container in server.get_container_backend().get_containers():
+                    states[container.get(ContainerBackend.KEY_PK)] = container.get(ContainerBackend.CONTAINER_KEY_STATUS)
+            except (ContainerBackendError, NotImplementedError) as ex:
+                logger.exception(ex)
+                continue
+            for container in server_containers:
+                container._backend_status = states.get(
+                    container.backend_pk,
+                    ContainerBackend.CONTAINER_STATUS_STOPPED
+                )
+            container_state_cache.set_many(
+                [(container, container._backend_status) for container in server_containers]
+            )
+
     def restart(self):
         """
         Restart the container.
@@ -826,6 +1145,18 @@ class ContainerImage(models.Model):
     )
     is_internal = models.BooleanField(default=False)
     is_public = models.BooleanField(default=False)
+    idle_timeout = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        help_text="""The number of seconds after which unaccessed containers of this image are suspended/stopped.
+        Overrides the global CONTAINER_IDLE_TIMEOUT setting."""
+    )
+    servers = models.ManyToManyField(
+        'Server',
+        blank=True,
+        related_name='images',
+        help_text='The servers known to hold this image (as reported by their container backend).'
+    )
 
     def add_access_group(self, group):
         """
@@ -845,6 +1176,17 @@ class ContainerImage(models.Model):
             return True
         return False
 
+    def get_internal_ports(self):
+        """
+        Return the container internal ports to map for containers of this image (the protected one first).
+        """
+        internal_ports = []
+        if self.protected_port:
+            internal_ports.append(self.protected_port)
+        if self.public_ports:
+            internal_ports.extend(self.public_ports.split(','))
+        return internal_ports
+
     def get_friendly_name(self):
         """
         Return the humen-friendly name of this image.
@@ -943,6 +1285,200 @@ class ContainerSnapshot(models.Model):
         unique_together = ('name', 'container')
 
 
+class Job(models.Model):
+
+    """
+    Queued (container backend) operation, executed by the workers of the `run_jobs` management command.
+
+    Jobs sharing the same `key` (i.e. the ones operating on the same container) are executed
+    one after another in the order they have been queued.
+    """
+
+    """
+    Strings to identify the operation of a job.
+    """
+    ACTION_CLONE = 'clone'
+    ACTION_COMMIT = 'commit'
+    ACTION_CREATE = 'create'
+    ACTION_DELETE = 'delete'
+    ACTION_INDEX = 'index'
+    ACTION_RESTORE = 'restore'
+    ACTION_SNAPSHOT = 'snapshot'
+
+    """
+    List of choosable job actions.
+    """
+    ACTIONS = [
+        (ACTION_CLONE, 'Clone container'),
+        (ACTION_COMMIT, 'Commit container'),
+        (ACTION_CREATE, 'Create container'),
+        (ACTION_DELETE, 'Delete container'),
+        (ACTION_INDEX, 'Index image'),
+        (ACTION_RESTORE, 'Restore snapshot'),
+        (ACTION_SNAPSHOT, 'Create snapshot'),
+    ]
+
+    """
+    Strings to identify the state of a job.
+    """
+    STATUS_FAILED = 'failed'
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+
+    """
+    List of choosable job states.
+    """
+    STATES = [
+        (STATUS_FAILED, 'Failed'),
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+    ]
+
+    id = models.AutoField(primary_key=True)
+    action = models.CharField(
+        choices=ACTIONS,
+        max_length=15,
+        help_text='The operation to execute.'
+    )
+    status = models.CharField(
+        choices=STATES,
+        default=STATUS_PENDING,
+        db_index=True,
+        max_length=15,
+        help_text='The current state of the job.'
+    )
+    key = models.CharField(
+        blank=True,
+        default='',
+        db_index=True,
+        max_length=75,
+        help_text='Jobs with the same key are executed in order (i.e. all jobs of a container).'
+    )
+    arguments = models.TextField(
+        blank=True,
+        default='{}',
+        validators=[validate_json_format],
+        help_text='Additional arguments for the operation (JSON).'
+    )
+    owner = models.ForeignKey(
+        'BackendUser',
+        blank=True,
+        null=True,
+        related_name='jobs',
+        help_text='The user who requested the operation.'
+    )
+    container = models.ForeignKey(
+        'Container',
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='jobs',
+        help_text='The container the job operates on.'
+    )
+    image = models.ForeignKey(
+        'ContainerImage',
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='jobs',
+        help_text='The container image the job operates on.'
+    )
+    snapshot = models.ForeignKey(
+        'ContainerSnapshot',
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='jobs',
+        help_text='The container snapshot the job operates on.'
+    )
+    worker = models.CharField(
+        blank=True,
+        default='',
+        max_length=255,
+        help_text='The worker (host:pid) executing the job.'
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        help_text='The number of times the job has been claimed (it is re-queued if its worker dies).'
+    )
+    error = models.TextField(
+        blank=True,
+        default='',
+        help_text='The error the job failed with.'
+    )
+    created_on = models.DateTimeField(auto_now_add=True)
+    started_on = models.DateTimeField(blank=True, null=True)
+    finished_on = models.DateTimeField(blank=True, null=True)
+
+    @classmethod
+    def claim(cls, worker):
+        """
+        Claim the next executable pending job for `worker` (or return `None` if there is none).
+
+        Claiming is a single conditional UPDATE, only matching if the job is still pending and no earlier job
+        with the same key is unfinished. As jobs only move forward (pending, running, finished), concurrent workers
+        can neither claim the same job nor two jobs with the same key.
+
+        :param worker: The name of the claiming worker.
+        """
+        seen_keys = set()
+        pending = cls.objects.filter(status=cls.STATUS_PENDING).order_by('id').values_list('id', 'key')
+        for job_id, key in pending[:settings.JOBS_CLAIM_BATCH_SIZE]:
+            claimable = cls.objects.filter(id=job_id, status=cls.STATUS_PENDING)
+            if key:
+                if key in seen_keys:
+                    continue  # has to wait for the earlier job with that key
+                seen_keys.add(key)
+                claimable = claimable.exclude(key__in=cls.objects.filter(
+                    id__lt=job_id,
+                    key=key,
+                    status__in=[cls.STATUS_PENDING, cls.STATUS_RUNNING]
+                ).values('key'))
+            claimed = claimable.update(
+                status=cls.STATUS_RUNNING,
+                worker=worker,
+                attempts=F('attempts') + 1,
+                started_on=timezone.now()
+            )
+            if claimed:
+                return cls.objects.get(id=job_id)
+        return None
+
+    def get_arguments(self):
+        """
+        Get the decoded arguments of the job.
+        """
+        return json.loads(self.arguments or '{}')
+
+    def is_finished(self):
+        """
+        Check if the job has been executed (successfully or not).
+        """
+        return self.status in [Job.STATUS_FAILED, Job.STATUS_SUCCEEDED]
+    is_finished.boolean = True
+
+    def save(self, *args, **kwargs):
+        """
+        :inherit.
+        """
+        self.full_clean()
+        super(Job, self).save(*args, **kwargs)
+
+    def __str__(self):
+        """
+        :inherit.
+        """
+        return smart_unicode("%s #%i (%s)" % (self.get_action_display(), self.id or 0, self.status))
+
+    def __unicode__(self):
+        """
+        :inherit.
+        """
+        return self.__str__()
+
+
 class Notification(models.Model):
 
     """
@@ -1099,7 +1635,14 @@ class Notification(models.Model):
 
         :return bool `True` if the notification has a related object.
         """
-        return self.get_related_object() is not None
+        related_ids = {
+            Notification.CONTAINER: self.container_id,
+            Notification.CONTAINER_IMAGE: self.container_image_id,
+            Notification.GROUP: self.group_id,
+            Notification.SHARE: self.share_id,
+        }
+        # checking the IDs only, so the related object does not need to be fetched
+        return related_ids.get(self.notification_type) is not None
     has_related_object.boolean = True
 
     def is_system_notification(self):
@@ -1153,6 +1696,39 @@ class NotificationLog(models.Model):
             notification or not. It should not be changed manually."""
     )
 
+    @classmethod
+    def create_for_group(cls, notification, group):
+        """
+        Create log records for all members of `group` not having one for `notification` yet.
+
+        Members already having a record (i.e. through another receiver group) are skipped.
+        The records are written by a single INSERT ... SELECT, so the database selects the recipients itself
+        and the number of queries does not depend on the size of the group.
+
+        :param notification: The notification to create the log records for.
+        :param group: The receiving group.
+
+        :return int The number of created records.
+        """
+        user_ids, params = group.get_members_queryset() \
+            .exclude(notification_logs__notification=notification) \
+            .values('pk').query.sql_with_params()
+        quote = connection.ops.quote_name
+        columns = [cls._meta.get_field(name).column for name in ('notification', 'user', 'read', 'in_use')]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'INSERT INTO %s (%s) SELECT %%s, %s, %%s, %%s FROM %s WHERE %s IN (%s)' % (
+                    quote(cls._meta.db_table),
+                    ', '.join(quote(column) for column in columns),
+                    quote(BackendUser._meta.pk.column),
+                    quote(BackendUser._meta.db_table),
+                    quote(BackendUser._meta.pk.column),
+                    user_ids
+                ),
+                [notification.id, False, True] + list(params)
+            )
+            return cursor.rowcount
+
     def save(self, *args, **kwargs):
         """
         :inherit.
@@ -1173,6 +1749,229 @@ class NotificationLog(models.Model):
         return self.__str__()
 
 
+class PortBitmap(models.Model):
+
+    """
+    Bitmap of the external ports reserved on a server (one bit per port of the port mapping range).
+
+    Reserving ports only needs this single row: free ports are searched from the cursor (the port following
+    the last reservation) on, wrapping around to the start of the range once its end is reached, so freed ports
+    are reused eventually. Mapped ports keep their bit set until the mapping is deleted, quarantined ports
+    (see `ReleasedPort`) until their quarantine is over.
+
+    The row is written with a compare-and-swap on its version, so concurrent reservations cannot hand out
+    the same port on any database. Where supported, the row is locked as well to avoid retries.
+    """
+
+    id = models.AutoField(primary_key=True)
+    server = models.OneToOneField(
+        'Server',
+        related_name='port_bitmap',
+        help_text='The server whose external ports are tracked.'
+    )
+    start_port = models.PositiveIntegerField(
+        help_text='The first port of the range the bitmap covers.'
+    )
+    end_port = models.PositiveIntegerField(
+        help_text='The last port of the range the bitmap covers.'
+    )
+    bitmap = models.BinaryField(
+        help_text='One bit per port of the range, set if the port is reserved.'
+    )
+    cursor = models.PositiveIntegerField(
+        help_text='The port to start searching for free ports at.'
+    )
+    version = models.PositiveIntegerField(
+        default=0,
+        help_text='Incremented on every change, to detect concurrent ones.'
+    )
+
+    @classmethod
+    def build(cls, server):
+        """
+        Build the bitmap of `server` from its port mappings and quarantined ports (not saved).
+
+        :param server: The server to build the bitmap for.
+        """
+        start = settings.CONTAINER_PORT_MAPPINGS_START_PORT
+        end = settings.CONTAINER_PORT_MAPPINGS_END_PORT
+        port_bitmap = cls(server=server, start_port=start, end_port=end, cursor=start)
+        port_bitmap.bits = bytearray((end - start) // 8 + 1)
+        used = set(PortMapping.objects.filter(server=server).values_list('external_port', flat=True))
+        for port in used | ReleasedPort.get_quarantined_ports(server):
+            port_bitmap.set_reserved(port, True)
+        if used and start <= max(used) < end:
+            port_bitmap.cursor = max(used) + 1
+        return port_bitmap
+
+    @classmethod
+    def change(cls, server, function, create=True):
+        """
+        Apply `function` to the bitmap of `server` and save it, retrying if it has been changed concurrently.
+
+        :param server: The server to change the bitmap of.
+        :param function: Callable getting the bitmap, its return value is passed through.
+        :param create: Whether to create the bitmap if it does not exist yet (else `function` is not called).
+        """
+        while True:
+            with transaction.atomic():
+                port_bitmap = cls.objects.select_for_update().filter(server=server).first()
+                if port_bitmap is None and not create:
+                    return None
+                if port_bitmap is None:
+                    port_bitmap, created = cls.objects.get_or_create(
+                        server=server,
+                        defaults=cls.build(server).get_field_values()
+                    )
+                if (port_bitmap.start_port, port_bitmap.end_port) != (
+                        settings.CONTAINER_PORT_MAPPINGS_START_PORT, settings.CONTAINER_PORT_MAPPINGS_END_PORT):
+                    port_bitmap.rebuild()
+                result = function(port_bitmap)
+                if port_bitmap.save_if_unchanged():
+                    return result
+
+    @classmethod
+    def release(cls, server, ports):
+        """
+        Mark the `ports` of `server` as free.
+
+        :param server: The server (or its pk) to release the ports on.
+        :param ports: The ports to release.
+        """
+        def release_ports(port_bitmap):
+            for port in ports:
+                port_bitmap.set_reserved(port, False)
+        cls.change(server, release_ports, create=False)
+
+    @classmethod
+    def reserve(cls, server, count):
+        """
+        Reserve `count` free ports of `server` and return them.
+
+        If the bitmap runs out of free ports, it is rebuilt once, in case ports have been reserved but never mapped
+        (i.e. the transaction creating the mapping failed after reserving on a database without transactions).
+
+        :param server: The server to reserve the ports on.
+        :param count: The number of ports to reserve.
+        """
+        def reserve_ports(port_bitmap):
+            ports = port_bitmap.get_free_ports(count)
+            if len(ports) < count:
+                port_bitmap.rebuild()
+                ports = port_bitmap.get_free_ports(count)
+                if len(ports) < count:
+                    raise ValidationError('Not enough free ports left on server %s.' % server)
+            for port in ports:
+                port_bitmap.set_reserved(port, True)
+            port_bitmap.cursor = ports[-1] + 1 if ports[-1] < port_bitmap.end_port else port_bitmap.start_port
+            return ports
+        return cls.change(server, reserve_ports)
+
+    @property
+    def bits(self):
+        """
+        The bitmap as mutable bytearray.
+        """
+        if not hasattr(self, '_bits'):
+            self._bits = bytearray(self.bitmap)
+        return self._bits
+
+    @bits.setter
+    def bits(self, value):
+        self._bits = value
+
+    def get_field_values(self):
+        """
+        Get the values of the fields describing the bitmap (to create or update its row).
+        """
+        return {
+            'start_port': self.start_port,
+            'end_port': self.end_port,
+            'bitmap': bytes(self.bits),
+            'cursor': self.cursor
+        }
+
+    def get_free_ports(self, count):
+        """
+        Get up to `count` free ports, searching from the cursor on (wrapping around to the start of the range).
+
+        Fully reserved bytes are skipped at once, so the costs depend on the reserved ports following the cursor only.
+
+        :param count: The number of ports to get.
+        """
+        ports = []
+        size = self.end_port - self.start_port + 1
+        index = self.cursor - self.start_port if self.start_port <= self.cursor <= self.end_port else 0
+        visited = 0
+        while visited < size and len(ports) < count:
+            if index % 8 == 0 and self.bits[index // 8] == 0xFF:
+                # all 8 ports of the byte are reserved (the bits after the range's end are never set)
+                index = (index + 8) % size
+                visited += 8
+                continue
+            if not self.bits[index // 8] & (1 << (index % 8)):
+                ports.append(self.start_port + index)
+            index = (index + 1) % size
+            visited += 1
+        return ports
+
+    def is_reserved(self, port):
+        """
+        Check if `port` is reserved.
+
+        :param port: The port to check.
+        """
+        index = port - self.start_port
+        return bool(self.bits[index // 8] & (1 << (index % 8)))
+
+    def rebuild(self):
+        """
+        Rebuild the bitmap from the server's port mappings and quarantined ports (not saved).
+        """
+        for name, value in PortBitmap.build(self.server).get_field_values().items():
+            setattr(self, name, value)
+        self.bits = bytearray(self.bitmap)
+
+    def save_if_unchanged(self):
+        """
+        Save the bitmap unless it has been changed since it has been read.
+
+        :return bool `True` if saved.
+        """
+        if not PortBitmap.objects.filter(pk=self.pk, version=self.version).update(
+                version=self.version + 1, **self.get_field_values()):
+            return False
+        self.version += 1
+        return True
+
+    def set_reserved(self, port, reserved):
+        """
+        Mark `port` as reserved or free (not saved). Ports outside of the range are ignored.
+
+        :param port: The port to mark.
+        :param reserved: Whether the port is reserved.
+        """
+        if not self.start_port <= port <= self.end_port:
+            return
+        index = port - self.start_port
+        if reserved:
+            self.bits[index // 8] |= 1 << (index % 8)
+        else:
+            self.bits[index // 8] &= ~(1 << (index % 8)) & 0xFF
+
+    def __str__(self):
+        """
+        :inherit.
+        """
+        return smart_unicode("%s: %i-%i" % (self.server, self.start_port, self.end_port))
+
+    def __unicode__(self):
+        """
+        :inherit.
+        """
+        return self.__str__()
+
+
 class PortMapping(models.Model):
 
     """
@@ -1205,27 +2004,70 @@ class PortMapping(models.Model):
         if not self.external_port:
             self.external_port = PortMapping.get_available_server_port(self.server)
 
+    @classmethod
+    def create_for_container(cls, container, internal_ports):
+        """
+        Create a port mapping for each of the `internal_ports` of `container`.
+
+        The external ports are reserved in the server's `PortBitmap` within the same transaction
+        the mappings are created in, so concurrent reservations cannot pick the same port.
+
+        :param container: The container to create the port mappings for.
+        :param internal_ports: The container internal ports to map.
+
+        :return list The created port mappings (in the same order as `internal_ports`).
+        """
+        with transaction.atomic():
+            server = container.server
+            ReleasedPort.prune(server)
+            external_ports = cls.get_available_server_ports(server, len(internal_ports))
+            mappings = []
+            for external_port, internal_port in zip(external_ports, internal_ports):
+                mapping = cls(
+                    server=server,
+                    container=container,
+                    external_port=external_port,
+                    internal_port=internal_port
+                )
+                mapping.save()
+                mappings.append(mapping)
+        return mappings
+
     @classmethod
     def get_available_server_port(cls, server):
         """
-        Get a free port safe to use as `external_port` on `server`.
+        Reserve a free port to use as `external_port` on `server`.
 
-        :param server: The server to get a free port of.
+        :param server: The server to reserve a free port of.
         """
-        port = settings.CONTAINER_PORT_MAPPINGS_START_PORT
-        mappings = cls.objects.filter(server=server)
-        if mappings.exists():
-            port = mappings.latest('external_port').external_port + 1
-            # TODO: if reached settings.CONTAINER_PORT_MAPPINGS_END_PORT
-            # start over and look while i+1 for free port.
-            # ServerSelectionAlgorithm must guarantee enough ports are free!
-        return port
+        return cls.get_available_server_ports(server, 1)[0]
+
+    @classmethod
+    def get_available_server_ports(cls, server, count):
+        """
+        Reserve `count` free ports to use as `external_port` on `server` (see `PortBitmap`).
+
+        Ports following the last reserved one are preferred. Once the end of the port range
+        is reached, the search wraps around to reuse ports freed in the meantime
+        (except the ones still quarantined, see `ReleasedPort`).
+
+        The reservation is part of the current transaction, the caller has to create the mappings within it.
+
+        :param server: The server to reserve free ports of.
+        :param count: The number of ports needed.
+        """
+        return PortBitmap.reserve(server, count)
 
     def is_protected_mapping(self):
         """
         Return `True` if this mapping is for the protected container port.
+
+        Clones have no image of their own, so the image of the container they were cloned from is used.
         """
-        return self.internal_port == self.container.image.protected_port
+        image = self.container.image
+        if image is None and self.container.is_clone():
+            image = self.container.clone_of.image
+        return image is not None and self.internal_port == image.protected_port
 
     def __str__(self):
         """
@@ -1246,6 +2088,164 @@ class PortMapping(models.Model):
         )
 
 
+class ReleasedPort(models.Model):
+
+    """
+    External port of a deleted port mapping, kept from being reused while it is quarantined.
+
+    Workspace access tokens grant access to bare 'internal_ip:port' endpoints, so a port must not be
+    mapped to another container as long as a token issued for the previous one may still be valid.
+    The server's internal IP is stored (rather than a reference to the server), because that is what the tokens contain.
+    """
+
+    id = models.AutoField(primary_key=True)
+    internal_ip = models.GenericIPAddressField(
+        db_index=True,
+        help_text='The internal IP of the server the port has been mapped on.'
+    )
+    external_port = models.PositiveIntegerField(
+        help_text='The released external port.'
+    )
+    released_at = models.DateTimeField(
+        default=timezone.now,
+        help_text='The time the port mapping has been deleted.'
+    )
+
+    @classmethod
+    def get_quarantine(cls):
+        """
+        Get the number of seconds released ports are quarantined for.
+
+        That is the workspace access token TTL, or 0 if no tokens are issued.
+        """
+        return settings.WORKSPACE_TOKEN_TTL if settings.WORKSPACE_TOKEN_SECRET else 0
+
+    @classmethod
+    def get_quarantined_ports(cls, server):
+        """
+        Get the set of external ports of `server` that must not be reused yet.
+
+        :param server: The server to get the quarantined ports of.
+        """
+        quarantine = cls.get_quarantine()
+        if not quarantine:
+            return set()
+        return set(cls.objects.filter(
+            internal_ip=server.internal_ip,
+            released_at__gt=timezone.now() - timedelta(seconds=quarantine)
+        ).values_list('external_port', flat=True))
+
+    @classmethod
+    def prune(cls, server):
+        """
+        Delete the released ports of `server` whose quarantine is over and free them in its `PortBitmap`.
+
+        :param server: The server to prune the released ports of.
+        """
+        released = cls.objects.filter(
+            internal_ip=server.internal_ip,
+            released_at__lte=timezone.now() - timedelta(seconds=cls.get_quarantine())
+        )
+        ports = list(released.values_list('external_port', flat=True))
+        if ports:
+            released.filter(external_port__in=ports).delete()
+            PortBitmap.release(server, ports)
+
+    @classmethod
+    def release(cls, mapping):
+        """
+        Quarantine the external port of the deleted port `mapping` (if tokens are issued at all).
+
+        Without quarantine, the port is freed in the server's `PortBitmap` right away,
+        else it stays reserved there until the released port is pruned.
+
+        :param mapping: The deleted port mapping.
+        """
+        if not cls.get_quarantine():
+            PortBitmap.release(mapping.server_id, [mapping.external_port])
+            return
+        internal_ip = Server.objects.filter(pk=mapping.server_id).values_list('internal_ip', flat=True).first()
+        if internal_ip is not None:
+            cls.objects.create(internal_ip=internal_ip, external_port=mapping.external_port)
+
+    def __str__(self):
+        """
+        :inherit.
+        """
+        return smart_unicode("%s:%i" % (self.internal_ip, self.external_port))
+
+    def __unicode__(self):
+        """
+        :inherit.
+        """
+        return self.__str__()
+
+
+class Sequence(models.Model):
+
+    """
+    Named counter shared among all processes (and nodes), i.e. to store cursors or to generate IDs.
+    """
+
+    id = models.AutoField(primary_key=True)
+    name = models.CharField(
+        unique=True,
+        max_length=255,
+        help_text='The unique name identifying this sequence.'
+    )
+    value = models.BigIntegerField(
+        default=0,
+        help_text='The current value of the sequence.'
+    )
+
+    @classmethod
+    def get_for_update(cls, name):
+        """
+        Get the sequence `name` (created if not existing yet), locked until the end of the current transaction.
+
+        Has to be called within a transaction (i.e. `transaction.atomic()`).
+
+        :param name: The name of the sequence.
+        """
+        sequence, created = cls.objects.select_for_update().get_or_create(name=name)
+        return sequence
+
+    @classmethod
+    def reserve(cls, name, count=1, start=None):
+        """
+        Advance the sequence `name` by `count` and return the first of the reserved values.
+
+        :param name: The name of the sequence.
+        :param count: The number of values to reserve.
+        :param start: Callable returning the value to initialize the sequence with, if not existing yet.
+        """
+        with transaction.atomic():
+            sequence = cls.get_for_update(name)
+            if sequence.value == 0 and start is not None:
+                sequence.value = start()
+            cls.objects.filter(id=sequence.id).update(value=sequence.value + count)
+        return sequence.value + 1
+
+    def save(self, *args, **kwargs):
+        """
+        :inherit.
+        """
+        self.full_clean()
+        super(Sequence, self).save(*args, **kwargs)
+
+    def __str__(self):
+        """
+        :inherit.
+        """
+        return smart_unicode("%s: %i" % (self.name, self.value))
+
+    def __unicode__(self):
+        """
+        :inherit.
+        """
+        return self.__str__()
+
+
 class Server(models.Model):
 
     """
@@ -1294,8 +2294,10 @@ class Server(models.Model):
     def get_container_backend(self):
         """
         Get an instance of the container backend this server is using.
+
+        The instance is shared within the process, see `coco.core.helpers.get_container_backend`.
         """
-        return self.container_backend.get_instance(self._get_interpolated_container_backend_args())
+        return get_container_backend(self)
 
     def _get_interpolated_container_backend_args(self):
         """
@@ -1308,13 +2310,31 @@ class Server(models.Model):
                 .replace('%external_ip%', self.external_ip)
         return None
 
+    def get_status(self):
+        """
+        Get the latest (non-stale) health probe status of this server (or `None` if there is none).
+
+        Uses the status prefetched by `ServerStatus.prefetch_latest` if available.
+        """
+        if hasattr(self, 'latest_statuses'):
+            return self.latest_statuses[0] if self.latest_statuses else None
+        return ServerStatus.get_latest().filter(server=self).first()
+
     def is_container_host(self):
         """
         Check if this server is configured as a container host (has a container_backend set).
         """
-        return self.container_backend is not None
+        return self.container_backend_id is not None
     is_container_host.boolean = True
 
+    def is_healthy(self):
+        """
+        Check if the latest health probe of this server succeeded (servers not probed recently are considered healthy).
+        """
+        status = self.get_status()
+        return status is None or status.is_healthy
+    is_healthy.boolean = True
+
     def save(self, *args, **kwargs):
         """
         :inherit.
@@ -1335,6 +2355,113 @@ class Server(models.Model):
         return self.__str__()
 
 
+class ServerStatus(models.Model):
+
+    """
+    Result of a health probe of a container host (see the `probe_servers` management command).
+    """
+
+    id = models.AutoField(primary_key=True)
+    server = models.ForeignKey(
+        'Server',
+        related_name='statuses',
+        help_text='The probed server.'
+    )
+    checked_at = models.DateTimeField(
+        default=timezone.now,
+        db_index=True,
+        help_text='The time the probe was started.'
+    )
+    is_healthy = models.BooleanField(
+        default=True,
+        help_text='Whether the container backend of the server answered the probe.'
+    )
+    latency = models.FloatField(
+        blank=True,
+        null=True,
+        help_text='The number of seconds the container backend took to answer (if it did).'
+    )
+    error = models.CharField(
+        blank=True,
+        default='',
+        max_length=255,
+        help_text='The error the probe failed with (if any).'
+    )
+
+    @classmethod
+    def get_stale_before(cls):
+        """
+        Get the time before which probes are considered outdated.
+        """
+        return timezone.now() - timedelta(seconds=settings.SERVER_STATUS_MAX_AGE)
+
+    @classmethod
+    def get_latest(cls):
+        """
+        Get a queryset of the latest (non-stale) probe of each server.
+
+        The probes are stored in the order they are run, so the latest one of each server is the one with
+        the highest ID, which is selected by an aggregate subquery (i.e. no probe history is loaded).
+        """
+        latest_ids = cls.objects \
+            .filter(checked_at__gte=cls.get_stale_before()) \
+            .order_by() \
+            .values('server_id') \
+            .annotate(latest_id=Max('id')) \
+            .values('latest_id')
+        return cls.objects.filter(id__in=latest_ids)
+
+    @classmethod
+    def get_unhealthy_server_ids(cls):
+        """
+        Get the set of IDs of the servers whose latest (non-stale) probe failed.
+        """
+        return set(cls.get_latest().filter(is_healthy=False).values_list('server_id', flat=True))
+
+    @classmethod
+    def prefetch_latest(cls):
+        """
+        Get the lookup to prefetch the latest (non-stale) probe of servers with (see `Server.get_status`).
+        """
+        return Prefetch('statuses', queryset=cls.get_latest(), to_attr='latest_statuses')
+
+    @classmethod
+    def prune(cls, server, keep):
+        """
+        Delete all but the latest `keep` probes of `server`.
+
+        :param server: The server to prune the probe history of.
+        :param keep: The number of probes to keep.
+        """
+        # probes are added one per run, so only a few are outdated at a time
+        outdated = list(cls.objects.filter(server=server).values_list('id', flat=True)[keep:])
+        if outdated:
+            cls.objects.filter(id__in=outdated).delete()
+
+    def save(self, *args, **kwargs):
+        """
+        :inherit.
+        """
+        self.full_clean()
+        super(ServerStatus, self).save(*args, **kwargs)
+
+    def __str__(self):
+        """
+        :inherit.
+        """
+        return smart_unicode("%s: %s" % (self.server, 'healthy' if self.is_healthy else 'unhealthy'))
+
+    def __unicode__(self):
+        """
+        :inherit.
+        """
+        return self.__str__()
+
+    class Meta:
+        ordering = ['-checked_at', '-id']
+        verbose_name_plural = 'server statuses'
+
+
 class Share(models.Model):
 
     """
@@ -1501,7 +2628,10 @@ class Tag(models.Model):
         return self.__str__()
 
 
+# the allocators are built on the models above, so they are imported last
+from coco.core.allocators import gid_allocator, uid_allocator
+
 # make sure our signal receivers are loaded
-from coco.core.signals import backend_users, backend_groups, \
+from coco.core.signals import backend_users, backend_groups, backends, \
     collaboration_groups, container_images, container_snapshots, containers, \
-    groups, notifications, shares, users
+    groups, jobs, notifications, port_mappings, servers, shares, users
@@ -1,4 +1,5 @@
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 
 """
 Settings related to containers.
@@ -7,6 +8,163 @@ CONTAINER_ACCESS_BASE_URI = '/' + settings.SUBDIRECTORY + 'ct/'
 CONTAINER_PORT_MAPPINGS_START_PORT = 49152
 CONTAINER_PORT_MAPPINGS_END_PORT = 65534
 
+"""
+Settings related to the container state cache.
+
+The alias must reference a cache defined in Django's CACHES setting.
+The TTL (in seconds) limits how long a state is served without asking the container backend.
+"""
+CONTAINER_STATE_CACHE = getattr(settings, 'CONTAINER_STATE_CACHE', 'container_states')
+CONTAINER_STATE_CACHE_TTL = getattr(settings, 'CONTAINER_STATE_CACHE_TTL', 10)
+
+"""
+Settings related to the cache of the users authenticated by API tokens.
+
+The alias must reference a cache defined in Django's CACHES setting, shared among all worker processes
+(so deleted tokens are invalidated everywhere). The TTL (in seconds) limits how long a token is accepted
+without looking it up in the database.
+"""
+API_TOKEN_CACHE = getattr(settings, 'API_TOKEN_CACHE', 'default')
+API_TOKEN_CACHE_TTL = getattr(settings, 'API_TOKEN_CACHE_TTL', 60)
+
+"""
+Settings related to the (cursor based) pagination of the unbounded API lists (i.e. the notification logs).
+
+Clients can ask for other page sizes than the default (up to the maximum) with the `page_size` query parameter.
+"""
+API_PAGE_SIZE = getattr(settings, 'API_PAGE_SIZE', 100)
+API_MAX_PAGE_SIZE = getattr(settings, 'API_MAX_PAGE_SIZE', 1000)
+
+"""
+Settings related to the cache of credential verifications against the user backend.
+
+The alias must reference a cache defined in Django's CACHES setting. The TTLs (in seconds) limit how long
+a successful (or failed) verification is reused, i.e. how long a password changed on the backend is still accepted.
+"""
+CREDENTIAL_CACHE = getattr(settings, 'CREDENTIAL_CACHE', 'default')
+CREDENTIAL_CACHE_TTL = getattr(settings, 'CREDENTIAL_CACHE_TTL', 60)
+CREDENTIAL_CACHE_NEGATIVE_TTL = getattr(settings, 'CREDENTIAL_CACHE_NEGATIVE_TTL', 10)
+
+"""
+Settings related to the pools of connected internal LDAP and user backend instances.
+
+The size limits how many connections per backend a process keeps open at most,
+idle connections older than the max. idle time (in seconds) are re-established before being used
+and the timeout (in seconds) limits how long to wait for a connection if all are in use.
+"""
+BACKEND_CONNECTION_POOL_SIZE = getattr(settings, 'BACKEND_CONNECTION_POOL_SIZE', 10)
+BACKEND_CONNECTION_POOL_MAX_IDLE = getattr(settings, 'BACKEND_CONNECTION_POOL_MAX_IDLE', 300)
+BACKEND_CONNECTION_POOL_TIMEOUT = getattr(settings, 'BACKEND_CONNECTION_POOL_TIMEOUT', 10)
+
+"""
+Settings related to the workspace access index used to answer the reverse proxy's access checks.
+
+The alias must reference a cache defined in Django's CACHES setting, shared among all worker processes
+(it only holds a token telling the processes to rebuild their index).
+The max. age (in seconds) limits how long an index is used before being rebuilt in any case,
+the generation max. age how long a process may take to notice the changes made by others.
+"""
+WORKSPACE_ACCESS_INDEX_CACHE = getattr(settings, 'WORKSPACE_ACCESS_INDEX_CACHE', 'default')
+WORKSPACE_ACCESS_INDEX_MAX_AGE = getattr(settings, 'WORKSPACE_ACCESS_INDEX_MAX_AGE', 60)
+WORKSPACE_ACCESS_INDEX_GENERATION_MAX_AGE = getattr(settings, 'WORKSPACE_ACCESS_INDEX_GENERATION_MAX_AGE', 2)
+
+"""
+Settings related to the workspace access tokens the reverse proxy validates on its own.
+
+The secret has to be shared with the reverse proxy (tokens are not issued if it is not set).
+Anyone knowing it can forge tokens, so placeholders and short secrets are refused on startup.
+The TTL (in seconds) defines how long a token is valid, it is refreshed if it expires within the refresh period.
+"""
+WORKSPACE_TOKEN_SECRET_MIN_LENGTH = 32
+
+
+def validate_workspace_token_secret(secret):
+    """
+    Return `secret` if it is empty (tokens disabled) or usable, raise `ImproperlyConfigured` otherwise.
+
+    :param secret: The workspace token secret to validate.
+    """
+    if secret and (
+        secret.strip().lower() in ('change-me', 'changeme', 'secret')
+        or len(secret.strip()) < WORKSPACE_TOKEN_SECRET_MIN_LENGTH
+    ):
+        raise ImproperlyConfigured(
+            'WORKSPACE_TOKEN_SECRET must be empty (disabled) or a random value of at least %i characters.'
+            % WORKSPACE_TOKEN_SECRET_MIN_LENGTH
+        )
+    return secret
+WORKSPACE_TOKEN_SECRET = validate_workspace_token_secret(getattr(settings, 'WORKSPACE_TOKEN_SECRET', None))
+WORKSPACE_TOKEN_TTL = getattr(settings, 'WORKSPACE_TOKEN_TTL', 43200)
+WORKSPACE_TOKEN_REFRESH = getattr(settings, 'WORKSPACE_TOKEN_REFRESH', 3600)
+
+"""
+Setting storing the min. number of seconds between two writes of the accesses to the same workspace
+(per process, see `coco.core.auth.workspaces.WorkspaceActivityTracker`).
+"""
+WORKSPACE_ACTIVITY_WRITE_INTERVAL = getattr(settings, 'WORKSPACE_ACTIVITY_WRITE_INTERVAL', 60)
+
+"""
+Setting defining if the load-aware server selection algorithm asks the container backends
+for the number of running containers (one backend call per server and container creation).
+"""
+SERVER_SELECTION_LIVE_METRICS = getattr(settings, 'SERVER_SELECTION_LIVE_METRICS', False)
+
+"""
+Setting storing the max. number of concurrent backend calls per server for bulk container actions.
+"""
+CONTAINER_BULK_ACTION_CONCURRENCY = getattr(settings, 'CONTAINER_BULK_ACTION_CONCURRENCY', 4)
+
+"""
+Setting storing the max. number of containers a single bulk container action may address.
+"""
+CONTAINER_BULK_ACTION_MAX_IDS = getattr(settings, 'CONTAINER_BULK_ACTION_MAX_IDS', 100)
+
+"""
+Settings related to the idle container scheduler (see the `suspend_idle_containers` management command).
+
+Containers whose workspace has not been accessed for CONTAINER_IDLE_TIMEOUT seconds (or their image's
+`idle_timeout`) are suspended or stopped, as per CONTAINER_IDLE_ACTION ('suspend' or 'stop').
+A timeout of `None` disables the scheduler for containers of images without their own timeout.
+"""
+CONTAINER_IDLE_TIMEOUT = getattr(settings, 'CONTAINER_IDLE_TIMEOUT', None)
+CONTAINER_IDLE_ACTION = getattr(settings, 'CONTAINER_IDLE_ACTION', 'suspend')
+CONTAINER_IDLE_CHECK_INTERVAL = getattr(settings, 'CONTAINER_IDLE_CHECK_INTERVAL', 300)
+
+"""
+Settings related to the user import (see the `import_users` management command).
+
+New users are imported in batches of USER_IMPORT_BATCH_SIZE, with USER_IMPORT_POOL_SIZE parallel
+internal LDAP connections (and storage operations).
+"""
+USER_IMPORT_BATCH_SIZE = getattr(settings, 'USER_IMPORT_BATCH_SIZE', 500)
+USER_IMPORT_POOL_SIZE = getattr(settings, 'USER_IMPORT_POOL_SIZE', 10)
+
+"""
+Settings related to the job queue (see the `run_jobs` management command).
+
+Container backend operations are executed within the request unless JOBS_ASYNC is enabled, in which case they
+are queued for the `run_jobs` workers (which have to be running, see `lib/confs/uwsgi/coco.ini`).
+Jobs left running by dead workers are re-queued until they have been claimed JOBS_MAX_ATTEMPTS times.
+"""
+JOBS_ASYNC = getattr(settings, 'JOBS_ASYNC', False)
+JOBS_CLAIM_BATCH_SIZE = getattr(settings, 'JOBS_CLAIM_BATCH_SIZE', 50)
+JOBS_MAX_ATTEMPTS = getattr(settings, 'JOBS_MAX_ATTEMPTS', 3)
+JOBS_POLL_INTERVAL = getattr(settings, 'JOBS_POLL_INTERVAL', 1)
+JOBS_WORKERS = getattr(settings, 'JOBS_WORKERS', 2)
+
+"""
+Settings related to the server health prober (see the `probe_servers` management command).
+
+Servers whose latest probe failed are excluded from container placement. Probes older than
+SERVER_STATUS_MAX_AGE seconds are ignored (so a stopped prober does not lock out hosts for good)
+and only the latest SERVER_STATUS_HISTORY_SIZE probes are kept per server.
+"""
+SERVER_HEALTH_PROBE_INTERVAL = getattr(settings, 'SERVER_HEALTH_PROBE_INTERVAL', 30)
+SERVER_HEALTH_PROBE_TIMEOUT = getattr(settings, 'SERVER_HEALTH_PROBE_TIMEOUT', 10)
+SERVER_HEALTH_PROBE_POOL_SIZE = getattr(settings, 'SERVER_HEALTH_PROBE_POOL_SIZE', 10)
+SERVER_STATUS_HISTORY_SIZE = getattr(settings, 'SERVER_STATUS_HISTORY_SIZE', 100)
+SERVER_STATUS_MAX_AGE = getattr(settings, 'SERVER_STATUS_MAX_AGE', 300)
+
 """
 Settings storing the paths (relative to STORAGE_DIR_BASE) under which (user) directories should be created.
 """
@@ -28,3 +186,8 @@ USER_ID_OFFSET = 2500
 Setting storing the group ID offset to be added to internal ldap groups
 """
 GROUP_ID_OFFSET = 5500
+
+"""
+Setting storing the number of user/group IDs each process reserves at once (see `coco.core.allocators`).
+"""
+ID_ALLOCATION_BLOCK_SIZE = getattr(settings, 'ID_ALLOCATION_BLOCK_SIZE', 20)
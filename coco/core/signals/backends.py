@@ -0,0 +1,40 @@
+from coco.core.helpers import invalidate_container_backends
+from coco.core.models import Backend
+from coco.core.signals.signals import backend_created, \
+    backend_deleted, backend_modified
+from django.dispatch import receiver
+from django.db.models.signals import post_delete, post_save
+
+
+@receiver(backend_deleted)
+@receiver(backend_modified)
+def invalidate_container_backend_instances(sender, backend, **kwargs):
+    """
+    Drop the shared container backend instances of the backend, they might be outdated.
+    """
+    if backend is not None and backend.kind == Backend.CONTAINER_BACKEND:
+        invalidate_container_backends(backend_id=backend.id)
+
+
+@receiver(post_delete, sender=Backend)
+def post_delete_handler(sender, instance, **kwargs):
+    """
+    Method to map Django post_delete model signals to custom ones.
+    """
+    backend_deleted.send(sender=sender, backend=instance, kwargs=kwargs)
+
+
+@receiver(post_save, sender=Backend)
+def post_save_handler(sender, instance, **kwargs):
+    """
+    Method to map Django post_save model signals to custom ones.
+    """
+    if 'created' in kwargs and kwargs.get('created'):
+        backend_created.send(sender=sender, backend=instance, kwargs=kwargs)
+    else:
+        backend_modified.send(
+            sender=sender,
+            backend=instance,
+            fields=kwargs.get('update_fields'),
+            kwargs=kwargs
+        )
@@ -72,6 +72,7 @@ def m2m_changed_handler(sender, instance, **kwargs):
     """
     action = kwargs.get('action')
     if isinstance(instance, CollaborationGroup):
+        instance.clear_membership_memo()
         if 'pk_set' in kwargs:  # admins
             # get the user objects
             users = []
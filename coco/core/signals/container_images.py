@@ -1,27 +1,89 @@
 from coco.contract.backends import ContainerBackend
 from coco.contract.errors import ContainerBackendError, ContainerImageNotFoundError
-from coco.core.models import CollaborationGroup, ContainerImage, Server
+from coco.core.jobs import dispatch, get_container_key, get_server_key, handler
+from coco.core.models import CollaborationGroup, ContainerImage, Job, Server
 from coco.core.signals.signals import *
 from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
+import logging
 
 
-@receiver(container_committed)
-def create_image_on_server(sender, container, image, **kwargs):
+logger = logging.getLogger(__name__)
+
+
+@handler(Job.ACTION_COMMIT)
+def commit_container_on_server(job):
     """
-    Create the container image for the committed container on the server.
+    Create the job's container image from the job's container on the server.
     """
-    if container is not None and image is not None:
+    container = job.container
+    image = job.image
+    if image is not None:  # not deleted meanwhile
+        if container is None:
+            image.delete()
+            raise ValueError("The container has been deleted before it could be committed.")
         backend = container.server.get_container_backend()
         try:
             result = backend.create_container_image(container.backend_pk, image.name)
             image.backend_pk = result.get(ContainerBackend.KEY_PK)
             image.save()
+            image.servers.add(container.server)
         except ContainerBackendError as ex:
             image.delete()
             raise ex
 
 
+@receiver(container_committed)
+def create_image_on_server(sender, container, image, **kwargs):
+    """
+    Create the container image for the committed container on the server.
+
+    The commit is queued, the job is available as `image.pending_job` (`None` if already executed).
+    """
+    if container is not None and image is not None:
+        image.pending_job = dispatch(
+            Job.ACTION_COMMIT,
+            key=get_container_key(container),
+            owner=container.owner,
+            container=container,
+            image=image
+        )
+
+
+@handler(Job.ACTION_INDEX)
+def index_image_on_server(job):
+    """
+    Record the job's server as holding the job's image, if its container backend lists the image.
+    """
+    image = job.image
+    server = Server.objects.filter(id=job.get_arguments().get('server')).first()
+    if image is not None and server is not None and server.is_container_host():
+        backend_pks = set(
+            backend_image.get(ContainerBackend.KEY_PK)
+            for backend_image in server.get_container_backend().get_container_images()
+        )
+        if image.backend_pk in backend_pks:
+            image.servers.add(server)
+
+
+@receiver(container_image_created)
+def index_on_servers(sender, image, **kwargs):
+    """
+    Record which servers already hold the new image, so containers can be placed on them.
+
+    Listing the images of a container host is slow (or times out if it is down), so it is queued per server.
+    Images committed from containers (and the internal ones created while cloning) are recorded
+    by the operation creating them, see `create_image_on_server` and `create_container_on_server`.
+    Deleted images disappear from the index on their own (the relation rows are deleted along).
+    """
+    if image is not None and not image.is_internal and getattr(image, 'committed_from', None) is None:
+        for server in Server.objects.filter(container_backend__isnull=False):
+            try:
+                dispatch(Job.ACTION_INDEX, key=get_server_key(server), image=image, server=server.id)
+            except (ContainerBackendError, NotImplementedError) as ex:
+                logger.exception(ex)  # executed right away (queueing disabled), must not fail the image creation
+
+
 @receiver(container_image_deleted)
 def delete_related_notifications(sender, image, **kwargs):
     """
@@ -1,18 +1,20 @@
 from coco.contract.backends import ContainerBackend
 from coco.contract.errors import ContainerBackendError, ContainerSnapshotNotFoundError
-from coco.core.models import ContainerSnapshot
+from coco.core.jobs import dispatch, get_container_key, handler
+from coco.core.models import ContainerSnapshot, Job
 from coco.core.signals.signals import container_snapshot_created, \
     container_snapshot_deleted, container_snapshot_modified, container_snapshot_restored
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 
-@receiver(container_snapshot_created)
-def create_on_server(sender, snapshot, **kwargs):
+@handler(Job.ACTION_SNAPSHOT)
+def create_snapshot_on_server(job):
     """
-    When a snapshot is created, we should do that on the server as well.
+    Create the job's snapshot on the server.
     """
-    if snapshot is not None:
+    snapshot = job.snapshot
+    if snapshot is not None:  # not deleted meanwhile
         backend = snapshot.container.server.get_container_backend()
         try:
             created = backend.create_container_snapshot(
@@ -26,6 +28,23 @@ def create_on_server(sender, snapshot, **kwargs):
             raise ex
 
 
+@receiver(container_snapshot_created)
+def create_on_server(sender, snapshot, **kwargs):
+    """
+    When a snapshot is created, we should do that on the server as well.
+
+    The creation is queued, the job is available as `snapshot.pending_job` (`None` if already executed).
+    """
+    if snapshot is not None:
+        snapshot.pending_job = dispatch(
+            Job.ACTION_SNAPSHOT,
+            key=get_container_key(snapshot.container),
+            owner=snapshot.container.owner,
+            container=snapshot.container,
+            snapshot=snapshot
+        )
+
+
 @receiver(container_snapshot_deleted)
 def delete_on_server(sender, snapshot, **kwargs):
     """
@@ -42,18 +61,37 @@ def delete_on_server(sender, snapshot, **kwargs):
             raise ex
 
 
+@handler(Job.ACTION_RESTORE)
+def restore_snapshot_on_server(job):
+    """
+    Restore the job's snapshot on the container backend.
+    """
+    snapshot = job.snapshot
+    if snapshot is None:
+        raise ValueError("The snapshot has been deleted before it could be restored.")
+    backend = snapshot.container.server.get_container_backend()
+    try:
+        backend.restore_container_snapshot(snapshot.container.backend_pk, snapshot.backend_pk)
+    except ContainerBackendError as ex:
+        # XXX: restore?
+        raise ex
+
+
 @receiver(container_snapshot_restored)
 def restore_on_server(sender, snapshot, **kwargs):
     """
     Restore the restored snapshot on the container backend.
+
+    The restore is queued, the job is available as `snapshot.pending_job` (`None` if already executed).
     """
     if snapshot is not None:
-        backend = snapshot.container.server.get_container_backend()
-        try:
-            backend.restore_container_snapshot(snapshot.container.backend_pk, snapshot.backend_pk)
-        except ContainerBackendError as ex:
-            # XXX: restore?
-            raise ex
+        snapshot.pending_job = dispatch(
+            Job.ACTION_RESTORE,
+            key=get_container_key(snapshot.container),
+            owner=snapshot.container.owner,
+            container=snapshot.container,
+            snapshot=snapshot
+        )
 
 
 @receiver(post_delete, sender=ContainerSnapshot)
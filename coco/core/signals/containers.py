@@ -1,11 +1,16 @@
 from coco.contract.backends import ContainerBackend
 from coco.contract.errors import ContainerBackendError, ContainerNotFoundError
 from coco.core import settings
+from coco.core.auth.workspaces import workspace_access_index
+from coco.core.caches import container_state_cache
 from coco.core.helpers import get_storage_backend
-from coco.core.models import Container, ContainerImage, PortMapping
+from coco.core.jobs import dispatch, get_container_key, handler
+from coco.core.models import Container, ContainerImage, Job, PortMapping, Server
 from coco.core.signals.signals import *
-from django.db.models.signals import post_delete, post_save
+from django.db import DatabaseError
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
+from django.utils import timezone
 from os import path
 import time
 
@@ -27,44 +32,29 @@ def create_container_port_mappings(container):
         image = container.clone_of.image
 
     if image:
-        protected_port = image.protected_port
-        public_ports = image.public_ports
-        if protected_port:
-            mapping = PortMapping(
-                server=container.server,
-                container=container,
-                external_port=PortMapping.get_available_server_port(container.server),
-                internal_port=protected_port
-            )
-            mapping.save()
+        for i, mapping in enumerate(PortMapping.create_for_container(container, image.get_internal_ports())):
+            # the protected port is only reachable through the internal interface
+            if i == 0 and image.protected_port:
+                address = mapping.server.internal_ip
+            else:
+                address = '0.0.0.0'
             ports.append({
-                ContainerBackend.PORT_MAPPING_KEY_ADDRESS: mapping.server.internal_ip,
+                ContainerBackend.PORT_MAPPING_KEY_ADDRESS: address,
                 ContainerBackend.PORT_MAPPING_KEY_EXTERNAL: mapping.external_port,
                 ContainerBackend.PORT_MAPPING_KEY_INTERNAL: mapping.internal_port
             })
-        if public_ports:
-            for port in public_ports.split(','):
-                mapping = PortMapping(
-                    server=container.server,
-                    container=container,
-                    external_port=PortMapping.get_available_server_port(container.server),
-                    internal_port=port
-                )
-                mapping.save()
-                ports.append({
-                    ContainerBackend.PORT_MAPPING_KEY_ADDRESS: '0.0.0.0',
-                    ContainerBackend.PORT_MAPPING_KEY_EXTERNAL: mapping.external_port,
-                    ContainerBackend.PORT_MAPPING_KEY_INTERNAL: mapping.internal_port
-                })
     return ports
 
 
-@receiver(container_created)
-def create_on_server(sender, container, **kwargs):
+@handler(Job.ACTION_CLONE, Job.ACTION_CREATE)
+def create_container_on_server(job):
     """
-    Create the newly saved container on the server's container backend.
+    Create the job's container on the server's container backend.
     """
-    if container is not None:
+    container = job.container
+    if container is not None:  # not deleted meanwhile
+        # left over by a previous attempt (see `jobs.recover`)
+        container.port_mappings.all().delete()
         ports = create_container_port_mappings(container)
         clone_of = None
         cmd = None
@@ -77,9 +67,10 @@ def create_on_server(sender, container, **kwargs):
             if container.clone_of.is_image_based():
                 cmd = container.clone_of.image.command
 
+        backend = container.server.get_container_backend()
         result = None
         try:
-            result = container.server.get_container_backend().create_container(
+            result = backend.create_container(
                 container.owner.backend_pk,
                 container.owner.backend_id,
                 container.name,
@@ -127,7 +118,31 @@ def create_on_server(sender, container, **kwargs):
             )
             image.save()
             container.image = image
-        container.save()
+        try:
+            container.save(update_fields=['backend_pk', 'image'])
+        except DatabaseError:
+            # deleted while being created, so its deletion did not know the backend PK (see `lock_backend_pk`)
+            backend.delete_container(container.backend_pk)
+            return
+        # the server holds the image now (if it had to be pulled or has just been created)
+        if container.image is not None:
+            container.image.servers.add(container.server)
+
+
+@receiver(container_created)
+def create_on_server(sender, container, **kwargs):
+    """
+    Create the newly saved container on the server's container backend.
+
+    The creation is queued, the job is available as `container.pending_job` (`None` if already executed).
+    """
+    if container is not None:
+        container.pending_job = dispatch(
+            Job.ACTION_CLONE if container.is_clone() else Job.ACTION_CREATE,
+            key=get_container_key(container),
+            owner=container.owner,
+            container=container
+        )
 
 
 @receiver(container_deleted)
@@ -139,14 +154,16 @@ def delete_related_notifications(sender, container, **kwargs):
         container.related_notifications.all().delete()
 
 
-@receiver(container_deleted)
-def delete_on_server(sender, container, **kwargs):
+@handler(Job.ACTION_DELETE)
+def delete_container_on_server(job):
     """
-    Delete the destroyed container on the container_backend.
+    Delete the job's (already destroyed) container on the container_backend.
     """
-    if container is not None:
+    arguments = job.get_arguments()
+    server = Server.objects.filter(id=arguments.get('server')).first()
+    if server is not None and server.is_container_host():
         try:
-            container.server.get_container_backend().delete_container(container.backend_pk)
+            server.get_container_backend().delete_container(arguments.get('backend_pk'))
             # cleanup internal images
             # if container.is_image_based() and container.image.is_internal and not container.has_clones():
             #     if not Container.objects.filter(image=container.image).exists():
@@ -158,6 +175,41 @@ def delete_on_server(sender, container, **kwargs):
             raise ex
 
 
+@receiver(pre_delete, sender=Container)
+def lock_backend_pk(sender, instance, **kwargs):
+    """
+    Reload the backend PK of the container about to be deleted, locking its row until the deletion is committed.
+
+    So a creation job finishing meanwhile either stored the backend PK already (and the deletion job gets it)
+    or fails to store it and deletes the backend container on its own.
+    """
+    instance.backend_pk = Container.objects.select_for_update() \
+        .filter(id=instance.id) \
+        .values_list('backend_pk', flat=True) \
+        .first() or ''
+
+
+@receiver(container_deleted)
+def delete_on_server(sender, container, **kwargs):
+    """
+    Delete the destroyed container on the container_backend.
+
+    The deletion is queued, the job is available as `container.pending_job` (`None` if already executed).
+    The container's row is gone already, so the job is owned by the user who deleted it
+    (`container.deleted_by`, if set) rather than the container's owner, which might be deleted along.
+    Containers that have not been created on the backend yet have nothing to delete there
+    (their pending creation job is skipped, as its container is gone).
+    """
+    if container is not None and container.is_created():
+        container.pending_job = dispatch(
+            Job.ACTION_DELETE,
+            key=get_container_key(container),
+            owner=getattr(container, 'deleted_by', None),
+            server=container.server_id,
+            backend_pk=container.backend_pk
+        )
+
+
 @receiver(container_restarted)
 def restart_on_server(sender, container, **kwargs):
     """
@@ -218,6 +270,50 @@ def suspend_on_server(sender, container, **kwargs):
             raise ex
 
 
+@receiver([
+    container_deleted,
+    container_restarted,
+    container_resumed,
+    container_started,
+    container_stopped,
+    container_suspended
+])
+def invalidate_cached_state(sender, container, **kwargs):
+    """
+    Drop the cached backend status of the container, as it has just been changed.
+
+    Has to be connected after the receivers doing the actual work on the container backend.
+    """
+    if container is not None:
+        container_state_cache.invalidate(container)
+        if hasattr(container, '_backend_status'):
+            del container._backend_status
+
+
+@receiver([
+    container_restarted,
+    container_resumed,
+    container_started
+])
+def reset_last_accessed(sender, container, **kwargs):
+    """
+    A (re)started container must not be considered idle right away.
+    """
+    if container is not None:
+        container.last_accessed = timezone.now()
+        # no save(), as the other fields might be outdated
+        Container.objects.filter(id=container.id).update(last_accessed=container.last_accessed)
+
+
+@receiver(container_modified)
+def invalidate_workspace_access_index(sender, container, **kwargs):
+    """
+    The workspace access index contains the containers' owners, which might have changed.
+    """
+    if container is not None:
+        workspace_access_index.invalidate()
+
+
 @receiver(post_delete, sender=Container)
 def post_delete_handler(sender, instance, **kwargs):
     """
@@ -101,6 +101,8 @@ def m2m_changed_handler(sender, instance, **kwargs):
     Method to map Django m2m_changed model signals to custom ones.
     """
     action = kwargs.get('action')
+    if isinstance(instance, CollaborationGroup):
+        instance.clear_membership_memo()
     if isinstance(instance, Group):
         if 'pk_set' in kwargs:  # group members
             # get the user objects
@@ -0,0 +1,28 @@
+from coco.core.models import Job
+from coco.core.signals.signals import job_created, job_deleted, job_modified
+from django.dispatch import receiver
+from django.db.models.signals import post_delete, post_save
+
+
+@receiver(post_delete, sender=Job)
+def post_delete_handler(sender, instance, **kwargs):
+    """
+    Method to map Django post_delete model signals to custom ones.
+    """
+    job_deleted.send(sender=sender, job=instance, kwargs=kwargs)
+
+
+@receiver(post_save, sender=Job)
+def post_save_handler(sender, instance, **kwargs):
+    """
+    Method to map Django post_save model signals to custom ones.
+    """
+    if 'created' in kwargs and kwargs.get('created'):
+        job_created.send(sender=sender, job=instance, kwargs=kwargs)
+    else:
+        job_modified.send(
+            sender=sender,
+            job=instance,
+            fields=kwargs.get('update_fields'),
+            kwargs=kwargs
+        )
@@ -1,10 +1,38 @@
-from coco.core.models import CollaborationGroup, Notification, \
+from coco.core.models import CollaborationGroup, Job, Notification, \
     NotificationLog
 from coco.core.signals.signals import *
 from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 
 
+@receiver(job_finished)
+def create_job_finished_notification(sender, job, **kwargs):
+    """
+    Notify the user who requested a job about its outcome (through his single user group).
+    """
+    if job is not None and job.owner is not None:
+        group = CollaborationGroup.objects.filter(pk=job.owner.primary_group.django_group_id).first()
+        if group is not None:
+            if job.status == Job.STATUS_SUCCEEDED:
+                message = 'Job #%i (%s) succeeded.' % (job.id, job.get_action_display())
+            else:
+                message = 'Job #%i (%s) failed: %s' % (job.id, job.get_action_display(), job.error)
+            if job.image is not None:
+                notification_type = Notification.CONTAINER_IMAGE
+            elif job.container is not None:
+                notification_type = Notification.CONTAINER
+            else:
+                notification_type = Notification.MISCELLANEOUS
+            notification = Notification(
+                message=message,
+                notification_type=notification_type,
+                container=job.container,
+                container_image=job.image
+            )
+            notification.save()
+            notification.receiver_groups.add(group)
+
+
 @receiver(collaboration_group_member_added)
 def create_member_added_group_notification(sender, group, user, **kwargs):
     """
@@ -97,9 +125,7 @@ def create_notificationlogs_for_receivers(sender, notification, group, **kwargs)
     Create NotificationLog records for every user in the receiving group.
     """
     if notification:
-        for user in group.get_members():
-            log = NotificationLog(notification=notification, user=user)
-            log.save()
+        NotificationLog.create_for_group(notification, group)
 
 
 @receiver(collaboration_group_member_removed)
@@ -0,0 +1,50 @@
+from coco.core.auth.workspaces import workspace_access_index
+from coco.core.models import PortMapping, ReleasedPort
+from coco.core.signals.signals import port_mapping_created, \
+    port_mapping_deleted, port_mapping_modified
+from django.dispatch import receiver
+from django.db.models.signals import post_delete, post_save
+
+
+@receiver(port_mapping_created)
+@receiver(port_mapping_deleted)
+@receiver(port_mapping_modified)
+def invalidate_workspace_access_index(sender, mapping, **kwargs):
+    """
+    Port mappings define which workspaces exist, so the workspace access index is outdated.
+    """
+    if mapping is not None:
+        workspace_access_index.invalidate()
+
+
+@receiver(port_mapping_deleted)
+def quarantine_external_port(sender, mapping, **kwargs):
+    """
+    Workspace access tokens might still grant access to the port, so it must not be reused right away.
+    """
+    if mapping is not None:
+        ReleasedPort.release(mapping)
+
+
+@receiver(post_delete, sender=PortMapping)
+def post_delete_handler(sender, instance, **kwargs):
+    """
+    Method to map Django post_delete model signals to custom ones.
+    """
+    port_mapping_deleted.send(sender=sender, mapping=instance, kwargs=kwargs)
+
+
+@receiver(post_save, sender=PortMapping)
+def post_save_handler(sender, instance, **kwargs):
+    """
+    Method to map Django post_save model signals to custom ones.
+    """
+    if 'created' in kwargs and kwargs.get('created'):
+        port_mapping_created.send(sender=sender, mapping=instance, kwargs=kwargs)
+    else:
+        port_mapping_modified.send(
+            sender=sender,
+            mapping=instance,
+            fields=kwargs.get('update_fields'),
+            kwargs=kwargs
+        )
@@ -0,0 +1,51 @@
+from coco.core.auth.workspaces import workspace_access_index
+from coco.core.helpers import invalidate_container_backends
+from coco.core.models import Server
+from coco.core.signals.signals import server_created, \
+    server_deleted, server_modified
+from django.dispatch import receiver
+from django.db.models.signals import post_delete, post_save
+
+
+@receiver(server_deleted)
+@receiver(server_modified)
+def invalidate_container_backend_instances(sender, server, **kwargs):
+    """
+    Drop the shared container backend instances of the server, they might be outdated.
+    """
+    if server is not None:
+        invalidate_container_backends(server_id=server.id)
+
+
+@receiver(server_deleted)
+@receiver(server_modified)
+def invalidate_workspace_access_index(sender, server, **kwargs):
+    """
+    The workspace access index is keyed by the servers' internal IP, which might have changed.
+    """
+    if server is not None:
+        workspace_access_index.invalidate()
+
+
+@receiver(post_delete, sender=Server)
+def post_delete_handler(sender, instance, **kwargs):
+    """
+    Method to map Django post_delete model signals to custom ones.
+    """
+    server_deleted.send(sender=sender, server=instance, kwargs=kwargs)
+
+
+@receiver(post_save, sender=Server)
+def post_save_handler(sender, instance, **kwargs):
+    """
+    Method to map Django post_save model signals to custom ones.
+    """
+    if 'created' in kwargs and kwargs.get('created'):
+        server_created.send(sender=sender, server=instance, kwargs=kwargs)
+    else:
+        server_modified.send(
+            sender=sender,
+            server=instance,
+            fields=kwargs.get('update_fields'),
+            kwargs=kwargs
+        )
@@ -1,6 +1,14 @@
 from django.dispatch import Signal
 
 
+"""
+Set of signals to be triggered for `Backend` model events.
+"""
+backend_created = Signal(providing_args=['backend'])
+backend_deleted = Signal(providing_args=['backend'])
+backend_modified = Signal(providing_args=['backend', 'fields'])
+
+
 """
 Set of signals to be triggered for `BackendUser` model events.
 """
@@ -78,6 +86,15 @@ group_member_removed = Signal(providing_args=['group', 'user'])
 group_modified = Signal(providing_args=['group', 'fields'])
 
 
+"""
+Set of signals to be triggered for `Job` model events.
+"""
+job_created = Signal(providing_args=['job'])
+job_deleted = Signal(providing_args=['job'])
+job_finished = Signal(providing_args=['job'])
+job_modified = Signal(providing_args=['job', 'fields'])
+
+
 """
 Set of signals to be triggered for `Notification` model events.
 """
@@ -87,6 +104,22 @@ notification_receiver_group_added = Signal(providing_args=['notification', 'grou
 notification_receiver_group_removed = Signal(providing_args=['notification', 'group'])
 
 
+"""
+Set of signals to be triggered for `PortMapping` model events.
+"""
+port_mapping_created = Signal(providing_args=['mapping'])
+port_mapping_deleted = Signal(providing_args=['mapping'])
+port_mapping_modified = Signal(providing_args=['mapping', 'fields'])
+
+
+"""
+Set of signals to be triggered for `Server` model events.
+"""
+server_created = Signal(providing_args=['server'])
+server_deleted = Signal(providing_args=['server'])
+server_modified = Signal(providing_args=['server', 'fields'])
+
+
 """
 Set of signals to be triggered for `Share` model events.
 """
@@ -1,9 +1,29 @@
+from coco.core.caches import api_token_cache
 from coco.core.models import BackendUser
 from coco.core.signals.signals import backend_user_modified, \
     user_created, user_deleted, user_modified
 from django.contrib.auth.models import User
 from django.dispatch import receiver
 from django.db.models.signals import post_delete, post_save
+from rest_framework.authtoken.models import Token
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_api_token(sender, instance, **kwargs):
+    """
+    Deleted API tokens must not be accepted from the cache anymore.
+    """
+    if instance is not None:
+        api_token_cache.invalidate(instance.key)
+
+
+@receiver(user_modified)
+def invalidate_api_tokens(sender, user, fields, **kwargs):
+    """
+    Remove the cached copies of a changed user (i.e. deactivated), unless only the last login has been updated.
+    """
+    if user is not None and fields != frozenset(['last_login']):
+        api_token_cache.invalidate_many(Token.objects.filter(user=user).values_list('key', flat=True))
 
 
 @receiver(user_modified)
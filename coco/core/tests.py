@@ -1,3 +1,1216 @@
-from django.test import TestCase
+from coco.api.authentication import CachedTokenAuthentication
+from coco.contract.backends import ContainerBackend, GroupBackend, UserBackend
+from coco.contract.errors import UserBackendError
+from coco.core import jobs, settings
+from coco.core.algorithms.server_selection import ImageLocality, \
+    LeastLoaded, RoundRobin
+from coco.core.allocators import IdAllocator, get_highest_used_gid
+from coco.core.auth.authentication_backends import BackendProxyAuthentication
+from coco.core.auth.checks import COOKIE_NAME, URI_HEADER, has_workspace_access
+from coco.core.auth.middleware import WorkspaceAuthMiddleware
+from coco.core.auth.tokens import create_token, encode_endpoint, \
+    parse_token, validate_token
+from coco.core.auth.workspaces import WorkspaceAccessIndex, WorkspaceActivityTracker
+from coco.core.caches import container_state_cache, credential_cache
+from coco.core.management.commands import import_users as import_users_command
+from coco.core.management.commands.import_users import create_django_users, \
+    get_last_import, import_users, split
+from coco.core.management.commands.suspend_idle_containers import get_idle_containers
+from coco.core.models import Backend, BackendGroup, BackendUser, \
+    CollaborationGroup, Container, ContainerImage, Job, Notification, \
+    NotificationLog, PortBitmap, PortMapping, ReleasedPort, Server, ServerStatus, \
+    Share, Tag
+from coco.web.views.accounts import remove_cookie
+from datetime import timedelta
+from django.contrib.auth.models import Group, User
+from django.core import signing
+from django.core.exceptions import ImproperlyConfigured, PermissionDenied, \
+    ValidationError
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, \
+    TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from multiprocessing.pool import ThreadPool
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+import time
 
-# Create your tests here.
+
+"""
+Workspace token secret used by the tests (long enough to pass the validation).
+"""
+TOKEN_SECRET = '6f1c3e2a9b8d4f70a5e2c1d3b4a69788'
+
+
+def get_api_url(path):
+    """
+    Get the URL of the API endpoint `path`.
+
+    Some API endpoints share their names with pages of the web interface, so they cannot be reversed by name.
+
+    :param path: The path relative to the API root (e.g. 'containers').
+    """
+    return reverse('api_root') + path
+
+
+class override_app_settings(object):
+
+    """
+    Like Django's `override_settings`, but for the app settings (`coco.core.settings`).
+
+    The app settings are read from the Django settings on import, so `override_settings` does not affect them.
+    Usable as context manager or via `enable`/`disable` (i.e. in `setUp`/`tearDown`).
+    Overridden workspace token secrets are validated as on startup.
+    """
+
+    def __init__(self, **values):
+        self.values = values
+        self.originals = {}
+
+    def enable(self):
+        if 'WORKSPACE_TOKEN_SECRET' in self.values:
+            settings.validate_workspace_token_secret(self.values['WORKSPACE_TOKEN_SECRET'])
+        for name, value in self.values.items():
+            self.originals[name] = getattr(settings, name)
+            setattr(settings, name, value)
+
+    def disable(self):
+        for name, value in self.originals.items():
+            setattr(settings, name, value)
+        self.originals = {}
+
+    def __enter__(self):
+        self.enable()
+
+    def __exit__(self, *args):
+        self.disable()
+
+
+class GroupMembersMixin(object):
+
+    """
+    Mixin providing helpers to create groups with many members.
+    """
+
+    def create_group_with_members(self, name, count):
+        """
+        Create a collaboration group with `count` members.
+
+        The users are bulk created, so no signals (and therefore no backend operations) are triggered.
+
+        :param name: The name of the group (also used as prefix for the members' names).
+        :param count: The number of members to create.
+        """
+        prefix = '%s_' % name
+        names = ['%s%s' % (prefix, i) for i in range(count)]
+        Group.objects.bulk_create([Group(name=username) for username in names])
+        groups = Group.objects.filter(name__startswith=prefix).order_by('name')
+        BackendGroup.objects.bulk_create([
+            BackendGroup(django_group=group, backend_id=group.id, backend_pk=group.name)
+            for group in groups
+        ])
+        User.objects.bulk_create([User(username=username) for username in names])
+        users = User.objects.filter(username__startswith=prefix).order_by('username')
+        backend_groups = BackendGroup.objects.filter(backend_pk__startswith=prefix).order_by('backend_pk')
+        BackendUser.objects.bulk_create([
+            BackendUser(django_user=user, backend_id=user.id, backend_pk=user.username, primary_group=group)
+            for user, group in zip(users, backend_groups)
+        ])
+        collaboration_group = CollaborationGroup(name=name)
+        collaboration_group.save()
+        User.groups.through.objects.bulk_create([
+            User.groups.through(user=user, group_id=collaboration_group.id) for user in users
+        ])
+        return collaboration_group
+
+
+class ContainersMixin(GroupMembersMixin):
+
+    """
+    Mixin providing helpers to create many containers.
+    """
+
+    def create_containers(self, count):
+        """
+        Create a server with `count` containers on it.
+
+        The containers are bulk created, so no signals (and therefore no backend operations) are triggered.
+
+        :param count: The number of containers to create.
+        """
+        owner = self.create_group_with_members('owners', 1).get_users()[0]
+        backend = Backend(module='coco.backends.container_backends', klass='Dummy')
+        backend.save()
+        server = Server(name='server', internal_ip='10.0.0.1', external_ip='192.168.0.1', container_backend=backend)
+        server.save()
+        Container.objects.bulk_create([
+            Container(name='c%i' % i, backend_pk=str(i), server=server, owner=owner) for i in range(count)
+        ])
+        return server, list(Container.objects.filter(server=server))
+
+
+class NotificationLogFanOutTest(GroupMembersMixin, TestCase):
+
+    """
+    Tests (and benchmarks) the creation of notification logs for the receiving groups' members.
+    """
+
+    def notify(self, group):
+        """
+        Send a new notification to `group` and return the number of queries needed.
+
+        :param group: The group to notify.
+        """
+        notification = Notification(message='Test', notification_type=Notification.MISCELLANEOUS)
+        notification.save()
+        with CaptureQueriesContext(connection) as queries:
+            notification.receiver_groups.add(group)
+        return notification, len(queries)
+
+    def test_number_of_queries_does_not_depend_on_group_size(self):
+        """
+        The number of queries must stay the same, no matter how many members a group has.
+        """
+        results = []
+        for size in (10, 100, 1000):
+            group = self.create_group_with_members('group%s' % size, size)
+            notification, queries = self.notify(group)
+            self.assertEqual(NotificationLog.objects.filter(notification=notification).count(), size)
+            results.append(queries)
+        self.assertEqual(len(set(results)), 1, 'Queries per group size (10, 100, 1000): %s' % results)
+
+    def test_members_of_multiple_receiver_groups_get_one_log(self):
+        """
+        Users being a member of multiple receiving groups must only get one log record.
+        """
+        group = self.create_group_with_members('first', 10)
+        other = self.create_group_with_members('second', 5)
+        User.groups.through.objects.bulk_create([
+            User.groups.through(user_id=user.django_user_id, group_id=other.id)
+            for user in group.get_members_queryset()
+        ])
+        notification, queries = self.notify(group)
+        notification.receiver_groups.add(other)
+        self.assertEqual(NotificationLog.objects.filter(notification=notification).count(), 15)
+
+
+class CollaborationGroupMembershipTest(GroupMembersMixin, TestCase):
+
+    """
+    Tests the membership checks of collaboration groups are done at query level.
+    """
+
+    def test_membership_checks_need_one_query(self):
+        """
+        Membership checks must need a single query (independent of the group size) and be remembered.
+        """
+        group = self.create_group_with_members('members', 100)
+        user = group.get_users()[-1]
+        with self.assertNumQueries(1):
+            self.assertTrue(group.is_member(user))
+        with self.assertNumQueries(0):
+            self.assertTrue(group.has_access(user))
+        with self.assertNumQueries(1):
+            self.assertEqual(group.get_member_count(), 100)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(group.get_users()), 100)
+
+    def test_membership_memo_is_cleared_on_change(self):
+        """
+        Remembered membership checks must be forgotten if the members change.
+        """
+        group = self.create_group_with_members('members', 10)
+        other = self.create_group_with_members('others', 1)
+        user = other.get_users()[0]
+        self.assertFalse(group.is_user(user))
+        group.user_set.add(user.django_user)
+        self.assertTrue(group.is_user(user))
+        self.assertTrue(group.is_member(user))
+
+
+class WorkspaceAccessTest(ContainersMixin, TestCase):
+
+    """
+    Tests the workspace access checks answered from the in-memory index.
+    """
+
+    def setUp(self):
+        self.server, self.containers = self.create_containers(2)
+        for i, container in enumerate(self.containers):
+            PortMapping(server=self.server, container=container, external_port=50000 + i, internal_port=80).save()
+        self.owner = self.containers[0].owner.django_user.get_username()
+
+    def create_check_request(self, username, port, path='/_workspace_auth_check'):
+        """
+        Create a request as sent by the reverse proxy to check the access to a workspace.
+
+        :param username: The username in the signed cookie (`None` for no cookie).
+        :param port: The external port of the requested workspace.
+        :param path: The path of the request.
+        """
+        request = RequestFactory().get(path, **{
+            URI_HEADER: '/ct/%s/' % ('%s:%i' % (self.server.internal_ip, port)).encode('hex')
+        })
+        if username is not None:
+            request.COOKIES[COOKIE_NAME] = signing.get_cookie_signer(salt=COOKIE_NAME).sign(username)
+        return request
+
+    def test_index_is_answered_from_memory(self):
+        index = WorkspaceAccessIndex('default', 60, 60)
+        self.assertEqual(index.get_owner(self.server.internal_ip, 50000), self.owner)
+        with self.assertNumQueries(0):
+            self.assertEqual(index.get_owner(self.server.internal_ip, '50001'), self.owner)
+            self.assertIsNone(index.get_owner(self.server.internal_ip, 50002))
+            self.assertEqual(
+                index.get_endpoints(self.owner),
+                frozenset([(self.server.internal_ip, 50000), (self.server.internal_ip, 50001)])
+            )
+
+    def test_invalidations_are_noticed_after_the_generation_max_age(self):
+        index, other, lagging = [WorkspaceAccessIndex('default', 60, max_age) for max_age in [60, 0, 60]]
+        for instance in [index, other, lagging]:
+            instance.get_owner(self.server.internal_ip, 50000)
+        PortMapping.objects.filter(external_port=50000).delete()
+        index.invalidate()
+        self.assertIsNone(other.get_owner(self.server.internal_ip, 50000))
+        self.assertEqual(lagging.get_owner(self.server.internal_ip, 50000), self.owner)
+
+    def test_only_the_owner_has_access(self):
+        self.assertTrue(has_workspace_access(self.create_check_request(self.owner, 50000)))
+        self.assertFalse(has_workspace_access(self.create_check_request('other', 50000)))
+        self.assertFalse(has_workspace_access(self.create_check_request(None, 50000)))
+        self.assertFalse(has_workspace_access(self.create_check_request(self.owner, 50002)))
+
+    def test_middleware_answers_the_checks_only(self):
+        middleware = WorkspaceAuthMiddleware()
+        self.assertEqual(middleware.process_request(self.create_check_request(self.owner, 50000)).status_code, 200)
+        self.assertEqual(middleware.process_request(self.create_check_request('other', 50000)).status_code, 403)
+        self.assertIsNone(middleware.process_request(self.create_check_request(self.owner, 50000, '/containers/')))
+
+
+class WorkspaceTokenTest(SimpleTestCase):
+
+    """
+    Tests the workspace access tokens validated by the reverse proxy.
+    """
+
+    def setUp(self):
+        self.secret = override_app_settings(WORKSPACE_TOKEN_SECRET=TOKEN_SECRET)
+        self.secret.enable()
+
+    def tearDown(self):
+        self.secret.disable()
+
+    def test_token_grants_access_to_its_endpoints_only(self):
+        token = create_token(1, [('10.0.0.1', 49153), ('10.0.0.2', 49160)])
+        self.assertTrue(validate_token(token, encode_endpoint('10.0.0.1', 49153)))
+        self.assertTrue(validate_token(token, encode_endpoint('10.0.0.2', 49160).upper()))
+        self.assertFalse(validate_token(token, encode_endpoint('10.0.0.1', 49160)))
+        self.assertEqual(parse_token(token)[0], 1)
+
+    def test_tampered_or_expired_tokens_are_rejected(self):
+        endpoint = encode_endpoint('10.0.0.1', 49153)
+        token = create_token(1, [('10.0.0.1', 49154)])
+        payload, signature = token.rsplit('.', 1)
+        self.assertFalse(validate_token('%s-%s.%s' % (payload, endpoint, signature), endpoint))
+        self.assertFalse(validate_token(create_token(1, [('10.0.0.1', 49153)], int(time.time()) - 1), endpoint))
+        self.assertFalse(validate_token('garbage', endpoint))
+        token = create_token(1, [('10.0.0.1', 49153)])
+        with override_app_settings(WORKSPACE_TOKEN_SECRET=TOKEN_SECRET[::-1]):
+            self.assertFalse(validate_token(token, endpoint))
+
+    def test_weak_secrets_are_refused(self):
+        for secret in ['secret', 'Change-Me', 'a' * 31, ' ' * 32, 'changeme' + ' ' * 32]:
+            with self.assertRaises(ImproperlyConfigured):
+                settings.validate_workspace_token_secret(secret)
+            with self.assertRaises(ImproperlyConfigured):
+                override_app_settings(WORKSPACE_TOKEN_SECRET=secret).enable()
+        for secret in [None, '', TOKEN_SECRET]:  # empty disables the tokens
+            self.assertEqual(settings.validate_workspace_token_secret(secret), secret)
+
+
+class PortMappingAllocationTest(ContainersMixin, TestCase):
+
+    """
+    Tests the allocation of external ports for port mappings.
+    """
+
+    def setUp(self):
+        self.port_range = override_app_settings(
+            CONTAINER_PORT_MAPPINGS_START_PORT=50000,
+            CONTAINER_PORT_MAPPINGS_END_PORT=50003
+        )
+        self.port_range.enable()
+
+    def tearDown(self):
+        self.port_range.disable()
+
+    def test_freed_ports_are_reused_after_wrap_around(self):
+        server, containers = self.create_containers(3)
+        mappings = PortMapping.create_for_container(containers[0], [80, 443, 8888])
+        self.assertEqual([mapping.external_port for mapping in mappings], [50000, 50001, 50002])
+        mappings[0].delete()
+        mappings = PortMapping.create_for_container(containers[1], [80, 443])
+        self.assertEqual([mapping.external_port for mapping in mappings], [50003, 50000])
+        with self.assertRaises(ValidationError):
+            PortMapping.create_for_container(containers[2], [80])
+
+    def test_released_ports_are_quarantined_while_tokens_are_issued(self):
+        with override_app_settings(WORKSPACE_TOKEN_SECRET=TOKEN_SECRET):
+            server, containers = self.create_containers(2)
+            mappings = PortMapping.create_for_container(containers[0], [80, 443, 8888, 8889])
+            mappings[0].delete()
+            with self.assertRaises(ValidationError):
+                PortMapping.create_for_container(containers[1], [80])
+            ReleasedPort.objects.update(released_at=timezone.now() - timedelta(seconds=settings.WORKSPACE_TOKEN_TTL))
+            mappings = PortMapping.create_for_container(containers[1], [80])
+            self.assertEqual(mappings[0].external_port, 50000)
+            self.assertFalse(ReleasedPort.objects.exists())
+
+    def test_concurrent_reservations_are_retried(self):
+        server, containers = self.create_containers(1)
+        seen = []
+
+        def reserve_racing(port_bitmap):
+            if not seen:
+                # another reservation is saved after this one has read the bitmap
+                seen.append(PortBitmap.reserve(server, 1)[0])
+            port = port_bitmap.get_free_ports(1)[0]
+            port_bitmap.set_reserved(port, True)
+            seen.append(port)
+            return port
+
+        port = PortBitmap.change(server, reserve_racing)
+        self.assertEqual(seen, [50000, 50000, 50001])  # the stale attempt picked the same port and was not saved
+        self.assertEqual(port, 50001)
+        port_bitmap = PortBitmap.objects.get(server=server)
+        self.assertTrue(port_bitmap.is_reserved(50000) and port_bitmap.is_reserved(50001))
+
+    def test_reservations_do_not_depend_on_the_ports_in_use(self):
+        with override_app_settings(CONTAINER_PORT_MAPPINGS_END_PORT=52000):
+            server, containers = self.create_containers(1)
+            PortBitmap.reserve(server, 10)
+            with CaptureQueriesContext(connection) as queries:
+                PortBitmap.reserve(server, 1)
+            PortBitmap.reserve(server, 1000)
+            with self.assertNumQueries(len(queries)):
+                self.assertEqual(PortBitmap.reserve(server, 1), [51011])
+
+    def test_mappings_of_clones_use_the_original_image(self):
+        server, containers = self.create_containers(2)
+        ContainerImage.objects.bulk_create([
+            ContainerImage(name='image', backend_pk='image', owner=containers[0].owner.django_user, protected_port=80)
+        ])
+        Container.objects.filter(id=containers[0].id).update(image=ContainerImage.objects.get(backend_pk='image'))
+        Container.objects.filter(id=containers[1].id).update(clone_of=containers[0])
+        clone = Container.objects.get(id=containers[1].id)
+        self.assertTrue(PortMapping(container=clone, internal_port=80).is_protected_mapping())
+        self.assertFalse(PortMapping(container=clone, internal_port=22).is_protected_mapping())
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentPortMappingAllocationTest(ContainersMixin, TransactionTestCase):
+
+    """
+    Tests concurrent port reservations on the same server do not collide.
+    """
+
+    def test_parallel_container_creations_get_distinct_ports(self):
+        server, containers = self.create_containers(200)
+
+        def create_mappings(container):
+            try:
+                return [mapping.external_port for mapping in PortMapping.create_for_container(container, [80, 8888])]
+            finally:
+                connection.close()
+
+        pool = ThreadPool(20)
+        try:
+            ports = sum(pool.map(create_mappings, containers), [])
+        finally:
+            pool.close()
+        self.assertEqual(len(ports), 400)
+        self.assertEqual(len(set(ports)), 400)
+        self.assertEqual(PortMapping.objects.filter(server=server).count(), 400)
+
+
+class LeastLoadedTest(ContainersMixin, TestCase):
+
+    """
+    Tests the load-aware server selection algorithm.
+    """
+
+    def test_server_with_least_load_is_chosen(self):
+        server, containers = self.create_containers(2)
+        other = Server(name='other', internal_ip='10.0.0.2', external_ip='192.168.0.2',
+                       container_backend=server.container_backend)
+        other.save()
+        algorithm = LeastLoaded(live_metrics=False)
+        with self.assertNumQueries(1):
+            algorithm.get_scores(Server.objects.all())
+        self.assertEqual(algorithm.choose_server(Server.objects.all().iterator()), other)
+
+    def test_servers_without_free_ports_are_skipped(self):
+        server, containers = self.create_containers(1)
+        other = Server(name='other', internal_ip='10.0.0.2', external_ip='192.168.0.2',
+                       container_backend=server.container_backend)
+        other.save()
+        with override_app_settings(CONTAINER_PORT_MAPPINGS_START_PORT=50000, CONTAINER_PORT_MAPPINGS_END_PORT=50000):
+            PortMapping(server=other, container=containers[0], external_port=50000, internal_port=80).save()
+            algorithm = LeastLoaded(live_metrics=False)
+            self.assertEqual(algorithm.choose_server(Server.objects.all().iterator()), server)
+
+    def test_servers_without_enough_free_ports_for_the_image_are_skipped(self):
+        server, containers = self.create_containers(2)
+        other = Server(name='other', internal_ip='10.0.0.2', external_ip='192.168.0.2',
+                       container_backend=server.container_backend)
+        other.save()
+        with override_app_settings(CONTAINER_PORT_MAPPINGS_START_PORT=50000, CONTAINER_PORT_MAPPINGS_END_PORT=50001):
+            PortMapping(server=other, container=containers[0], external_port=50000, internal_port=80).save()
+            image = ContainerImage(name='image', backend_pk='image', owner=containers[0].owner.django_user,
+                                   protected_port=8888, public_ports='22')
+            algorithm = LeastLoaded(live_metrics=False)
+            self.assertEqual(algorithm.choose_server(Server.objects.all()), other)
+            self.assertEqual(algorithm.choose_server(Server.objects.all(), image=image), server)
+
+
+class RoundRobinTest(ContainersMixin, TestCase):
+
+    """
+    Tests the round robin server selection algorithm.
+    """
+
+    def test_rotation_is_shared_among_instances(self):
+        server, containers = self.create_containers(0)
+        other = Server(name='other', internal_ip='10.0.0.2', external_ip='192.168.0.2',
+                       container_backend=server.container_backend)
+        other.save()
+        # every instance represents another (uwsgi) process
+        choices = [RoundRobin().choose_server(Server.objects.all()) for i in range(4)]
+        self.assertEqual(choices, [server, other, server, other])
+        self.assertEqual(RoundRobin().choose_server(Server.objects.all().iterator()), server)
+
+
+class ImageLocalityTest(ContainersMixin, TestCase):
+
+    """
+    Tests the image locality aware server selection algorithm.
+    """
+
+    def test_servers_holding_the_image_are_preferred(self):
+        server, containers = self.create_containers(2)
+        other = Server(name='other', internal_ip='10.0.0.2', external_ip='192.168.0.2',
+                       container_backend=server.container_backend)
+        other.save()
+        image = ContainerImage(name='image', backend_pk='image', owner=containers[0].owner.django_user)
+        ContainerImage.objects.bulk_create([image])  # no signals, so no backend is asked
+        image = ContainerImage.objects.get(backend_pk='image')
+        algorithm = ImageLocality(LeastLoaded(live_metrics=False))
+        # no server holds the image: least loaded
+        self.assertEqual(algorithm.choose_server(Server.objects.all(), image=image), other)
+        image.servers.add(server)
+        self.assertEqual(algorithm.choose_server(Server.objects.all(), image=image), server)
+        self.assertEqual(algorithm.choose_server(Server.objects.all()), other)
+
+    def test_new_images_are_indexed_by_queued_jobs(self):
+        server, containers = self.create_containers(1)
+        image = ContainerImage(name='image', backend_pk='image', owner=containers[0].owner.django_user)
+        with override_app_settings(JOBS_ASYNC=True):
+            image.save()
+        job = Job.objects.get(action=Job.ACTION_INDEX)
+        self.assertEqual((job.image, job.get_arguments().get('server')), (image, server.id))
+
+
+class ServerHealthTest(ContainersMixin, TestCase):
+
+    """
+    Tests that unhealthy servers are excluded from container placement.
+    """
+
+    def test_unhealthy_servers_are_skipped(self):
+        server, containers = self.create_containers(0)
+        other = Server(name='other', internal_ip='10.0.0.2', external_ip='192.168.0.2',
+                       container_backend=server.container_backend)
+        other.save()
+        ServerStatus(server=server, checked_at=timezone.now() - timedelta(seconds=10), is_healthy=True).save()
+        ServerStatus(server=server, is_healthy=False, error='Connection refused').save()
+        ServerStatus(server=other, is_healthy=True, latency=0.1).save()
+        self.assertEqual(ServerStatus.get_unhealthy_server_ids(), set([server.id]))
+        self.assertFalse(server.is_healthy())
+        for i in range(3):
+            self.assertEqual(RoundRobin().choose_server(Server.objects.all()), other)
+        self.assertEqual(LeastLoaded(live_metrics=False).choose_server(Server.objects.all()), other)
+
+    def test_stale_statuses_are_ignored(self):
+        server, containers = self.create_containers(0)
+        stale = timezone.now() - timedelta(seconds=settings.SERVER_STATUS_MAX_AGE + 1)
+        ServerStatus(server=server, checked_at=stale, is_healthy=False).save()
+        self.assertTrue(server.is_healthy())
+        self.assertEqual(RoundRobin().choose_server(Server.objects.all()), server)
+
+    def test_prune_keeps_latest(self):
+        server, containers = self.create_containers(0)
+        now = timezone.now()
+        for i in range(5):
+            ServerStatus(server=server, checked_at=now - timedelta(seconds=i), is_healthy=bool(i)).save()
+        ServerStatus.prune(server, 2)
+        self.assertEqual([status.is_healthy for status in server.statuses.all()], [False, True])
+
+    def test_latest_statuses_are_selected_by_one_query(self):
+        server, containers = self.create_containers(0)
+        for i in range(5):
+            ServerStatus(server=server, is_healthy=bool(i % 2)).save()
+        with self.assertNumQueries(1):
+            self.assertEqual(ServerStatus.get_unhealthy_server_ids(), set([server.id]))
+        self.assertEqual(list(ServerStatus.get_latest()), [server.statuses.order_by('-id')[0]])
+
+    def test_api_lists_only_the_latest_status(self):
+        server, containers = self.create_containers(0)
+        admin = self.create_group_with_members('admins', 1).get_users()[0].django_user
+        User.objects.filter(id=admin.id).update(is_superuser=True)
+        client = APIClient()
+        client.force_authenticate(User.objects.get(id=admin.id))
+        for i in range(5):
+            ServerStatus(server=server, is_healthy=bool(i % 2), error=str(i)).save()
+        other = Server(name='other', internal_ip='10.0.0.2', external_ip='192.168.0.2',
+                       container_backend=server.container_backend)
+        other.save()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(get_api_url('servers'))
+        data = dict((row['id'], row) for row in response.data)
+        self.assertNotIn('statuses', data[server.id])
+        self.assertEqual((data[server.id]['is_healthy'], data[server.id]['status']['error']), (False, '4'))
+        self.assertEqual((data[other.id]['is_healthy'], data[other.id]['status']), (True, None))
+        ServerStatus(server=other, is_healthy=True).save()
+        with self.assertNumQueries(len(queries)):
+            client.get(get_api_url('servers'))
+
+        response = client.get(get_api_url('servers/%i' % server.id))
+        self.assertEqual([status['error'] for status in response.data['statuses']], ['4', '3', '2', '1', '0'])
+
+
+class JobQueueTest(GroupMembersMixin, TestCase):
+
+    """
+    Tests the claiming and execution of queued jobs.
+    """
+
+    def setUp(self):
+        self.jobs_async = override_app_settings(JOBS_ASYNC=True)
+        self.jobs_async.enable()
+
+    def tearDown(self):
+        self.jobs_async.disable()
+
+    def create_job(self, key):
+        """
+        Queue a job deleting a container of a no longer existing server (always succeeds).
+
+        :param key: The key of the job.
+        """
+        return jobs.dispatch(Job.ACTION_DELETE, key=key, server=0, backend_pk='none')
+
+    def test_jobs_with_the_same_key_are_executed_in_order(self):
+        first = self.create_job('container:1')
+        second = self.create_job('container:1')
+        other = self.create_job('container:2')
+        self.assertEqual(Job.claim('worker:1'), first)
+        self.assertEqual(Job.claim('worker:2'), other)
+        self.assertIsNone(Job.claim('worker:3'))  # has to wait for the first one
+        self.assertEqual(jobs.execute(first).status, Job.STATUS_SUCCEEDED)
+        self.assertEqual(Job.claim('worker:3'), second)
+
+    def test_jobs_of_dead_workers_are_requeued(self):
+        job = self.create_job('container:1')
+        self.assertEqual(Job.claim('dead:1'), job)
+        self.assertEqual(jobs.recover('dead'), (1, 0))
+        self.assertEqual(Job.claim('dead:2'), job)
+        Job.objects.filter(id=job.id).update(attempts=settings.JOBS_MAX_ATTEMPTS)
+        self.assertEqual(jobs.recover('dead'), (0, 1))
+        self.assertEqual(Job.objects.get(id=job.id).status, Job.STATUS_FAILED)
+
+    def test_failed_job_notifies_its_owner(self):
+        group = self.create_group_with_members('owners', 1)
+        owner = group.get_users()[0]
+        # make the group the owner's single user group
+        BackendGroup.objects.filter(pk=owner.primary_group_id).update(django_group=group)
+        Job(action=Job.ACTION_RESTORE, owner=owner).save()  # the snapshot is gone
+        job = jobs.execute(Job.claim('worker:1'))
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+        self.assertIn('deleted', job.error)
+        self.assertTrue(NotificationLog.objects.filter(user=owner, notification__message__contains='failed').exists())
+
+    def test_jobs_are_executed_right_away_if_not_async(self):
+        with override_app_settings(JOBS_ASYNC=False):
+            self.assertIsNone(self.create_job('container:1'))
+        self.assertFalse(Job.objects.exists())
+
+
+class PendingContainerTest(ContainersMixin, TestCase):
+
+    """
+    Tests containers whose creation job has not been executed yet are left alone on the backend.
+    """
+
+    def setUp(self):
+        self.server, containers = self.create_containers(2)
+        Container.objects.filter(id=containers[0].id).update(backend_pk='')
+        self.pending, self.created = Container.objects.filter(server=self.server).order_by('id')
+
+    def test_lifecycle_actions_are_rejected(self):
+        self.assertFalse(self.pending.is_created())
+        self.assertFalse(self.pending.is_running())
+        client = APIClient()
+        client.force_authenticate(self.pending.owner.django_user)
+        response = client.post(reverse('container_start', args=[self.pending.id]))
+        self.assertEqual(response.status_code, 409)
+        errors = Container.bulk_action([self.pending], 'start')
+        self.assertIn('not been created', errors.get(self.pending.id))
+
+    def test_deletion_is_not_queued(self):
+        with override_app_settings(JOBS_ASYNC=True):
+            self.pending.delete()
+            self.assertFalse(Job.objects.filter(action=Job.ACTION_DELETE).exists())
+            self.created.delete()
+        self.assertEqual(Job.objects.get(action=Job.ACTION_DELETE).get_arguments().get('backend_pk'), '1')
+
+
+class ContainerBulkActionTest(ContainersMixin, TestCase):
+
+    """
+    Tests the execution of lifecycle actions on many containers at once.
+    """
+
+    def test_every_container_gets_a_result(self):
+        server, containers = self.create_containers(20)
+        # stopped containers cannot be suspended, so the action succeeds without calling the backend
+        container_state_cache.set_many([
+            (container, ContainerBackend.CONTAINER_STATUS_STOPPED) for container in containers
+        ])
+        errors = Container.bulk_action(Container.objects.filter(server=server), 'suspend', concurrency=4)
+        self.assertEqual(errors, dict((container.id, None) for container in containers))
+
+    def test_unknown_action_is_rejected(self):
+        with self.assertRaises(ValueError):
+            Container.bulk_action([], 'delete')
+
+    def test_users_without_backend_user_are_forbidden(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username='internal'))
+        response = client.post(reverse('container_bulk_action', args=['stop']), {'ids': [1]}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_too_many_ids_are_rejected(self):
+        server, containers = self.create_containers(1)
+        client = APIClient()
+        client.force_authenticate(containers[0].owner.django_user)
+        url = reverse('container_bulk_action', args=['stop'])
+        ids = range(1, settings.CONTAINER_BULK_ACTION_MAX_IDS + 2)
+        self.assertEqual(client.post(url, {'ids': ids}, format='json').status_code, 400)
+        self.assertEqual(client.post(url, {'ids': []}, format='json').status_code, 400)
+
+
+class IdleContainersTest(ContainersMixin, TestCase):
+
+    """
+    Tests the recording of workspace accesses and the detection of idle containers.
+    """
+
+    def setUp(self):
+        self.idle_timeout = override_app_settings(CONTAINER_IDLE_TIMEOUT=3600)
+        self.idle_timeout.enable()
+
+    def tearDown(self):
+        self.idle_timeout.disable()
+
+    def create_idle_containers(self, count):
+        """
+        Create `count` running containers (with a port mapping each) that have not been accessed for a day.
+
+        :param count: The number of containers to create.
+        """
+        server, containers = self.create_containers(count)
+        Container.objects.update(last_accessed=timezone.now() - timedelta(days=1))
+        PortMapping.objects.bulk_create([
+            PortMapping(server=server, container=container, external_port=50000 + i, internal_port=80)
+            for i, container in enumerate(containers)
+        ])
+        container_state_cache.set_many([
+            (container, ContainerBackend.CONTAINER_STATUS_RUNNING) for container in containers
+        ])
+        return server, containers
+
+    def test_accesses_are_written_through_once_per_interval(self):
+        server, containers = self.create_idle_containers(3)
+        tracker = WorkspaceActivityTracker(write_interval=3600)
+        self.assertEqual(tracker.record(server.internal_ip, 50000), 1)
+        self.assertEqual(tracker.record(server.internal_ip, '50001'), 1)
+        self.assertEqual(tracker.record('10.0.0.99', 50002), 0)  # another server
+        self.assertEqual(get_idle_containers('suspend'), [containers[2]])
+        with self.assertNumQueries(0):
+            self.assertEqual(tracker.record(server.internal_ip, 50000), 0)
+
+    def test_only_running_containers_are_suspended(self):
+        server, containers = self.create_idle_containers(3)
+        container_state_cache.set(containers[0], ContainerBackend.CONTAINER_STATUS_SUSPENDED)
+        container_state_cache.set(containers[1], ContainerBackend.CONTAINER_STATUS_STOPPED)
+        self.assertEqual(get_idle_containers('suspend'), [containers[2]])
+        self.assertEqual(get_idle_containers('stop'), [containers[0], containers[2]])
+
+    def test_no_timeout_disables_the_scheduler(self):
+        self.create_idle_containers(3)
+        with override_app_settings(CONTAINER_IDLE_TIMEOUT=None):
+            self.assertEqual(get_idle_containers('suspend'), [])
+
+
+class UserImportTest(TestCase):
+
+    """
+    Tests the batched creation of the Django records of imported users.
+    """
+
+    def test_records_are_linked(self):
+        accounts = [('user%i' % i, 3000 + i, 'user%i' % i, 3000 + i, 'user%i' % i) for i in range(3)]
+        users = create_django_users(accounts)
+        self.assertEqual(sorted(user.get_username() for user in users), ['user0', 'user1', 'user2'])
+        for user in users:
+            self.assertEqual(user.backend_id, user.primary_group.backend_id)
+            group = user.get_collaboration_group()
+            self.assertTrue(group.is_single_user_group)
+            self.assertEqual(group.backend_group, user.primary_group)
+            self.assertEqual(group.get_users(), [user])
+
+    def test_accounts_are_split_evenly(self):
+        self.assertEqual(split([1, 2, 3], 2), [[1, 3], [2]])
+        self.assertEqual(split([1], 3), [[1]])
+
+
+class FakeUserBackend(object):
+
+    """
+    In-memory stand-in for the user backend and the internal LDAP server.
+    """
+
+    def __init__(self):
+        self.users = {}
+        self.queries = []
+
+    def add_user(self, username):
+        self.users[username] = timezone.now()
+
+    def get_users(self, changed_since=None):
+        self.queries.append(changed_since)
+        return [
+            {UserBackend.FIELD_PK: username} for username, changed in self.users.items()
+            if changed_since is None or changed >= changed_since
+        ]
+
+    def create_group(self, gid, name):
+        return {GroupBackend.FIELD_ID: gid, GroupBackend.FIELD_PK: name}
+
+    def create_user(self, uid, username, password, gid, home):
+        return {UserBackend.FIELD_ID: uid, UserBackend.FIELD_PK: username}
+
+    def add_group_member(self, group_pk, user_pk):
+        pass
+
+    def delete_group(self, pk):
+        pass
+
+    def disconnect(self):
+        pass
+
+
+class IncrementalUserImportTest(TestCase):
+
+    """
+    Tests that incremental user imports only handle the users changed since the last complete import.
+    """
+
+    def setUp(self):
+        self.backend = FakeUserBackend()
+        self.patched = {
+            'get_user_backend_connected': lambda: self.backend,
+            'get_internal_ldap_connected': lambda: self.backend,
+            'create_home_directory': lambda **kwargs: None,
+            'create_public_directory': lambda **kwargs: None,
+        }
+        self.originals = {name: getattr(import_users_command, name) for name in self.patched}
+        for name, function in self.patched.items():
+            setattr(import_users_command, name, function)
+
+    def tearDown(self):
+        for name, function in self.originals.items():
+            setattr(import_users_command, name, function)
+
+    def test_first_import_fetches_all_users(self):
+        self.backend.add_user('alice')
+        self.backend.add_user('bob')
+        self.assertEqual(sorted(import_users(incremental=True)), ['alice', 'bob'])
+        self.assertEqual(self.backend.queries, [None])
+        self.assertIsNotNone(get_last_import())
+
+    def test_second_import_touches_no_unchanged_rows(self):
+        self.backend.add_user('alice')
+        self.backend.add_user('bob')
+        import_users(incremental=True)
+        since = get_last_import()
+        # move the changes of the first run before the high-water mark
+        for username in self.backend.users:
+            self.backend.users[username] = since - timedelta(seconds=1)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(import_users(incremental=True), [])
+        self.assertEqual(self.backend.queries[-1], since)
+        self.assertFalse([query for query in queries.captured_queries if 'auth_user' in query['sql']])
+
+        self.backend.add_user('carol')
+        self.assertEqual(import_users(incremental=True), ['carol'])
+        self.assertEqual(User.objects.filter(username__in=['alice', 'bob', 'carol']).count(), 3)
+
+    def test_failed_users_are_retried(self):
+        self.backend.add_user('alice')
+        create_user = self.backend.create_user
+
+        def fail(*args, **kwargs):
+            raise UserBackendError('failed')
+        self.backend.create_user = fail
+        self.assertEqual(import_users(incremental=True), [])
+        self.assertIsNone(get_last_import())
+
+        self.backend.create_user = create_user
+        self.assertEqual(import_users(incremental=True), ['alice'])
+
+
+class IdAllocatorTest(GroupMembersMixin, TestCase):
+
+    """
+    Tests the allocation of user/group IDs from database sequences.
+    """
+
+    def test_ids_are_consecutive(self):
+        allocator = IdAllocator('test', lambda: 41, 10)
+        self.assertEqual(allocator.allocate_many(3), [42, 43, 44])
+        self.assertEqual(allocator.allocate(), 45)
+        self.assertEqual(IdAllocator('test', lambda: 0, 10).allocate(), 46)  # shared by all allocators
+
+    def test_uids_start_after_the_existing_ones(self):
+        self.create_group_with_members('users', 2)
+        BackendUser.objects.filter(backend_pk='users_1').update(backend_id=settings.USER_ID_OFFSET + 100)
+        self.assertEqual(BackendUser.generate_internal_uid(), settings.USER_ID_OFFSET + 101)
+
+    def test_gids_start_after_the_existing_ones(self):
+        group = self.create_group_with_members('users', 1)
+        BackendGroup.objects.bulk_create([  # no signals, so no backend is asked
+            BackendGroup(django_group_id=group.id, backend_id=settings.GROUP_ID_OFFSET + 100, backend_pk='users')
+        ])
+        self.assertEqual(get_highest_used_gid(), settings.GROUP_ID_OFFSET + 100)
+        self.assertEqual(BackendGroup.generate_internal_gid(), settings.GROUP_ID_OFFSET + 101)
+
+    def test_single_allocations_need_no_queries_outside_transactions(self):
+        allocator = IdAllocator('test', lambda: 0, 10)
+        allocator._next, allocator._end = 1, 11  # as if reserved outside of a transaction
+        with self.assertNumQueries(0):
+            self.assertEqual([allocator.allocate() for i in range(10)], range(1, 11))
+
+
+class ApiTokenAuthenticationTest(GroupMembersMixin, TestCase):
+
+    """
+    Tests the API token authentication backed by the token cache.
+    """
+
+    def create_token(self):
+        """
+        Create a user with an API token.
+        """
+        user = self.create_group_with_members('users', 1).get_users()[0].django_user
+        return Token.objects.create(user=user)
+
+    def test_tokens_are_looked_up_once(self):
+        token = self.create_token()
+        authentication = CachedTokenAuthentication()
+        self.assertEqual(authentication.authenticate_credentials(token.key)[0], token.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(authentication.authenticate_credentials(token.key)[0], token.user)
+
+    def test_deleted_tokens_are_rejected(self):
+        token = self.create_token()
+        authentication = CachedTokenAuthentication()
+        authentication.authenticate_credentials(token.key)
+        token.delete()
+        with self.assertRaises(AuthenticationFailed):
+            authentication.authenticate_credentials(token.key)
+
+    def test_deactivated_users_are_rejected(self):
+        token = self.create_token()
+        authentication = CachedTokenAuthentication()
+        authentication.authenticate_credentials(token.key)
+        token.user.is_active = False
+        token.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            authentication.authenticate_credentials(token.key)
+
+    def test_tokens_are_deleted_at_logout(self):
+        token = self.create_token()
+        authentication = CachedTokenAuthentication()
+        authentication.authenticate_credentials(token.key)
+        request = RequestFactory().get(reverse('accounts_unflag'))
+        request.user = token.user
+        remove_cookie(request)
+        self.assertFalse(Token.objects.filter(user=token.user).exists())
+        with self.assertRaises(AuthenticationFailed):
+            authentication.authenticate_credentials(token.key)
+
+
+class CredentialCacheTest(GroupMembersMixin, TestCase):
+
+    """
+    Tests the verification of cached credentials without asking the backends.
+    """
+
+    def test_verified_credentials_need_no_bind(self):
+        user = self.create_group_with_members('users', 1).get_users()[0].django_user
+        credential_cache.set(user.username, 'secret', user.id)
+        # no user backend is configured, so a bind would fail
+        self.assertEqual(BackendProxyAuthentication().authenticate(user.username, 'secret'), user)
+        self.assertIsNone(credential_cache.get(user.username, 'other'))
+
+    def test_failed_credentials_are_rejected(self):
+        user = self.create_group_with_members('users', 1).get_users()[0].django_user
+        credential_cache.set_failed(user.username, 'wrong')
+        with self.assertRaises(PermissionDenied):
+            BackendProxyAuthentication().authenticate(user.username, 'wrong')
+
+
+class ApiQueryBudgetTest(ContainersMixin, TestCase):
+
+    """
+    Tests the number of queries of the API list endpoints does not depend on the number of rows.
+    """
+
+    def setUp(self):
+        self.rows = 0
+        admin = self.create_user('admin').django_user
+        User.objects.filter(id=admin.id).update(is_superuser=True)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.get(id=admin.id))
+
+    def next_name(self):
+        """
+        Get a unique name for the next row.
+        """
+        self.rows += 1
+        return 'row%i' % self.rows
+
+    def create_user(self, name):
+        """
+        Create a backend user having a private collaboration group.
+
+        :param name: The username.
+        """
+        group = self.create_group_with_members(name, 1)
+        CollaborationGroup.objects.filter(id=group.id).update(is_single_user_group=True)
+        return group.get_users()[0]
+
+    def create_collaboration_group(self):
+        """
+        Create a collaboration group with a creator, an admin and a regular member.
+        """
+        name = self.next_name()
+        creator, admin, user = [self.create_user('%s_%i' % (name, i)) for i in range(3)]
+        group = CollaborationGroup(name=name, creator=creator)
+        group.save()
+        CollaborationGroup.admins.through.objects.bulk_create([
+            CollaborationGroup.admins.through(collaborationgroup_id=group.id, backenduser_id=admin.id)
+        ])
+        User.groups.through.objects.bulk_create([
+            User.groups.through(user_id=user.django_user_id, group_id=group.id)
+        ])
+        return group
+
+    def count_queries(self, path):
+        """
+        Get the number of queries needed to list the API endpoint `path`.
+
+        :param path: The path of the list endpoint (relative to the API root).
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(get_api_url(path))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assertQueriesIndependentOfRows(self, path, add_row):
+        """
+        Assert listing the API endpoint `path` needs as many queries for 5 rows as for 2 rows.
+
+        :param path: The path of the list endpoint (relative to the API root).
+        :param add_row: Callable adding another row to the list.
+        """
+        for i in range(2):
+            add_row()
+        queries = self.count_queries(path)
+        for i in range(3):
+            add_row()
+        self.assertEqual(self.count_queries(path), queries)
+
+    def test_users(self):
+        self.assertQueriesIndependentOfRows('users', lambda: self.create_user(self.next_name()))
+
+    def test_collaboration_groups(self):
+        self.assertQueriesIndependentOfRows('collaborationgroups', self.create_collaboration_group)
+
+    def test_containers(self):
+        server, containers = self.create_containers(1)
+        container_state_cache.set(containers[0], ContainerBackend.CONTAINER_STATUS_RUNNING)
+
+        def add_container():
+            name = self.next_name()
+            Container.objects.bulk_create([
+                Container(name=name, backend_pk=name, server=server, owner=containers[0].owner, clone_of=containers[0])
+            ])
+            container = Container.objects.get(backend_pk=name)
+            PortMapping.objects.bulk_create([
+                PortMapping(server=server, container=container, external_port=49000 + container.id, internal_port=22)
+            ])
+            container_state_cache.set(container, ContainerBackend.CONTAINER_STATUS_RUNNING)
+
+        self.assertQueriesIndependentOfRows('containers', add_container)
+
+    def test_images(self):
+        def add_image():
+            name = self.next_name()
+            ContainerImage.objects.bulk_create([
+                ContainerImage(name=name, backend_pk=name, owner=self.create_user(name).django_user)
+            ])
+            ContainerImage.access_groups.through.objects.bulk_create([
+                ContainerImage.access_groups.through(
+                    containerimage_id=ContainerImage.objects.get(backend_pk=name).id,
+                    collaborationgroup_id=self.create_collaboration_group().id
+                )
+            ])
+
+        self.assertQueriesIndependentOfRows('containers/images', add_image)
+
+    def test_shares(self):
+        def add_share():
+            group = self.create_collaboration_group()
+            BackendGroup.objects.bulk_create([
+                BackendGroup(django_group_id=group.id, backend_id=settings.GROUP_ID_OFFSET + group.id, backend_pk=group.name)
+            ])
+            Share.objects.bulk_create([
+                Share(name=group.name, backend_group=group.backend_group, owner=group.creator)
+            ])
+            Tag.objects.bulk_create([Tag(label=group.name)])
+            share = Share.objects.get(name=group.name)
+            Share.tags.through.objects.bulk_create([
+                Share.tags.through(share_id=share.id, tag_id=Tag.objects.get(label=group.name).id)
+            ])
+            Share.access_groups.through.objects.bulk_create([
+                Share.access_groups.through(share_id=share.id, collaborationgroup_id=group.id)
+            ])
+
+        self.assertQueriesIndependentOfRows('shares', add_share)
+
+    def test_notifications_and_logs(self):
+        def add_notification():
+            name = self.next_name()
+            notification = Notification(
+                message='Test',
+                notification_type=Notification.MISCELLANEOUS,
+                sender=self.create_user(name).django_user
+            )
+            notification.save()
+            notification.receiver_groups.add(self.create_group_with_members(name + '_receivers', 1))
+
+        self.assertQueriesIndependentOfRows('notifications', add_notification)
+        self.assertQueriesIndependentOfRows('notificationlogs', add_notification)
+
+
+class ApiPaginationTest(GroupMembersMixin, TestCase):
+
+    """
+    Tests the unbounded API lists are paginated by cursor (and the others are not).
+    """
+
+    def test_pages_cover_all_rows_once(self):
+        user = self.create_group_with_members('users', 1).get_users()[0]
+        now = timezone.now()
+        for i in range(5):
+            notification = Notification(message='Test', notification_type=Notification.MISCELLANEOUS)
+            notification.save()
+            # two notifications share each date, to page over ties too
+            Notification.objects.filter(id=notification.id).update(date=now - timedelta(minutes=i // 2))
+            NotificationLog.objects.create(notification=notification, user=user)
+        client = APIClient()
+        client.force_authenticate(user.django_user)
+        ids = []
+        url = reverse('notificationlogs') + '?page_size=3'  # the first page ends within a tie
+        while url is not None:
+            response = client.get(url)
+            self.assertLessEqual(len(response.data['results']), 3)
+            ids.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(sorted(ids), sorted(NotificationLog.objects.values_list('id', flat=True)))
+        dates = [NotificationLog.objects.get(id=pk).notification.date for pk in ids]
+        self.assertEqual(dates, sorted(dates, reverse=True))
+
+    def test_other_lists_are_not_paginated(self):
+        user = self.create_group_with_members('users', 3).get_users()[0].django_user
+        User.objects.filter(id=user.id).update(is_superuser=True)
+        client = APIClient()
+        client.force_authenticate(User.objects.get(id=user.id))
+        response = client.get(reverse('users'), {'page_size': 2})
+        self.assertEqual(len(response.data), User.objects.count())
+
+    def test_unread_notification_logs_are_counted_by_query(self):
+        user = self.create_group_with_members('users', 1).get_users()[0]
+        notification = Notification(message='Test', notification_type=Notification.MISCELLANEOUS,
+                                    sender=user.django_user)
+        notification.save()
+        NotificationLog.objects.bulk_create([
+            NotificationLog(notification=notification, user=user, read=bool(i % 2)) for i in range(5)
+        ])
+        client = APIClient()
+        client.force_authenticate(user.django_user)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse('notificationlogs_unread_count'))
+        self.assertEqual(response.data, {'count': 3})
+        self.assertLessEqual(len(queries), 2)  # the COUNT (and maybe the backend user)
+
+
+class ApiFieldsTest(ContainersMixin, TestCase):
+
+    """
+    Tests the sparse fieldsets of the API.
+    """
+
+    def setUp(self):
+        self.server, self.containers = self.create_containers(2)
+        container_state_cache.set_many([
+            (container, ContainerBackend.CONTAINER_STATUS_RUNNING) for container in self.containers
+        ])
+        User.objects.filter(id=self.containers[0].owner.django_user_id).update(is_superuser=True)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.get(id=self.containers[0].owner.django_user_id))
+
+    def test_all_fields_are_rendered_by_default(self):
+        response = self.client.get(get_api_url('containers'))
+        for name in ('friendly_name', 'is_running', 'is_suspended', 'port_mappings', 'server'):
+            self.assertIn(name, response.data[0])
+
+    def test_omitted_fields_are_left_out(self):
+        response = self.client.get(get_api_url('containers'), {'omit': 'is_running,is_suspended'})
+        self.assertNotIn('is_running', response.data[0])
+        self.assertNotIn('is_suspended', response.data[0])
+        self.assertIn('friendly_name', response.data[0])
+
+    def test_only_requested_fields_are_rendered(self):
+        response = self.client.get(get_api_url('containers'), {'fields': 'id,name,is_running'})
+        self.assertEqual(set(response.data[0].keys()), set(['id', 'name', 'is_running']))
+        response = self.client.get(reverse('container_detail', args=[self.containers[0].id]), {'fields': 'name'})
+        self.assertEqual(response.data, {'name': 'c0'})
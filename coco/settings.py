@@ -37,6 +37,7 @@ INSTALLED_APPS = (
     # API
     'coco.api',
     'rest_framework',
+    'rest_framework.authtoken',
     # Admin
     'coco.admin.apps.MyAdmin',
     'djangocms_admin_style',
@@ -58,6 +59,8 @@ INSTALLED_APPS = (
 # SITE_ID = 1
 
 MIDDLEWARE_CLASSES = (
+    # has to be the first one, so the reverse proxy's auth checks skip all others
+    'coco.core.auth.middleware.WorkspaceAuthMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -65,6 +68,7 @@ MIDDLEWARE_CLASSES = (
     'django.contrib.auth.middleware.SessionAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'coco.web.middleware.WorkspaceTokenMiddleware',
 )
 
 ROOT_URLCONF = 'coco.urls'
@@ -105,6 +109,39 @@ DATABASES = {
     }
 }
 
+# Caches
+# https://docs.djangoproject.com/en/1.8/topics/cache/
+# the container state and workspace access caches should be shared among all worker processes,
+# so invalidations are seen by all of them (use i.e. locmem for a single process setup)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'container_states': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/var/tmp/coco/container_states',
+    },
+    'workspace_access': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/var/tmp/coco/workspace_access',
+    },
+    'api_tokens': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/var/tmp/coco/api_tokens',
+    }
+}
+CONTAINER_STATE_CACHE = 'container_states'
+CONTAINER_STATE_CACHE_TTL = 10
+WORKSPACE_ACCESS_INDEX_CACHE = 'workspace_access'
+WORKSPACE_ACCESS_INDEX_MAX_AGE = 60
+API_TOKEN_CACHE = 'api_tokens'
+API_TOKEN_CACHE_TTL = 60
+
+# secret used to sign the workspace access tokens,
+# has to match $workspace_token_secret in 'lib/confs/nginx/coco.conf'
+# (empty = no tokens are issued, set a long random value to enable them)
+WORKSPACE_TOKEN_SECRET = ''
+
 # Internationalization
 # https://docs.djangoproject.com/en/1.8/topics/i18n/
 LANGUAGE_CODE = 'en-us'
@@ -140,6 +177,11 @@ AUTHENTICATION_BACKENDS = (
 )
 
 REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': (
+        'coco.api.authentication.CachedTokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     )
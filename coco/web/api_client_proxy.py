@@ -1,16 +1,253 @@
-from coco.client.clients import HttpClient
-from django.core.urlresolvers import reverse
+from coco.core import settings as core_settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.core.urlresolvers import get_script_prefix, resolve, \
+    reverse, Resolver404
+from io import BytesIO
+from rest_framework.renderers import JSONRenderer
+from slumber.exceptions import HttpClientError, HttpNotFoundError, \
+    HttpServerError
+from urllib import urlencode
+from urlparse import parse_qsl, urlparse
+import json
+import logging
 
 
-def get_httpclient_instance(request):
-    # TODO: make this url dynamic
-    base_url = 'http://localhost{}'.format(reverse('api_root'))
-    username = request.user.username
-    password = request.session.get('password')
-    return HttpClient(base_url, auth=(username, password))
+logger = logging.getLogger(__name__)
+
+
+class ApiResponseDict(dict):
+
+    """
+    Dictionary whose items can also be accessed as attributes.
+
+    Mirrors the objects returned by the HTTP based API client, so the views
+    and templates can keep using `container.name` as well as `container['name']`.
+    """
+
+    def __getattr__(self, name):
+        """
+        :inherit.
+        """
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        """
+        :inherit.
+        """
+        self[name] = value
+
+
+def get_page_params(url):
+    """
+    Get the query parameters of a page link (i.e. the `next` link of a paginated list) as dictionary.
+
+    :param url: The page link (`None` for no parameters).
+    """
+    if url is None:
+        return {}
+    return dict(parse_qsl(urlparse(url).query))
+
+
+class LocalApiResource(object):
+
+    """
+    Slumber-like API resource that dispatches calls directly to the views in `coco.api.views`.
+
+    Instead of doing a HTTP request to the API (which means a full round trip
+    through the web server plus another authentication), the API view is resolved
+    and called within the same process, authenticated as the user of the
+    request the client has been created for.
+    """
+
+    def __init__(self, request, segments=None):
+        """
+        Initialize a new resource.
+
+        :param request: The (web) request on which behalf the API is called.
+        :param segments: The path segments (relative to the API root) identifying this resource.
+        """
+        self._request = request
+        self._segments = segments or []
+
+    def __call__(self, id=None):
+        """
+        Return the sub-resource identified by `id`, i.e. `client.containers(1)`.
+        """
+        if id is None:
+            return self
+        return LocalApiResource(self._request, self._segments + [str(id)])
+
+    def __getattr__(self, item):
+        """
+        Return the sub-resource named `item`, i.e. `client.containers.images`.
+        """
+        if item.startswith('_'):
+            raise AttributeError(item)
+        return LocalApiResource(self._request, self._segments + [item])
+
+    def _build_request(self, method, path, data=None, params=None):
+        """
+        Create the request object passed to the API view.
+
+        :param method: The HTTP method to use.
+        :param path: The path of the requested resource.
+        :param data: The data to send as the request body.
+        :param params: The query parameters to send.
+        """
+        body = json.dumps(data) if data is not None else ''
+        environ = dict(self._request.META)
+        environ.update({
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'QUERY_STRING': urlencode(params or {}, doseq=True),
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(body)),
+            'HTTP_ACCEPT': 'application/json',
+            'wsgi.input': BytesIO(body)
+        })
+        api_request = WSGIRequest(environ)
+        api_request.session = self._request.session
+        api_request.user = self._request.user
+        # the web request is already authenticated, tell DRF to skip authentication
+        api_request._force_auth_user = self._request.user
+        return api_request
 
+    def _deserialize(self, data):
+        """
+        Convert the response data into the same structure the HTTP client would return.
+
+        :param data: The response data.
+        """
+        if data is None:
+            return None
+        return json.loads(JSONRenderer().render(data), object_hook=ApiResponseDict)
+
+    def _request_resource(self, method, data=None, params=None):
+        """
+        Call the API view responsible for this resource and return its response.
+
+        Raises the same exceptions the HTTP client does for responses with status codes >= 400.
+
+        :param method: The HTTP method to use.
+        :param data: The data to send as the request body.
+        :param params: The query parameters to send.
+        """
+        path = self._url()
+        try:
+            match = resolve(path)
+        except Resolver404:
+            try:
+                path += '/'
+                match = resolve(path)
+            except Resolver404:
+                raise HttpNotFoundError("Client Error 404: %s" % path, response=None, content=None)
+
+        try:
+            response = match.func(
+                self._build_request(method, path, data, params),
+                *match.args,
+                **match.kwargs
+            )
+        except Exception as ex:
+            logger.exception(ex)
+            raise HttpServerError("Server Error 500: %s" % path, response=None, content=str(ex))
+
+        if 400 <= response.status_code <= 499:
+            exception_class = HttpNotFoundError if response.status_code == 404 else HttpClientError
+            raise exception_class(
+                "Client Error %s: %s" % (response.status_code, path),
+                response=response,
+                content=JSONRenderer().render(getattr(response, 'data', None))
+            )
+        elif 500 <= response.status_code <= 599:
+            raise HttpServerError(
+                "Server Error %s: %s" % (response.status_code, path),
+                response=response,
+                content=JSONRenderer().render(getattr(response, 'data', None))
+            )
+        return response
+
+    def _url(self):
+        """
+        Return the path (as used by the URL resolver) of this resource.
+        """
+        api_root = reverse('api_root')[len(get_script_prefix()):]
+        return '/' + api_root + '/'.join(self._segments)
+
+    def count(self, **kwargs):
+        """
+        Get the number of items of the list resource from its `count` sub-resource.
+
+        I.e. `notificationlogs/unread/count`, as the cursor paginated lists do not know their total
+        (counting their items would mean fetching every page).
+        """
+        return self('count').get(**kwargs).get('count')
+
+    def delete(self, **kwargs):
+        """
+        Delete the resource.
+        """
+        self._request_resource('DELETE', params=kwargs)
+        return True
+
+    def get(self, **kwargs):
+        """
+        Get the resource.
+        """
+        response = self._request_resource('GET', params=kwargs)
+        return self._deserialize(response.data)
+
+    def iterate(self, **kwargs):
+        """
+        Iterate over the items of the (paginated) list resource, following the `next` links page by page.
+
+        Non-paginated lists are returned at once. Pages of the max. size are requested (unless `page_size` is given),
+        so lists scoped to the user (own containers, images, shares, ...) usually take a single call.
+        Unbounded lists the user browses (i.e. the notifications) should be paged by the view instead.
+        """
+        kwargs.setdefault('page_size', core_settings.API_MAX_PAGE_SIZE)
+        while True:
+            page = self.get(**kwargs)
+            if not isinstance(page, dict):
+                for item in page:
+                    yield item
+                return
+            for item in page.get('results'):
+                yield item
+            if page.get('next') is None:
+                return
+            kwargs = dict(kwargs, **get_page_params(page.get('next')))
+
+    def patch(self, data=None, **kwargs):
+        """
+        Partially update the resource.
+        """
+        response = self._request_resource('PATCH', data=data, params=kwargs)
+        return self._deserialize(response.data)
+
+    def post(self, data=None, **kwargs):
+        """
+        Create the resource/trigger the action.
+        """
+        response = self._request_resource('POST', data=data, params=kwargs)
+        return self._deserialize(response.data)
+
+    def put(self, data=None, **kwargs):
+        """
+        Update the resource.
+        """
+        response = self._request_resource('PUT', data=data, params=kwargs)
+        return self._deserialize(response.data)
+
+
+def get_httpclient_instance(request):
+    """
+    Return an API client acting on behalf of the user of `request`.
 
-def set_session_password(request):
-    if request.POST:
-        password = request.POST.get('password')
-        request.session['password'] = password
+    The client calls the API views in-process, so no loopback HTTP request
+    (and no additional authentication against the user backend) is needed.
+    """
+    return LocalApiResource(request)
@@ -0,0 +1,62 @@
+from coco.core import settings as core_settings
+from coco.core.auth.checks import login_allowed
+from coco.core.auth.tokens import create_token, encode_endpoint, parse_token
+from coco.core.auth.workspaces import workspace_access_index
+from coco.web import settings
+import time
+
+
+def set_workspace_token_cookie(response, user):
+    """
+    Set the cookie containing a fresh workspace access token for `user` on `response`.
+
+    :param response: The response to set the cookie on.
+    :param user: The (Django) user to issue the token for.
+    """
+    if core_settings.WORKSPACE_TOKEN_SECRET:
+        response.set_cookie(
+            settings.WORKSPACE_TOKEN_COOKIE_NAME,
+            create_token(user.id, workspace_access_index.get_endpoints(user.username)),
+            max_age=core_settings.WORKSPACE_TOKEN_TTL,
+            httponly=True
+        )
+
+
+class WorkspaceTokenMiddleware(object):
+
+    """
+    Middleware keeping the workspace access token cookie up-to-date.
+
+    The token is refreshed whenever it is about to expire or the user's workspaces
+    (i.e. port mappings) have changed, so the reverse proxy can keep validating it on its own.
+    """
+
+    def needs_refresh(self, request):
+        """
+        Check if the workspace access token sent with `request` has to be replaced.
+
+        :param request: The request to check.
+        """
+        token = request.COOKIES.get(settings.WORKSPACE_TOKEN_COOKIE_NAME)
+        content = parse_token(token) if token else None
+        if content is None:
+            return True
+        user_id, expires, endpoints = content
+        if user_id != request.user.id or expires - time.time() < core_settings.WORKSPACE_TOKEN_REFRESH:
+            return True
+        current = workspace_access_index.get_endpoints(request.user.username)
+        return endpoints != frozenset(encode_endpoint(internal_ip, port) for internal_ip, port in current)
+
+    def process_response(self, request, response):
+        """
+        :inherit.
+        """
+        user = getattr(request, 'user', None)
+        if not core_settings.WORKSPACE_TOKEN_SECRET or not login_allowed(user):
+            return response
+        # the views creating/removing the cookies know best
+        if settings.WORKSPACE_TOKEN_COOKIE_NAME in response.cookies:
+            return response
+        if self.needs_refresh(request):
+            set_workspace_token_cookie(response, user)
+        return response
@@ -4,6 +4,14 @@ Setting storing the name of the cookie that is used to check access via the reve
 AUTH_COOKIE_NAME = 'username'
 
 
+"""
+Setting storing the name of the cookie containing the workspace access token the reverse proxy validates.
+
+Has to match the cookie read in 'lib/confs/nginx/workspace_access.lua'.
+"""
+WORKSPACE_TOKEN_COOKIE_NAME = 'workspace_token'
+
+
 """
 Setting storing the name of the header that is indicating the requested URI, the reverse proxy is adding to sub-requests.
 """
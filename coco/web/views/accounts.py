@@ -1,8 +1,10 @@
 from coco.core.auth.checks import login_allowed
 from coco.web import settings
+from coco.web.middleware import set_workspace_token_cookie
 from django.contrib.auth.decorators import user_passes_test
 from django.core.urlresolvers import reverse
 from django.http import HttpResponseRedirect
+from rest_framework.authtoken.models import Token
 
 
 @user_passes_test(login_allowed)
@@ -13,9 +15,13 @@ def create_cookie(request):
     Since we use Nginx, which does a subrequest to check authorization of workspace access,
     we need a way to identify the user there. So we bypass here to create a signed cookie
     for that purpose.
+
+    Additionally, a workspace access token is issued, which allows Nginx to check
+    the access without asking Django at all.
     """
     response = HttpResponseRedirect(reverse('dashboard'))
     response.set_signed_cookie(settings.AUTH_COOKIE_NAME, request.user.username, httponly=True)
+    set_workspace_token_cookie(response, request.user)
     return response
 
 
@@ -26,7 +32,12 @@ def remove_cookie(request):
 
     We use that chance to remove the cookie we created after his login
     which authorizes him to access his workspaces.
+
+    His API token is deleted as well, so a leaked token does not outlive the session.
+    A new one can be obtained from the API's token endpoint.
     """
+    Token.objects.filter(user=request.user).delete()
     response = HttpResponseRedirect(reverse('accounts_logout'))
     response.delete_cookie(settings.AUTH_COOKIE_NAME)
+    response.delete_cookie(settings.WORKSPACE_TOKEN_COOKIE_NAME)
     return response
@@ -16,9 +16,9 @@ def index(request):
     Groups listing/index.
     """
     client = get_httpclient_instance(request)
-    users = client.users.get()
-    collab_groups = client.collaborationgroups.get()
-    new_notifications_count = len(client.notificationlogs.unread.get())
+    users = list(client.users.iterate(fields='id,username,backend_user'))
+    collab_groups = list(client.collaborationgroups.iterate())
+    new_notifications_count = client.notificationlogs.unread.count()
     for group in collab_groups:
         group["member_ids"] = [member.id for member in group.members]
 
@@ -38,9 +38,9 @@ def manage(request, group_id):
     client = get_httpclient_instance(request)
     group = client.collaborationgroups(group_id).get()
     members = group.members
-    users = client.users.get()
+    users = list(client.users.iterate(fields='id,username,backend_user'))
     group["member_ids"] = [member.id for member in members]
-    new_notifications_count = len(client.notificationlogs.unread.get())
+    new_notifications_count = client.notificationlogs.unread.count()
 
     return render(request, 'web/collaborationgroups/manage.html', {
         'title': "Group",
@@ -11,8 +11,8 @@ def dashboard(request):
     '''
 
     client = get_httpclient_instance(request)
-    containers = client.containers.get()
-    new_notifications_count = len(client.notificationlogs.unread.get())
+    containers = list(client.containers.iterate())
+    new_notifications_count = client.notificationlogs.unread.count()
 
     return render(request, 'web/dashboard.html', {
         'title': "Dashboard",
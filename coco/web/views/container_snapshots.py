@@ -12,9 +12,9 @@ def index(request, ct_id):
     Get a list of all snapshots for this container.
     """
     client = get_httpclient_instance(request)
-    container = client.containers(ct_id).get()
-    container_snapshots = client.containers(ct_id).snapshots.get()
-    new_notifications_count = len(client.notificationlogs.unread.get())
+    container = client.containers(ct_id).get(fields='id')
+    container_snapshots = list(client.containers(ct_id).snapshots.iterate())
+    new_notifications_count = client.notificationlogs.unread.count()
 
     return render(request, 'web/container_snapshots/index.html', {
         'title': "Container Snapshots",
@@ -58,7 +58,7 @@ def clone(request):
 
     ct_id = int(request.POST.get('id'))
     client = get_httpclient_instance(request)
-    container = client.containers(ct_id).get()
+    container = client.containers(ct_id).get(fields='name')
     params['name'] = "{}_clone".format(container.name)
 
     # create clone
@@ -98,7 +98,7 @@ def commit(request):
 
     client = get_httpclient_instance(request)
     try:
-        container = client.containers(ct_id).get()
+        container = client.containers(ct_id).get(fields='id')
     except HttpNotFoundError:
         messages.error(request, "Selected base container does not exist.")
     except Exception:
@@ -139,7 +139,7 @@ def create(request):
     client = get_httpclient_instance(request)
 
     try:
-        image = client.containers.images(params.get('image_id')).get()
+        image = client.containers.images(params.get('image_id')).get(fields='id')
     except HttpNotFoundError:
         messages.error(request, "Container bootstrap image does not exist or you don't have enough permissions for the requested operation.")
     except Exception as ex:
@@ -196,9 +196,9 @@ def index(request):
     """
     client = get_httpclient_instance(request)
     # containers = Container.objects.filter(owner=request.user.backend_user)
-    containers = client.containers.get()
-    images = client.containers.images.get()
-    new_notifications_count = len(client.notificationlogs.unread.get())
+    containers = list(client.containers.iterate())
+    images = list(client.containers.images.iterate(fields='id,friendly_name'))
+    new_notifications_count = client.notificationlogs.unread.count()
 
     return render(request, 'web/containers/index.html', {
         'title': "Containers",
@@ -226,7 +226,7 @@ def restart(request):
     client = get_httpclient_instance(request)
 
     try:
-        container = client.containers(ct_id).get()
+        container = client.containers(ct_id).get(fields='id')
     except HttpNotFoundError:
         messages.error(request, "Container does not exist.")
 
@@ -259,7 +259,7 @@ def start(request):
     client = get_httpclient_instance(request)
 
     try:
-        container = client.containers(ct_id).get()
+        container = client.containers(ct_id).get(fields='id')
     except HttpNotFoundError:
         messages.error(request, "Container does not exist.")
 
@@ -292,7 +292,7 @@ def stop(request):
     client = get_httpclient_instance(request)
 
     try:
-        container = client.containers(ct_id).get()
+        container = client.containers(ct_id).get(fields='id')
     except HttpNotFoundError:
         messages.error(request, "Container does not exist.")
 
@@ -325,7 +325,7 @@ def suspend(request):
     client = get_httpclient_instance(request)
 
     try:
-        container = client.containers(ct_id).get()
+        container = client.containers(ct_id).get(fields='id')
     except HttpNotFoundError:
         messages.error(request, "Container does not exist.")
 
@@ -358,7 +358,7 @@ def resume(request):
     client = get_httpclient_instance(request)
 
     try:
-        container = client.containers(ct_id).get()
+        container = client.containers(ct_id).get(fields='id')
     except HttpNotFoundError:
         messages.error(request, "Container does not exist.")
 
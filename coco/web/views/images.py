@@ -21,7 +21,7 @@ def delete(request):
     client = get_httpclient_instance(request)
 
     try:
-        image = client.containers.images(img_id).get()
+        image = client.containers.images(img_id).get(fields='id')
     except HttpNotFoundError:
         messages.error(request, "Image does not exist or you don't have the permissions to delete it.")
 
@@ -41,9 +41,11 @@ def delete(request):
 def index(request):
     client = get_httpclient_instance(request)
 
-    containers = client.containers.get()
-    images = client.containers.images.get()
-    new_notifications_count = len(client.notificationlogs.unread.get())
+    containers = list(client.containers.iterate(fields='id,name'))
+    images = list(client.containers.images.iterate(
+        fields='id,friendly_name,owner,is_public,short_description'
+    ))
+    new_notifications_count = client.notificationlogs.unread.count()
 
     return render(request, 'web/images/index.html', {
         'title': "Images",
@@ -58,10 +60,10 @@ def index(request):
 def manage(request, image_id):
     client = get_httpclient_instance(request)
     image = client.containers.images(image_id).get()
-    new_notifications_count = len(client.notificationlogs.unread.get())
+    new_notifications_count = client.notificationlogs.unread.count()
     image['access_group_ids'] = [g.id for g in image.access_groups]
-    users = client.users.get()
-    groups = client.collaborationgroups.get()
+    users = list(client.users.iterate(fields='id,backend_user'))
+    groups = list(client.collaborationgroups.iterate(fields='id,name,is_single_user_group'))
 
     return render(request, 'web/images/manage.html', {
         'title': "Image",
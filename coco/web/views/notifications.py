@@ -1,6 +1,7 @@
 from coco.core.auth.checks import login_allowed
 from coco.core.models import Notification, NotificationLog
-from coco.web.api_client_proxy import get_httpclient_instance
+from coco.web.api_client_proxy import get_httpclient_instance, \
+    get_page_params
 from coco.web.views._messages import api_error_message
 from datetime import datetime
 from django.contrib import messages
@@ -16,21 +17,28 @@ def index(request):
     """
     dateformat = "%Y-%m-%dT%H:%M:%S.%fZ"
     client = get_httpclient_instance(request)
-    notificationlogs = client.notificationlogs.get()
+    # the logs are never deleted, so only one page (latest first) is shown at a time
+    params = {}
+    if request.GET.get('cursor'):
+        params['cursor'] = request.GET.get('cursor')
+    page = client.notificationlogs.get(**params)
+    notificationlogs = page.results
     # get proper dates
     for notification in notificationlogs:
         notification["date"] = datetime.strptime(notification.notification.get('date'), dateformat)
     notificationtypes = client.notificationtypes.get()
-    groups = client.collaborationgroups.get()
-    containers = client.containers.get()
-    container_images = client.containers.images.get()
-    shares = client.shares.get()
+    groups = list(client.collaborationgroups.iterate(fields='id,name,is_single_user_group'))
+    containers = list(client.containers.iterate(fields='id,name'))
+    container_images = list(client.containers.images.iterate(fields='id,name'))
+    shares = list(client.shares.iterate(fields='id,name'))
 
-    new_notifications_count = len(client.notificationlogs.unread.get())
+    new_notifications_count = client.notificationlogs.unread.count()
 
     return render(request, 'web/notifications/index.html', {
         'title': "Notifications",
         'notifications': notificationlogs,
+        'next_cursor': get_page_params(page.next).get('cursor'),
+        'is_first_page': 'cursor' not in params,
         'notification_types': notificationtypes,
         'groups': groups,
         'containers': containers,
@@ -63,7 +71,6 @@ def create(request):
     params["group"] = request.POST.get('group', None)
     params["receiver_groups"] = [int(request.POST.get('receiver_groups', None))]
 
-    client.notifications.get()
     try:
         client.notifications.post(params)
         messages.success(request, "Notification sucessfully created.")
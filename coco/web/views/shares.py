@@ -16,8 +16,8 @@ def index(request):
     Shares listing/index.
     """
     client = get_httpclient_instance(request)
-    shares = client.shares.get()
-    new_notifications_count = len(client.notificationlogs.unread.get())
+    shares = list(client.shares.iterate(fields='id,name,description,tags,owner'))
+    new_notifications_count = client.notificationlogs.unread.count()
     return render(request, 'web/shares/index.html', {
         'title': "Shares",
         'shares': shares,
@@ -54,7 +54,7 @@ def create(request):
         if tag:
             # see if tag with this label exists already
             try:
-                t = client.tags.by_name(tag).get()
+                t = list(client.tags.by_name(tag).iterate())
             except Exception as e:
                 t = None
             if not t:
@@ -71,7 +71,6 @@ def create(request):
 
     params["tags"] = tags
 
-    client.shares.get()
     try:
         client.shares.post(params)
         messages.success(request, "Share created sucessfully.")
@@ -138,7 +137,6 @@ def share_remove_access_group(request):
     client = get_httpclient_instance(request)
 
     # then call API to add the users to the group
-    client.shares.get()
     params = {"access_groups": [group_id]}
 
     try:
@@ -220,9 +218,9 @@ def manage(request, share_id):
     client = get_httpclient_instance(request)
     share = client.shares(share_id).get()
     share['access_group_ids'] = [g.id for g in share.access_groups]
-    users = client.users.get()
-    groups = client.collaborationgroups.get()
-    new_notifications_count = len(client.notificationlogs.unread.get())
+    users = list(client.users.iterate(fields='id,backend_user'))
+    groups = list(client.collaborationgroups.iterate(fields='id,name,is_single_user_group'))
+    new_notifications_count = client.notificationlogs.unread.count()
 
     if share:
             return render(request, 'web/shares/manage.html', {
@@ -8,8 +8,17 @@ https://docs.djangoproject.com/en/1.7/howto/deployment/wsgi/
 '''
 
 from django.core.wsgi import get_wsgi_application
+import logging
 import os
 
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'coco.settings')
 application = get_wsgi_application()
+
+# build the workspace access index right away, so the first proxy requests do not have to
+from coco.core.auth.workspaces import workspace_access_index
+try:
+    workspace_access_index.rebuild()
+except Exception:
+    # i.e. the database is not set up yet, it is built on first use then
+    logging.getLogger(__name__).exception("Could not build the workspace access index on startup.")
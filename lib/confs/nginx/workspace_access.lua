@@ -0,0 +1,51 @@
+-- Workspace access check, run for every request to a workspace (see 'access_by_lua_file' in coco.conf).
+--
+-- Validates the workspace access token cookie issued by the Django application locally,
+-- so Django does not need to be asked for every single request. The token format is:
+--
+--   <user id>.<expires>.<endpoint>-<endpoint>-...<endpoint>.<signature>
+--
+-- where 'signature' is the hex encoded HMAC-SHA1 (keyed with WORKSPACE_TOKEN_SECRET) of everything
+-- before the last dot (see coco/core/auth/tokens.py). If the token does not grant access
+-- (i.e. it has not been refreshed yet after a new container has been created),
+-- the decision is left to the Django application via the '/auth' sub-request.
+--
+-- Requests granted by the token itself are reported to the Django application (through the same sub-request)
+-- once per minute and workspace, so it knows which workspaces are in use (see WorkspaceActivityTracker).
+
+local secret = ngx.var.workspace_token_secret
+local endpoint = string.lower(ngx.var.workspace_endpoint or '')
+local activity = ngx.shared.workspace_activity
+local report_interval = 60
+
+local function to_hex(str)
+    return (str:gsub('.', function(char) return string.format('%02x', char:byte()) end))
+end
+
+local function token_grants_access(token)
+    if not token or not secret or secret == '' or endpoint == '' then
+        return false
+    end
+    local payload, signature = token:match('^(.+)%.(%x+)$')
+    if not payload or to_hex(ngx.hmac_sha1(secret, payload)) ~= signature then
+        return false
+    end
+    local expires, endpoints = payload:match('^%d+%.(%d+)%.([%x%-]*)$')
+    if not expires or tonumber(expires) < ngx.time() then
+        return false
+    end
+    return string.find('-' .. endpoints .. '-', '-' .. endpoint .. '-', 1, true) ~= nil
+end
+
+if token_grants_access(ngx.var.cookie_workspace_token) then
+    if activity and activity:add(endpoint, true, report_interval) then
+        ngx.location.capture('/auth')  -- records the access, the answer is not needed
+    end
+    return
+end
+
+local response = ngx.location.capture('/auth')
+if response.status == ngx.HTTP_OK then
+    return
+end
+ngx.exit(ngx.HTTP_FORBIDDEN)